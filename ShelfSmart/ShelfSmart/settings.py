@@ -67,8 +67,11 @@ INSTALLED_APPS = [
     'users.user_profile.apps.UserProfileConfig',
     # Search functionality
     'search_history',
+    'catalog_search',
     # Notification service
     'due_notifications',
+    # Background jobs
+    'job_queue',
 ]
 
 MIDDLEWARE = [
@@ -198,6 +201,50 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+# Due/overdue emails sent over one SMTP connection before it is reopened
+NOTIFICATION_EMAIL_BATCH_SIZE = int(os.getenv("NOTIFICATION_EMAIL_BATCH_SIZE", "50"))
+# Send one email per borrower listing all their books instead of one per loan
+NOTIFICATION_DIGEST = os.getenv("NOTIFICATION_DIGEST", "False").lower() == "true"
+
+# Background jobs (OTP and reminder emails) run on a background thread of
+# the web process once the request's transaction commits. Deployments that start a worker
+# with `manage.py run_worker` set JOB_QUEUE_EAGER=false to leave them to it.
+JOB_QUEUE_EAGER = os.getenv("JOB_QUEUE_EAGER", "True").lower() == "true"
+
+# Book metadata lookups by ISBN are cached in the database for this many
+# seconds, "No book found" answers for the shorter negative TTL
+ISBN_CACHE_TTL = int(os.getenv("ISBN_CACHE_TTL", str(30 * 24 * 3600)))
+ISBN_CACHE_NEGATIVE_TTL = int(os.getenv("ISBN_CACHE_NEGATIVE_TTL", str(24 * 3600)))
+ISBN_CACHE_MEMORY_SIZE = int(os.getenv("ISBN_CACHE_MEMORY_SIZE", "1024"))
+# Bulk ISBN validation: concurrent provider requests and ISBNs per request
+ISBN_BULK_WORKERS = int(os.getenv("ISBN_BULK_WORKERS", "8"))
+ISBN_BULK_MAX = int(os.getenv("ISBN_BULK_MAX", "500"))
+
+# Where ISBN lookups get book metadata from (see isbn_validation/providers.py).
+# Set ISBN_METADATA_PROVIDER=local to answer from a JSON Lines file instead of
+# Google Books, e.g. for offline development and load tests.
+ISBN_METADATA_PROVIDER = os.getenv("ISBN_METADATA_PROVIDER", "google")
+ISBN_METADATA_PROVIDERS = {
+    'google': {
+        'BACKEND': 'isbn_validation.providers.GoogleBooksProvider',
+        'OPTIONS': {
+            'api_key': os.getenv("GOOGLE_BOOKS_API_KEY", ""),
+            'connect_timeout': float(os.getenv("GOOGLE_BOOKS_CONNECT_TIMEOUT", "3.05")),
+            'read_timeout': float(os.getenv("GOOGLE_BOOKS_READ_TIMEOUT", "10")),
+        },
+    },
+    'local': {
+        'BACKEND': 'isbn_validation.providers.LocalJsonlProvider',
+        'OPTIONS': {
+            'path': os.getenv("ISBN_LOCAL_CATALOG", str(BASE_DIR / 'isbn_validation' / 'data' / 'sample_books.jsonl')),
+            'latency': float(os.getenv("ISBN_LOCAL_LATENCY", "0")),
+        },
+    },
+}
+
+# Rows written per transaction by book imports (manage.py import_books and
+# the Import Books page)
+BOOK_IMPORT_BATCH_SIZE = int(os.getenv("BOOK_IMPORT_BATCH_SIZE", "1000"))
 
 # Logging - show debug logs for books_admin in console
 LOGGING = {
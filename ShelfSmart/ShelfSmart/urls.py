@@ -35,5 +35,7 @@ urlpatterns = [
     path('search-history/', include(('search_history.urls', 'search_history'), namespace='search_history')),
     # Due/Overdue notifications
     path('notifications/', include(('due_notifications.urls', 'due_notifications'), namespace='due_notifications')),
+    # Background job status
+    path('jobs/', include(('job_queue.urls', 'job_queue'), namespace='job_queue')),
     path('', include(('user_auth.urls', 'user_auth'), namespace='user_auth')),
 ]
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AdminDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admin.admin_dashboard'
+
+    def ready(self):
+        # Keep the dashboard counters in sync with loans, users and books
+        from . import signals  # noqa: F401
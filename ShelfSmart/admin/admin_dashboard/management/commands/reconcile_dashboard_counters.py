@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from admin.admin_dashboard.models import CirculationCounters
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard circulation counters from the source tables."
+
+    def handle(self, *args, **options):
+        before = None
+        if CirculationCounters.objects.filter(id=1).exists():
+            before = CirculationCounters.get_counters()  # with pending deltas
+        counters = CirculationCounters.reconcile()
+
+        if before is not None and str(before) != str(counters):
+            self.stdout.write(self.style.WARNING(f"Counters had drifted: {before}"))
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters: {counters}"))
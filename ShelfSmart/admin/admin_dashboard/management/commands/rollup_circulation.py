@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin.admin_dashboard.rollups import rollup_pending_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll up circulation activity into one row per day. Only days after "
+        "the last rolled-up day are processed, up to yesterday."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help="Recompute from this day (YYYY-MM-DD) even if already rolled up."
+        )
+        parser.add_argument(
+            '--until',
+            help="Last day to roll up (YYYY-MM-DD, default: yesterday)."
+        )
+
+    def handle(self, *args, **options):
+        since = self._parse_date(options['since'], '--since')
+        until = self._parse_date(options['until'], '--until')
+
+        start, end, days = rollup_pending_days(until=until, since=since)
+        if not days:
+            self.stdout.write("Nothing to roll up.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {days} day(s) from {start} to {end}."))
+
+    def _parse_date(self, value, option):
+        if value is None:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"{option} must be a date in YYYY-MM-DD format")
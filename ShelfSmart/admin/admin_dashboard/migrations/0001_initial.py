@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_counters(apps, schema_editor):
+    CirculationCounters = apps.get_model('admin_dashboard', 'CirculationCounters')
+    Book = apps.get_model('common', 'Book')
+    BorrowRecord = apps.get_model('common', 'BorrowRecord')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    CirculationCounters.objects.update_or_create(
+        id=1,
+        defaults={
+            'total_users': User.objects.count(),
+            'total_books': Book.objects.count(),
+            'total_borrowed': BorrowRecord.objects.filter(is_returned=False).count(),
+            'total_returned': BorrowRecord.objects.filter(is_returned=True).count(),
+        }
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('common', '0009_borrowrecord_loan_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CirculationCounters',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('total_books', models.PositiveIntegerField(default=0)),
+                ('total_borrowed', models.PositiveIntegerField(default=0, help_text='Loans not yet returned')),
+                ('total_returned', models.PositiveIntegerField(default=0, help_text='Loans returned, all time')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Circulation Counters',
+                'verbose_name_plural': 'Circulation Counters',
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
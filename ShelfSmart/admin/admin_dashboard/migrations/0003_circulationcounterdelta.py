@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0002_dailycirculationstat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CirculationCounterDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_users', models.IntegerField(default=0)),
+                ('total_books', models.IntegerField(default=0)),
+                ('total_borrowed', models.IntegerField(default=0)),
+                ('total_returned', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Circulation Counter Delta',
+                'verbose_name_plural': 'Circulation Counter Deltas',
+            },
+        ),
+    ]
@@ -1,3 +1,154 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Sum
+from django.utils import timezone
 
-# Create your models here.
+COUNTER_FIELDS = ('total_users', 'total_books', 'total_borrowed', 'total_returned')
+
+# Pending deltas folded into the counters row once a read sees this many
+COUNTER_FOLD_AFTER = getattr(settings, 'DASHBOARD_COUNTER_FOLD_AFTER', 1000)
+
+
+class CirculationCounters(models.Model):
+    """
+    Singleton row of dashboard totals. Only one row should exist with id=1.
+
+    Changes are not applied to this row directly: every change appends a
+    :class:`CirculationCounterDelta` in its own transaction (see
+    ``signals.py``), so concurrent borrows and returns never queue on one
+    row. Reads add the pending deltas to the row and fold them in once
+    there are enough of them. ``manage.py reconcile_dashboard_counters``
+    recomputes everything from scratch.
+    """
+    total_users = models.PositiveIntegerField(default=0)
+    total_books = models.PositiveIntegerField(default=0)
+    total_borrowed = models.PositiveIntegerField(default=0, help_text="Loans not yet returned")
+    total_returned = models.PositiveIntegerField(default=0, help_text="Loans returned, all time")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Circulation Counters"
+        verbose_name_plural = "Circulation Counters"
+
+    def __str__(self):
+        return (
+            f"Users: {self.total_users}, Books: {self.total_books}, "
+            f"Borrowed: {self.total_borrowed}, Returned: {self.total_returned}"
+        )
+
+    @classmethod
+    def get_counters(cls):
+        """
+        Get the singleton counters including pending deltas, computing them
+        if the row is missing. The returned object is not saved.
+        """
+        counters = cls.objects.filter(id=1).first()
+        if counters is None:
+            return cls.reconcile()
+
+        pending = CirculationCounterDelta.objects.aggregate(
+            count=Count('id'), **{field: Sum(field) for field in COUNTER_FIELDS}
+        )
+        if pending['count'] >= COUNTER_FOLD_AFTER:
+            return cls.fold_deltas()
+        for field in COUNTER_FIELDS:
+            setattr(counters, field, getattr(counters, field) + (pending[field] or 0))
+        return counters
+
+    @classmethod
+    def adjust(cls, **deltas):
+        """
+        Record ``deltas`` (e.g. ``total_borrowed=1, total_returned=-1``) as a
+        new delta row. Only an ``INSERT``, so concurrent changes neither
+        overwrite nor wait for each other.
+        """
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if deltas:
+            CirculationCounterDelta.objects.create(**deltas)
+
+    @classmethod
+    def fold_deltas(cls):
+        """Add the pending deltas to the counters row and delete them."""
+        with transaction.atomic():
+            # Locking the row serializes folds, so no delta is added twice
+            counters = cls.objects.select_for_update().filter(id=1).first()
+            if counters is None:
+                return cls.reconcile()
+            deltas = CirculationCounterDelta.objects.all()
+            pending = deltas.aggregate(last=Max('id'), **{field: Sum(field) for field in COUNTER_FIELDS})
+            if pending['last'] is None:
+                return counters
+            cls.objects.filter(id=1).update(
+                updated_at=timezone.now(),
+                **{field: F(field) + (pending[field] or 0) for field in COUNTER_FIELDS}
+            )
+            deltas.filter(id__lte=pending['last']).delete()
+        return cls.objects.get(id=1)
+
+    @classmethod
+    def reconcile(cls):
+        """Recompute every counter from the source tables."""
+        from admin.common.models import Book, BorrowRecord
+        from user_auth.models import User
+
+        with transaction.atomic():
+            # The counts include every delta written so far
+            last = CirculationCounterDelta.objects.aggregate(last=Max('id'))['last']
+            counters, _ = cls.objects.update_or_create(
+                id=1,
+                defaults={
+                    'total_users': User.objects.count(),
+                    'total_books': Book.objects.count(),
+                    'total_borrowed': BorrowRecord.objects.filter(is_returned=False).count(),
+                    'total_returned': BorrowRecord.objects.filter(is_returned=True).count(),
+                }
+            )
+            if last is not None:
+                CirculationCounterDelta.objects.filter(id__lte=last).delete()
+        return counters
+
+
+class CirculationCounterDelta(models.Model):
+    """
+    One change to the dashboard totals, appended by the change's own
+    transaction and later folded into :class:`CirculationCounters`.
+    """
+    total_users = models.IntegerField(default=0)
+    total_books = models.IntegerField(default=0)
+    total_borrowed = models.IntegerField(default=0)
+    total_returned = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Circulation Counter Delta"
+        verbose_name_plural = "Circulation Counter Deltas"
+
+    def __str__(self):
+        return ", ".join(f"{field} {getattr(self, field):+d}" for field in COUNTER_FIELDS if getattr(self, field))
+
+
+class DailyCirculationStat(models.Model):
+    """
+    One row of circulation activity per calendar day, filled in by
+    ``manage.py rollup_circulation`` (see ``rollups.py``).
+
+    ``overdue`` is a snapshot: the number of loans that were past due and
+    still open at the end of the day.
+    """
+    date = models.DateField(unique=True)
+    borrowed = models.PositiveIntegerField(default=0)
+    returned = models.PositiveIntegerField(default=0)
+    overdue = models.PositiveIntegerField(default=0)
+    new_users = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['date']
+        verbose_name = "Daily Circulation Stat"
+        verbose_name_plural = "Daily Circulation Stats"
+
+    def __str__(self):
+        return (
+            f"{self.date}: borrowed {self.borrowed}, returned {self.returned}, "
+            f"overdue {self.overdue}, new users {self.new_users}"
+        )
@@ -0,0 +1,229 @@
+"""
+Daily circulation rollups for the dashboard charts.
+
+``rollup_pending_days`` aggregates the raw loan and user tables into one
+``DailyCirculationStat`` row per finished day, starting after the last day
+already rolled up. ``circulation_series`` answers chart queries for any date
+range and granularity from those rows, so its cost depends on the number of
+days asked for rather than the size of the loan history. Days that are not
+rolled up yet (normally just today) are computed live.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import TruncDate
+
+from admin.common.models import BorrowRecord
+from user_auth.models import User
+
+from .models import DailyCirculationStat
+
+GRANULARITIES = ('day', 'week', 'month', 'year')
+DEFAULT_GRANULARITY = 'month'
+
+# Days aggregated per transaction when catching up on a long history
+ROLLUP_CHUNK_DAYS = 366
+
+# Longest range, in days, a chart may ask for at each granularity. Every
+# day in the range is visited, and finer granularities return one point
+# per period.
+MAX_RANGE_DAYS = {
+    'day': 3 * 366,
+    'week': 10 * 366,
+    'month': 50 * 366,
+    'year': 100 * 366,
+}
+
+
+def _days(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def compute_daily_stats(start, end):
+    """
+    Aggregate the raw tables for every day in ``start..end`` (inclusive).
+
+    Returns ``{day: {'borrowed', 'returned', 'overdue', 'new_users'}}`` with an
+    entry for each day, using a fixed number of queries for the whole range.
+    """
+    stats = {
+        day: {'borrowed': 0, 'returned': 0, 'overdue': 0, 'new_users': 0}
+        for day in _days(start, end)
+    }
+    if not stats:
+        return stats
+
+    borrowed = (
+        BorrowRecord.objects.filter(borrowed_date__range=(start, end))
+        .values('borrowed_date').annotate(count=Count('id'))
+    )
+    for row in borrowed:
+        stats[row['borrowed_date']]['borrowed'] = row['count']
+
+    returned = (
+        BorrowRecord.objects.filter(is_returned=True, return_date__range=(start, end))
+        .values('return_date').annotate(count=Count('id'))
+    )
+    for row in returned:
+        stats[row['return_date']]['returned'] = row['count']
+
+    new_users = (
+        User.objects.filter(created_at__date__range=(start, end))
+        .annotate(day=TruncDate('created_at')).values('day').annotate(count=Count('id'))
+    )
+    for row in new_users:
+        stats[row['day']]['new_users'] = row['count']
+
+    # A loan is overdue at the end of day D if it was borrowed by D, was due
+    # before D and had not been returned by D. Each loan therefore adds one
+    # to a contiguous run of days, accumulated here as a difference array.
+    delta = defaultdict(int)
+    loans = (
+        BorrowRecord.objects.filter(due_date__lt=end)
+        .filter(Q(is_returned=False) | Q(return_date__gt=start))
+        .values_list('borrowed_date', 'due_date', 'return_date', 'is_returned')
+    )
+    for borrowed_date, due_date, return_date, is_returned in loans.iterator(chunk_size=2000):
+        first = max(due_date + timedelta(days=1), borrowed_date, start)
+        if is_returned:
+            if return_date is None or return_date <= first:
+                continue
+            delta[return_date] -= 1
+        if first <= end:
+            delta[first] += 1
+
+    running = 0
+    for day in _days(start, end):
+        running += delta.get(day, 0)
+        stats[day]['overdue'] = running
+
+    return stats
+
+
+def _first_activity_day():
+    first_loan = BorrowRecord.objects.aggregate(day=Min('borrowed_date'))['day']
+    first_user = User.objects.aggregate(joined=Min('created_at'))['joined']
+    days = [day for day in (first_loan, first_user.date() if first_user else None) if day]
+    return min(days) if days else None
+
+
+def last_rolled_up_day():
+    return DailyCirculationStat.objects.aggregate(day=Max('date'))['day']
+
+
+def rollup_days(start, end):
+    """(Re)write the rollup rows for ``start..end``. Returns the number of days."""
+    total = 0
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=ROLLUP_CHUNK_DAYS - 1), end)
+        stats = compute_daily_stats(chunk_start, chunk_end)
+        with transaction.atomic():
+            DailyCirculationStat.objects.filter(date__range=(chunk_start, chunk_end)).delete()
+            DailyCirculationStat.objects.bulk_create(
+                DailyCirculationStat(date=day, **values) for day, values in stats.items()
+            )
+        total += len(stats)
+        chunk_start = chunk_end + timedelta(days=1)
+    return total
+
+
+def rollup_pending_days(until=None, since=None):
+    """
+    Roll up every finished day that has no row yet, up to ``until``
+    (default: yesterday). ``since`` forces a recompute from that day on.
+
+    Returns ``(start, end, days)``; ``start`` is ``None`` if nothing was due.
+    """
+    until = until or date.today() - timedelta(days=1)
+    if since is None:
+        last = last_rolled_up_day()
+        since = last + timedelta(days=1) if last else _first_activity_day()
+    if since is None or since > until:
+        return None, until, 0
+    return since, until, rollup_days(since, until)
+
+
+def bucket_start(day, granularity):
+    """Return the first day of the ``granularity`` period containing ``day``."""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'year':
+        return day.replace(month=1, day=1)
+    return day
+
+
+def bucket_label(start, granularity):
+    if granularity == 'month':
+        return start.strftime('%b %Y')
+    if granularity == 'year':
+        return str(start.year)
+    return start.isoformat()
+
+
+def check_range(start, end, granularity):
+    """Raise ``ValueError`` if ``start..end`` is too long for ``granularity``."""
+    if (end - start).days + 1 > MAX_RANGE_DAYS[granularity]:
+        raise ValueError(
+            f"The date range is too long for {granularity} granularity; "
+            f"pick at most {MAX_RANGE_DAYS[granularity] // 366} years."
+        )
+
+
+def circulation_series(start, end, granularity=DEFAULT_GRANULARITY):
+    """
+    Chart data for ``start..end`` grouped by ``granularity``.
+
+    Borrows, returns and new users are summed per period; ``overdue`` is the
+    snapshot on the last day of the period that has data. Raises
+    ``ValueError`` for an unknown granularity or a range longer than
+    ``MAX_RANGE_DAYS`` allows.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    check_range(start, end, granularity)
+
+    daily = {
+        row['date']: row
+        for row in DailyCirculationStat.objects.filter(date__range=(start, end))
+        .values('date', 'borrowed', 'returned', 'overdue', 'new_users')
+    }
+
+    # Fill in days that have not been rolled up yet, but never the future
+    last = last_rolled_up_day()
+    live_start = max(start, last + timedelta(days=1)) if last else start
+    live_end = min(end, date.today())
+    if live_start <= live_end:
+        daily.update(compute_daily_stats(live_start, live_end))
+
+    buckets = {}
+    for day in _days(start, end):
+        key = bucket_start(day, granularity)
+        bucket = buckets.setdefault(key, {'borrowed': 0, 'returned': 0, 'overdue': 0, 'new_users': 0})
+        row = daily.get(day)
+        if row is None:
+            continue
+        bucket['borrowed'] += row['borrowed']
+        bucket['returned'] += row['returned']
+        bucket['new_users'] += row['new_users']
+        bucket['overdue'] = row['overdue']
+
+    keys = sorted(buckets)
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'granularity': granularity,
+        'labels': [bucket_label(key, granularity) for key in keys],
+        'borrowed': [buckets[key]['borrowed'] for key in keys],
+        'returned': [buckets[key]['returned'] for key in keys],
+        'overdue': [buckets[key]['overdue'] for key in keys],
+        'new_users': [buckets[key]['new_users'] for key in keys],
+    }
@@ -0,0 +1,61 @@
+"""
+Keep ``CirculationCounters`` in step with the tables it counts.
+
+Each receiver appends a delta inside the transaction of the change it
+counts, so a rolled-back borrow or delete never leaves the counters off by
+one. Appending takes no lock other transactions wait on.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from admin.common.models import Book, BorrowRecord
+from admin.common.signals import loan_returned
+from user_auth.models import User
+
+from .models import CirculationCounters
+
+
+@receiver(post_save, sender=BorrowRecord)
+def count_new_loan(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        if instance.is_returned:
+            CirculationCounters.adjust(total_returned=1)
+        else:
+            CirculationCounters.adjust(total_borrowed=1)
+
+
+@receiver(loan_returned, sender=BorrowRecord)
+def count_returned_loan(sender, record, **kwargs):
+    CirculationCounters.adjust(total_borrowed=-1, total_returned=1)
+
+
+@receiver(post_delete, sender=BorrowRecord)
+def count_deleted_loan(sender, instance, **kwargs):
+    # Also fires for loans removed along with their user or book
+    if instance.is_returned:
+        CirculationCounters.adjust(total_returned=-1)
+    else:
+        CirculationCounters.adjust(total_borrowed=-1)
+
+
+@receiver(post_save, sender=User)
+def count_new_user(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        CirculationCounters.adjust(total_users=1)
+
+
+@receiver(post_delete, sender=User)
+def count_deleted_user(sender, instance, **kwargs):
+    CirculationCounters.adjust(total_users=-1)
+
+
+@receiver(post_save, sender=Book)
+def count_new_book(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        CirculationCounters.adjust(total_books=1)
+
+
+@receiver(post_delete, sender=Book)
+def count_deleted_book(sender, instance, **kwargs):
+    CirculationCounters.adjust(total_books=-1)
@@ -5,4 +5,6 @@ app_name = 'admin_dashboard'
 
 urlpatterns = [
     path('', views.dashboard_view, name='dashboard'),
+    path('api/circulation/', views.circulation_stats_api, name='circulation_stats_api'),
+    path('api/overdue/', views.overdue_borrowers_api, name='overdue_borrowers_api'),
 ]
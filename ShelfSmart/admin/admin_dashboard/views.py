@@ -6,16 +6,22 @@ from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from user_auth.decorators import admin_required
 import logging
 
-from datetime import datetime, date
-from django.db.models import Count, Q
-from django.db.models.functions import ExtractMonth, ExtractYear
+from datetime import date
+from django.db.models import CharField, DateField, F, Value
+from django.db.models.functions import Concat
 from user_auth.models import User
-from admin.common.models import Book, BorrowRecord
+from admin.common.models import BorrowRecord
+from admin.common.expressions import DaysBetween
+from .models import CirculationCounters
+from .rollups import DEFAULT_GRANULARITY, GRANULARITIES, check_range, circulation_series
 import json
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Overdue borrowers shown per page on the dashboard
+OVERDUE_PAGE_SIZE = 3
+
 def _single_line(value: str) -> str:
     """Normalize input to a single line: remove CR/LF, collapse internal whitespace, and strip."""
     if value is None:
@@ -58,103 +64,92 @@ def get_current_user_info(request):
         "role": "User"
     }
 
-@admin_required
-def dashboard_view(request):
-    """Admin Dashboard with real-time data from the database"""
-    # Fetch total users from Django's User model
-    total_users = User.objects.count()
-    logger.info(f"Total users found: {total_users}")
-
-    # Fetch total books from the Book model
-    total_books = Book.objects.count()
-    logger.info(f"Total books found: {total_books}")
-
-    # Fetch active admins from the User model
-    admins = User.objects.filter(user_type='admin')
-    logger.info(f"Admins found: {admins.count()}")
+def _overdue_borrowers_page(page_number):
+    """
+    Return one ``Paginator`` page of overdue borrowers.
 
-    # Fetch borrow statistics from BorrowRecord model
-    # Total currently borrowed books (not returned)
-    total_borrowed = BorrowRecord.objects.filter(is_returned=False).count()
-    logger.info(f"Total borrowed books: {total_borrowed}")
-    
-    # Total returned books (all time)
-    total_returned = BorrowRecord.objects.filter(is_returned=True).count()
-    logger.info(f"Total returned books: {total_returned}")
-    
-    # Fetch overdue borrowers (not returned and due date passed)
+    The user and book are joined in SQL, only the displayed columns are
+    selected and ``days_overdue`` is computed by the database, so a page
+    costs a COUNT plus a LIMIT/OFFSET query however many loans are overdue.
+    """
     today = date.today()
     overdue_records = BorrowRecord.objects.filter(
         is_returned=False,
         due_date__lt=today
-    ).select_related('book').order_by('due_date')
-    
-    # Build overdue borrowers list with user information
-    overdue_borrowers = []
-    for record in overdue_records:
-        try:
-            user = User.objects.get(id=record.user_id)
-            days_overdue = (today - record.due_date).days
-            overdue_borrowers.append({
-                'id': record.id,
-                'user_name': f"{user.first_name} {user.last_name}",
-                'username': user.username,
-                'book_name': record.book.title,
-                'due_date': record.due_date,
-                'days_overdue': days_overdue
-            })
-        except User.DoesNotExist:
-            continue
-    
-    logger.info(f"Overdue borrowers found: {len(overdue_borrowers)}")
-    
-    # Paginate overdue borrowers (3 items per page)
-    paginator = Paginator(overdue_borrowers, 3)
-    page_number = request.GET.get('page', 1)
-    
+    ).values(
+        'id',
+        'due_date',
+        username=F('user__username'),
+        user_name=Concat('user__first_name', Value(' '), 'user__last_name', output_field=CharField()),
+        book_name=F('book__title'),
+        days_overdue=DaysBetween(Value(today, output_field=DateField()), 'due_date'),
+    ).order_by('due_date', 'id')
+
+    paginator = Paginator(overdue_records, OVERDUE_PAGE_SIZE)
     try:
-        overdue_borrowers_page = paginator.page(page_number)
+        return paginator.page(page_number)
     except PageNotAnInteger:
-        overdue_borrowers_page = paginator.page(1)
+        return paginator.page(1)
     except EmptyPage:
-        overdue_borrowers_page = paginator.page(paginator.num_pages)
-    
-    # Calculate monthly borrow and return statistics for the current year
-    current_year = datetime.now().year
-    
-    # Initialize monthly data arrays (12 months)
-    monthly_borrowed = [0] * 12
-    monthly_returned = [0] * 12
-    
-    # Get borrowed books by month (based on borrowed_date)
-    borrowed_by_month = BorrowRecord.objects.filter(
-        borrowed_date__year=current_year
-    ).annotate(
-        month=ExtractMonth('borrowed_date')
-    ).values('month').annotate(
-        count=Count('id')
-    ).order_by('month')
-    
-    for item in borrowed_by_month:
-        month_index = item['month'] - 1  # Convert 1-12 to 0-11
-        monthly_borrowed[month_index] = item['count']
-    
-    # Get returned books by month (based on return_date)
-    returned_by_month = BorrowRecord.objects.filter(
-        return_date__year=current_year,
-        is_returned=True
-    ).annotate(
-        month=ExtractMonth('return_date')
-    ).values('month').annotate(
-        count=Count('id')
-    ).order_by('month')
-    
-    for item in returned_by_month:
-        month_index = item['month'] - 1  # Convert 1-12 to 0-11
-        monthly_returned[month_index] = item['count']
-    
-    logger.info(f"Monthly borrowed: {monthly_borrowed}")
-    logger.info(f"Monthly returned: {monthly_returned}")
+        return paginator.page(paginator.num_pages)
+
+
+def _default_chart_range():
+    """The current calendar year, by month."""
+    today = date.today()
+    return date(today.year, 1, 1), date(today.year, 12, 31), DEFAULT_GRANULARITY
+
+
+def _parse_chart_params(request):
+    """
+    Read the chart's ``start``, ``end`` (YYYY-MM-DD) and ``granularity`` query
+    params, defaulting to the current year by month. Raises ``ValueError`` if
+    they are invalid or span too long a range.
+    """
+    default_start, default_end, default_granularity = _default_chart_range()
+
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else default_start
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else default_end
+    except ValueError:
+        raise ValueError("Dates must be in YYYY-MM-DD format.")
+    if start > end:
+        raise ValueError("The start date must be on or before the end date.")
+
+    granularity = request.GET.get('granularity') or default_granularity
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularity must be one of: {', '.join(GRANULARITIES)}.")
+    check_range(start, end, granularity)
+
+    return start, end, granularity
+
+
+@admin_required
+def dashboard_view(request):
+    """Admin Dashboard with real-time data from the database"""
+    # Totals come from the materialized counters row instead of COUNT queries
+    counters = CirculationCounters.get_counters()
+    total_users = counters.total_users
+    total_books = counters.total_books
+    total_borrowed = counters.total_borrowed
+    total_returned = counters.total_returned
+    logger.info(f"Dashboard counters: {counters}")
+
+    # Fetch active admins from the User model
+    admins = list(User.objects.filter(user_type='admin'))
+    logger.info(f"Admins found: {len(admins)}")
+
+    # One page of overdue borrowers, paginated by the database
+    overdue_borrowers_page = _overdue_borrowers_page(request.GET.get('page', 1))
+    logger.info(f"Overdue borrowers found: {overdue_borrowers_page.paginator.count}")
+
+    # Borrow/return chart, answered from the daily rollup
+    try:
+        chart_start, chart_end, granularity = _parse_chart_params(request)
+    except ValueError as e:
+        messages.error(request, str(e))
+        chart_start, chart_end, granularity = _default_chart_range()
+    chart_series = circulation_series(chart_start, chart_end, granularity)
 
     context = {
         "user_info": get_current_user_info(request),
@@ -163,9 +158,51 @@ def dashboard_view(request):
         "overdue_borrowers": overdue_borrowers_page,
         "total_borrowed": total_borrowed,
         "total_returned": total_returned,
-        "monthly_borrowed": json.dumps(monthly_borrowed),
-        "monthly_returned": json.dumps(monthly_returned),
+        "chart_series": json.dumps(chart_series),
+        "chart_start": chart_start,
+        "chart_end": chart_end,
+        "chart_granularity": granularity,
+        "granularities": GRANULARITIES,
         "admins": admins,
     }
 
     return render(request, "admin_dashboard/admin_dashboard.html", context)
+
+
+@admin_required
+def circulation_stats_api(request):
+    """
+    API endpoint returning borrow/return/overdue/new-user series for the
+    requested ``start``, ``end`` and ``granularity``
+    """
+    try:
+        start, end, granularity = _parse_chart_params(request)
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    return JsonResponse({"success": True, **circulation_series(start, end, granularity)})
+
+
+@admin_required
+def overdue_borrowers_api(request):
+    """
+    API endpoint returning one page of the dashboard's overdue borrowers list
+    """
+    page = _overdue_borrowers_page(request.GET.get('page', 1))
+
+    borrowers = []
+    for borrower in page:
+        borrowers.append({
+            **borrower,
+            'due_date': borrower['due_date'].isoformat(),
+        })
+
+    return JsonResponse({
+        "success": True,
+        "borrowers": borrowers,
+        "page": page.number,
+        "num_pages": page.paginator.num_pages,
+        "count": page.paginator.count,
+        "has_next": page.has_next(),
+        "has_previous": page.has_previous(),
+    })
@@ -2,14 +2,20 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from user_auth.decorators import admin_required
+from django.core.paginator import Paginator
+from django.db.models import Count
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 import logging
 
 from admin.common.models import Author
+from admin.common.name_index import find_existing
 
 logger = logging.getLogger(__name__)
 
+# Rows per page of the management table
+PAGE_SIZE = 50
+
 
 def get_current_user_info(request):
     """Helper function to get current user's info from Django User object"""
@@ -68,8 +74,10 @@ def author_management(request):
                     return redirect("/admin-panel/authors/")
 
                 # Check if author name already exists
-                if Author.objects.filter(name=name).exists():
-                    messages.error(request, f"Author '{name}' already exists.")
+                # (ignoring case, accents and punctuation, e.g. from ISBN quick-add)
+                existing = find_existing(Author, name)
+                if existing:
+                    messages.error(request, f"Author '{name}' already exists as '{existing.name}'.")
                     return redirect("/admin-panel/authors/")
 
                 author = Author(
@@ -95,9 +103,9 @@ def author_management(request):
                     return redirect("/admin-panel/authors/")
 
                 # Check if new name conflicts with another author
-                existing = Author.objects.filter(name=new_name).exclude(pk=author_id)
-                if existing.exists():
-                    messages.error(request, f"Author '{new_name}' already exists.")
+                existing = find_existing(Author, new_name, exclude_pk=author.pk)
+                if existing:
+                    messages.error(request, f"Author '{new_name}' already exists as '{existing.name}'.")
                     return redirect("/admin-panel/authors/")
 
                 author.name = new_name
@@ -131,10 +139,16 @@ def author_management(request):
     
     # GET request - fetch all authors
     try:
-        authors_qs = Author.objects.all().order_by('name')
+        search_query = request.GET.get("q", "").strip()
+        authors_qs = Author.objects.annotate(
+            book_count=Count('book_authors', distinct=True)
+        ).order_by('name', 'pk')  # by id within equal names so pages do not overlap
+        if search_query:
+            authors_qs = authors_qs.filter(name__icontains=search_query)
+        page_obj = Paginator(authors_qs, PAGE_SIZE).get_page(request.GET.get("page"))
         authors = []
         
-        for a in authors_qs:
+        for a in page_obj:
             authors.append({
                 "id": a.id,
                 "author_id": a.author_id,
@@ -143,12 +157,20 @@ def author_management(request):
                 "nationality": a.nationality or "",
                 "created_at": a.created_at,
                 "updated_at": a.updated_at,
-                "book_count": a.book_authors.count(),
+                "book_count": a.book_count,
             })
 
+        # Keep the search on the pagination links
+        query = request.GET.copy()
+        query.pop("page", None)
+        filter_query = query.urlencode()
+
         context = {
             "user_info": get_current_user_info(request),
             "authors": authors,
+            "page_obj": page_obj,
+            "search_query": search_query,
+            "filter_query": filter_query,
             "active_page": "authors",
         }
         return render(request, "author_management/author_management.html", context)
@@ -0,0 +1,140 @@
+"""
+Streaming export of the catalog as CSV or JSON Lines.
+
+Books are read with ``.iterator(chunk_size=...)`` and their authors are
+fetched with one query per chunk, so memory use does not grow with the size
+of the catalog and the first rows are written straight away. Category
+paths are read from the database with each chunk (not from the cached
+category tree, which can lag behind other processes). The columns are the ones
+``importer.py`` reads (plus ``id`` and ``availability``), so an export can
+be imported into another ShelfSmart instance.
+"""
+
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+
+from admin.common.category_tree import PATH_SEPARATOR
+from admin.common.models import Book, BookAuthor, Category
+
+from .importer import FORMATS, LIST_SEPARATOR
+
+# Books read from the database at a time
+CHUNK_SIZE = getattr(settings, 'BOOK_EXPORT_CHUNK_SIZE', 2000)
+
+COLUMNS = [
+    'id', 'isbn', 'title', 'subtitle', 'description', 'publication_date', 'edition',
+    'pages', 'language', 'cover_image_url', 'category', 'publisher', 'authors',
+    'author_roles', 'quantity', 'total_copies', 'availability',
+]
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class _Echo:
+    """A file-like object that returns what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def iter_books(queryset=None, chunk_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Yield one dict of COLUMNS per book, in id order."""
+    chunk_size = max(1, chunk_size or CHUNK_SIZE)
+    if queryset is None:
+        queryset = Book.objects.all()
+    books = queryset.order_by('pk').values(
+        'id', 'isbn', 'title', 'subtitle', 'description', 'publication_date', 'edition',
+        'pages', 'language', 'cover_image_url', 'category_id', 'category__category_name',
+        'category__path', 'publisher__publisher_name', 'quantity', 'total_copies',
+    ).iterator(chunk_size=chunk_size)
+    # Names of the categories on the paths seen so far
+    category_names: Dict[int, str] = {}
+
+    while True:
+        chunk = list(islice(books, chunk_size))
+        if not chunk:
+            return
+
+        authors: Dict[int, List[tuple]] = defaultdict(list)
+        book_authors = BookAuthor.objects.filter(
+            book_id__in=[book['id'] for book in chunk]
+        ).order_by('book_id', 'id').values_list('book_id', 'author__name', 'author_role')
+        for book_id, name, role in book_authors:
+            authors[book_id].append((name, role))
+
+        ancestor_ids = {
+            int(node)
+            for book in chunk
+            for node in (book['category__path'] or '').split(PATH_SEPARATOR)
+            if node and int(node) not in category_names
+        }
+        if ancestor_ids:
+            category_names.update(
+                Category.objects.filter(pk__in=ancestor_ids).values_list('pk', 'category_name')
+            )
+
+        for book in chunk:
+            book_authors = authors.get(book['id'], [])
+            yield {
+                'id': book['id'],
+                'isbn': book['isbn'] or '',
+                'title': book['title'],
+                'subtitle': book['subtitle'] or '',
+                'description': book['description'] or '',
+                'publication_date': book['publication_date'].isoformat() if book['publication_date'] else '',
+                'edition': book['edition'] or '',
+                'pages': book['pages'],
+                'language': book['language'],
+                'cover_image_url': book['cover_image_url'] or '',
+                'category': _category_path(book, category_names),
+                'publisher': book['publisher__publisher_name'],
+                'authors': [name for name, _ in book_authors],
+                'author_roles': [role for _, role in book_authors],
+                'quantity': book['quantity'],
+                'total_copies': book['total_copies'],
+                'availability': 'available' if book['quantity'] > 0 else 'borrowed',
+            }
+
+
+def _category_path(book: Dict[str, Any], category_names: Dict[int, str]) -> str:
+    """The book's category with its ancestors, e.g. ``Fiction > Fantasy``."""
+    if book['category_id'] is None:
+        return ''
+    nodes = [int(node) for node in (book['category__path'] or '').split(PATH_SEPARATOR) if node]
+    if not nodes or nodes[-1] != book['category_id']:
+        # No path yet (e.g. just bulk-created): the category on its own
+        return book['category__category_name']
+    return ' > '.join(category_names.get(node, '') for node in nodes if node in category_names)
+
+
+def iter_csv(books: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for book in books:
+        book = dict(book)
+        for key in ('authors', 'author_roles'):
+            book[key] = f'{LIST_SEPARATOR} '.join(book[key])
+        if book['pages'] is None:
+            book['pages'] = ''
+        yield writer.writerow([book[column] for column in COLUMNS])
+
+
+def iter_jsonl(books: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for book in books:
+        yield json.dumps(book, ensure_ascii=False) + '\n'
+
+
+def export_books(fmt: str, queryset=None, chunk_size: Optional[int] = None) -> Iterator[str]:
+    """The catalog as a stream of CSV or JSON Lines text."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {', '.join(FORMATS)}")
+    books = iter_books(queryset, chunk_size)
+    return iter_csv(books) if fmt == 'csv' else iter_jsonl(books)
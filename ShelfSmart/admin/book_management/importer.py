@@ -0,0 +1,492 @@
+"""
+Bulk import of books from CSV or JSON Lines files.
+
+Each row describes one book. CSV files have a header row; JSON Lines files
+have one object per line with the same keys:
+
+    title, isbn, subtitle, description, publication_date, edition, pages,
+    language, cover_image_url, category, publisher, authors, author_roles,
+    quantity, total_copies
+
+``category`` may be a path such as ``Fiction > Fantasy``; ``authors`` and
+``author_roles`` are separated by ``;`` (or are lists in JSON Lines). Only
+``title``, ``category``, ``publisher`` and at least one author are required.
+
+Rows are read as a stream and written in batches: each batch resolves its
+category, publisher and author names in bulk (creating the missing ones),
+then inserts its books and their authors with ``bulk_create`` in one
+transaction. ``bulk_create`` skips model signals, so the importer does what
+the signals would: it adjusts the dashboard counters, re-indexes the new
+books for search and refreshes the name indexes.
+
+A row that cannot be imported is reported with its line number and does
+not stop the rest of the file.
+"""
+
+import csv
+import io
+import json
+import logging
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import DataError, IntegrityError, connection, transaction
+
+from admin.admin_dashboard.models import CirculationCounters
+from admin.common import category_tree, name_index
+from admin.common.models import Author, Book, BookAuthor, Category, Publisher
+from catalog_search.signals import schedule_reindex
+from isbn_validation.lookup import InvalidIsbn, normalize_isbn
+
+logger = logging.getLogger(__name__)
+
+# Rows written per transaction
+BATCH_SIZE = getattr(settings, 'BOOK_IMPORT_BATCH_SIZE', 1000)
+
+FORMATS = ('csv', 'jsonl')
+
+AUTHOR_ROLES = {choice for choice, _ in BookAuthor._meta.get_field('author_role').choices}
+
+REPORT_NAMES = {Category: 'categories', Publisher: 'publishers', Author: 'authors'}
+
+CATEGORY_SEPARATOR = '>'
+LIST_SEPARATOR = ';'
+
+
+class RowError(NamedTuple):
+    line: int
+    title: str
+    isbn: str
+    error: str
+
+
+class ImportReport:
+    """What an import did, with one ``RowError`` per row it skipped."""
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.created_names = {'categories': 0, 'publishers': 0, 'authors': 0}
+        self.errors: List[RowError] = []
+        self.elapsed = 0.0
+
+    @property
+    def skipped(self) -> int:
+        return len(self.errors)
+
+    def write_errors(self, stream) -> None:
+        """Write the skipped rows to ``stream`` as CSV."""
+        writer = csv.writer(stream)
+        writer.writerow(RowError._fields)
+        writer.writerows(self.errors)
+
+
+class ParsedRow(NamedTuple):
+    line: int
+    fields: Dict[str, Any]
+    category_path: Tuple[str, ...]
+    publisher: str
+    authors: List[Tuple[str, str]]
+
+
+class RowInvalid(ValueError):
+    """Raised for a row that cannot be imported."""
+
+
+def detect_format(filename: str) -> str:
+    """Guess the format of a file from its name: JSON Lines or CSV."""
+    if filename.lower().endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return 'csv'
+
+
+def iter_rows(stream, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield ``(line, row)`` for each row of a text stream, where ``row`` is a
+    dict, or a ``RowInvalid`` for a line that could not be parsed.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        if not reader.fieldnames:
+            return
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+        for row in reader:
+            # line_num is the last line of the row, which may span several
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, RowInvalid(f'Not valid JSON: {e.msg}')
+                continue
+            if not isinstance(row, dict):
+                yield line_number, RowInvalid('Each line must be a JSON object.')
+                continue
+            yield line_number, {str(key).strip().lower(): value for key, value in row.items()}
+    else:
+        raise ValueError(f"Unknown import format '{fmt}', expected one of {', '.join(FORMATS)}")
+
+
+def _text(row: Dict[str, Any], key: str, max_length: Optional[int] = None) -> str:
+    """A single-line text value of ``row``, empty if missing."""
+    value = row.get(key)
+    if value is None:
+        return ''
+    value = ' '.join(str(value).split())
+    if max_length is not None and len(value) > max_length:
+        raise RowInvalid(f'{key} is longer than {max_length} characters.')
+    return value
+
+
+def _list(row: Dict[str, Any], key: str) -> List[str]:
+    value = row.get(key)
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        value = str(value).split(LIST_SEPARATOR)
+    return [' '.join(str(item).split()) for item in value if str(item).strip()]
+
+
+def _integer(row: Dict[str, Any], key: str, default: Optional[int] = None,
+             minimum: Optional[int] = None) -> Optional[int]:
+    value = _text(row, key)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise RowInvalid(f"{key} must be a whole number, got '{value}'.")
+    if minimum is not None and number < minimum:
+        raise RowInvalid(f'{key} must be at least {minimum}.')
+    return number
+
+
+def _publication_date(row: Dict[str, Any]) -> Optional[date]:
+    """A YYYY-MM-DD, YYYY-MM or YYYY date; partial dates start on the first."""
+    value = _text(row, 'publication_date')
+    if not value:
+        return None
+    parts = value.split('-')
+    try:
+        if len(parts) > 3 or len(parts[0]) != 4:
+            raise ValueError
+        numbers = [int(part) for part in parts] + [1] * (3 - len(parts))
+        return date(*numbers)
+    except ValueError:
+        raise RowInvalid(f"publication_date must look like YYYY-MM-DD, got '{value}'.")
+
+
+def _check_names(key: str, names: Iterable[str]) -> None:
+    for name in names:
+        if len(name) > 100:
+            raise RowInvalid(f'{key} names must be at most 100 characters.')
+        if not name_index.normalize_name(name):
+            raise RowInvalid(f"{key} name '{name}' has no letters or digits.")
+
+
+_validate_url = URLValidator()
+
+
+def parse_row(line: int, row: Dict[str, Any]) -> ParsedRow:
+    """Validate one row and turn it into Book field values and names."""
+    title = _text(row, 'title', 255)
+    if not title:
+        raise RowInvalid('title is required.')
+
+    isbn = _text(row, 'isbn').replace('-', '').replace(' ', '')
+    if isbn:
+        try:
+            isbn = normalize_isbn(isbn)
+        except InvalidIsbn as e:
+            raise RowInvalid(str(e))
+
+    cover_image_url = _text(row, 'cover_image_url', 500)
+    if cover_image_url:
+        try:
+            _validate_url(cover_image_url)
+        except ValidationError:
+            raise RowInvalid('cover_image_url is not a valid URL.')
+
+    category = _text(row, 'category')
+    category_path = tuple(name.strip() for name in category.split(CATEGORY_SEPARATOR) if name.strip())
+    if not category_path:
+        raise RowInvalid('category is required.')
+    _check_names('category', category_path)
+
+    publisher = _text(row, 'publisher')
+    if not publisher:
+        raise RowInvalid('publisher is required.')
+    _check_names('publisher', [publisher])
+
+    author_names = _list(row, 'authors')
+    if not author_names:
+        raise RowInvalid('At least one author is required.')
+    _check_names('author', author_names)
+    roles = [role.lower() for role in _list(row, 'author_roles')]
+    for role in roles:
+        if role not in AUTHOR_ROLES:
+            raise RowInvalid(f"Unknown author role '{role}', expected one of {', '.join(sorted(AUTHOR_ROLES))}.")
+    # Without roles the first author is the primary one
+    authors = [
+        (name, roles[i] if i < len(roles) else ('primary' if i == 0 else 'co-author'))
+        for i, name in enumerate(author_names)
+    ]
+
+    quantity = _integer(row, 'quantity', default=1, minimum=0)
+    total_copies = _integer(row, 'total_copies', default=quantity, minimum=0)
+
+    fields = {
+        'title': title,
+        'isbn': isbn or None,
+        'subtitle': _text(row, 'subtitle', 255) or None,
+        'description': (str(row.get('description') or '').strip() or None),
+        'publication_date': _publication_date(row),
+        'edition': _text(row, 'edition', 50) or None,
+        'pages': _integer(row, 'pages', minimum=1),
+        'language': _text(row, 'language', 50) or 'English',
+        'cover_image_url': cover_image_url or None,
+        'quantity': quantity,
+        'total_copies': total_copies,
+        'availability': 'available' if quantity > 0 else 'borrowed',
+    }
+    return ParsedRow(line, fields, category_path, publisher, authors)
+
+
+class BookImporter:
+    """
+    Import rows into the catalog, ``batch_size`` rows per transaction.
+
+    With ``dry_run`` every row is validated and written as usual, but the
+    whole import is rolled back at the end.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, dry_run: bool = False):
+        self.batch_size = max(1, batch_size or BATCH_SIZE)
+        self.dry_run = dry_run
+        self.report = ImportReport(dry_run)
+        # Normalized name -> id of everything resolved so far
+        self._ids: Dict[type, Dict[str, int]] = {Category: {}, Publisher: {}, Author: {}}
+        self._seen_isbns = set()
+
+    def run(self, rows: Iterable[Tuple[int, Any]]) -> ImportReport:
+        started = time.monotonic()
+        if self.dry_run:
+            with transaction.atomic():
+                self._import(rows)
+                transaction.set_rollback(True)
+        else:
+            self._import(rows)
+        # Duplicates are found a batch later than format errors
+        self.report.errors.sort()
+        self.report.elapsed = time.monotonic() - started
+        return self.report
+
+    def _import(self, rows: Iterable[Tuple[int, Any]]) -> None:
+        batch: List[ParsedRow] = []
+        for line, row in rows:
+            self.report.rows += 1
+            try:
+                if isinstance(row, RowInvalid):
+                    raise row
+                batch.append(parse_row(line, row))
+            except RowInvalid as e:
+                self._skip(line, row, str(e))
+                continue
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+
+    def _skip(self, line: int, row: Any, error: str) -> None:
+        if isinstance(row, ParsedRow):
+            title, isbn = row.fields['title'], row.fields['isbn'] or ''
+        elif isinstance(row, dict):
+            title, isbn = str(row.get('title') or ''), str(row.get('isbn') or '')
+        else:
+            title, isbn = '', ''
+        self.report.errors.append(RowError(line, title, isbn, error))
+
+    def _without_duplicates(self, batch: List[ParsedRow]) -> List[ParsedRow]:
+        """Drop rows whose ISBN is already in the catalog or earlier in the file."""
+        isbns = [row.fields['isbn'] for row in batch if row.fields['isbn']]
+        existing = set(Book.objects.filter(isbn__in=isbns).values_list('isbn', flat=True))
+
+        kept = []
+        for row in batch:
+            isbn = row.fields['isbn']
+            if isbn in existing:
+                self._skip(row.line, row, 'A book with this ISBN is already in the catalog.')
+            elif isbn in self._seen_isbns:
+                self._skip(row.line, row, 'Duplicate ISBN; an earlier row has the same ISBN.')
+            else:
+                if isbn:
+                    self._seen_isbns.add(isbn)
+                kept.append(row)
+        return kept
+
+    def _write_batch(self, batch: List[ParsedRow]) -> None:
+        batch = self._without_duplicates(batch)
+        if not batch:
+            return
+
+        with transaction.atomic():
+            # In file order, so a new name is created with its first spelling
+            category_ids = self._resolve_categories(dict.fromkeys(row.category_path for row in batch))
+            publisher_ids = self._resolve(Publisher, dict.fromkeys(row.publisher for row in batch))
+            author_ids = self._resolve(Author, dict.fromkeys(name for row in batch for name, _ in row.authors))
+
+            books = [
+                Book(
+                    category_id=category_ids[name_index.normalize_name(row.category_path[-1])],
+                    publisher_id=publisher_ids[name_index.normalize_name(row.publisher)],
+                    **row.fields
+                )
+                for row in batch
+            ]
+            book_authors = [self._book_authors(row, author_ids) for row in batch]
+
+            if connection.features.can_return_rows_from_bulk_insert:
+                try:
+                    with transaction.atomic():
+                        self._bulk_insert(books, book_authors)
+                    return
+                except (IntegrityError, DataError) as e:
+                    logger.warning(f'Bulk insert failed ({e}), inserting the batch row by row')
+            self._insert_one_by_one(batch, books, book_authors)
+
+    def _bulk_insert(self, books: List[Book], book_authors: List[List[BookAuthor]]) -> None:
+        Book.objects.bulk_create(books, batch_size=self.batch_size)
+        for book, authors in zip(books, book_authors):
+            for book_author in authors:
+                book_author.book_id = book.pk
+        BookAuthor.objects.bulk_create(
+            [book_author for authors in book_authors for book_author in authors],
+            batch_size=self.batch_size
+        )
+        # What the Book and BookAuthor signals would have done
+        CirculationCounters.adjust(total_books=len(books))
+        schedule_reindex(book.pk for book in books)
+        self.report.created += len(books)
+
+    def _insert_one_by_one(self, batch: List[ParsedRow], books: List[Book],
+                           book_authors: List[List[BookAuthor]]) -> None:
+        """Save each row on its own, so one bad row only skips itself."""
+        for row, book, authors in zip(batch, books, book_authors):
+            try:
+                with transaction.atomic():
+                    book.save()
+                    for book_author in authors:
+                        book_author.book = book
+                        book_author.save()
+            except (IntegrityError, DataError) as e:
+                book.pk = None
+                self._skip(row.line, row, f'Could not be saved: {e}')
+            else:
+                self.report.created += 1
+
+    def _book_authors(self, row: ParsedRow, author_ids: Dict[str, int]) -> List[BookAuthor]:
+        book_authors = {}
+        for name, role in row.authors:
+            author_id = author_ids[name_index.normalize_name(name)]
+            # A name listed twice keeps its first role
+            book_authors.setdefault(author_id, BookAuthor(author_id=author_id, author_role=role))
+        return list(book_authors.values())
+
+    def _lookup(self, model, names: Iterable[str]) -> None:
+        """
+        Find the catalog ids of the ``names`` not resolved yet, with one
+        query on the indexed ``name_key`` column. The database decides, so
+        names another process just added are found.
+        """
+        ids = self._ids[model]
+        wanted = {name_index.normalize_name(name) for name in names} - ids.keys()
+        if not wanted:
+            return
+        for pk, key in model.objects.filter(name_key__in=wanted).values_list('pk', 'name_key'):
+            ids[key] = min(pk, ids.get(key, pk))
+
+    def _resolve(self, model, names: Iterable[str], parents: Optional[Dict[str, Optional[int]]] = None) -> Dict[str, int]:
+        """
+        Map the normalized form of each of ``names`` to an id, creating the
+        names that are not in the catalog yet (with ``parents[name]`` as
+        parent category for categories).
+        """
+        names = list(names)
+        field = name_index.NAME_FIELDS[model]
+        self._lookup(model, names)
+        missing = {}
+        for name in names:
+            key = name_index.normalize_name(name)
+            if key not in self._ids[model]:
+                missing.setdefault(key, name)
+
+        if missing:
+            new = []
+            for name in missing.values():
+                # bulk_create skips save(), which sets name_key
+                instance = model(**{field: name, 'name_key': name_index.normalize_name(name)})
+                if parents is not None:
+                    instance.parent_category_id = parents.get(name)
+                new.append(instance)
+            # Conflicts are names another import or admin just added
+            model.objects.bulk_create(new, batch_size=self.batch_size, ignore_conflicts=True)
+            created = model.objects.filter(name_key__in=missing.keys()).values_list('pk', 'name_key')
+            ids = self._ids[model]
+            for pk, key in created:
+                ids[key] = min(pk, ids.get(key, pk))
+            self.report.created_names[REPORT_NAMES[model]] += len(new)
+            # Dropped if the batch is rolled back, e.g. in a dry run
+            transaction.on_commit(lambda: name_index.invalidate(model))
+
+        ids = self._ids[model]
+        return {name_index.normalize_name(name): ids[name_index.normalize_name(name)] for name in names}
+
+    def _resolve_categories(self, paths: Iterable[Tuple[str, ...]]) -> Dict[str, int]:
+        """
+        Resolve the last category of each path. Category names are unique,
+        so a category that exists is used wherever it sits in the tree; a
+        missing one is created under the category before it in its path.
+        """
+        paths = list(paths)
+        created = self.report.created_names['categories']
+        resolved: Dict[str, int] = {}
+        for depth in range(max(len(path) for path in paths)):
+            names = {}
+            parents = {}
+            for path in paths:
+                if depth < len(path):
+                    name = path[depth]
+                    names.setdefault(name_index.normalize_name(name), name)
+                    if depth:
+                        parents.setdefault(name, resolved[name_index.normalize_name(path[depth - 1])])
+            resolved.update(self._resolve(Category, names.values(), parents))
+        if created < self.report.created_names['categories']:
+            # bulk_create skipped Category.save(), which sets the paths
+            category_tree.rebuild_paths()
+        return resolved
+
+
+def import_books(stream, fmt: str, batch_size: Optional[int] = None, dry_run: bool = False) -> ImportReport:
+    """Import the books in a text stream of the given format ('csv' or 'jsonl')."""
+    return BookImporter(batch_size, dry_run).run(iter_rows(stream, fmt))
+
+
+def import_uploaded_file(upload, fmt: Optional[str] = None, batch_size: Optional[int] = None,
+                         dry_run: bool = False) -> ImportReport:
+    """Import an uploaded file without reading it into memory first."""
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    try:
+        return import_books(stream, fmt or detect_format(upload.name), batch_size, dry_run)
+    finally:
+        # Leave the upload open for Django to clean up
+        stream.detach()
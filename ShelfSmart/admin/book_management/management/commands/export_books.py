@@ -0,0 +1,51 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin.book_management.exporter import CHUNK_SIZE, export_books
+from admin.book_management.importer import FORMATS, detect_format
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the catalog with authors, category path, publisher and "
+        "inventory as CSV or JSON Lines, in a form import_books can read."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help="File to write (default: standard output)."
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help="File format (default: from the file extension, CSV unless .jsonl)."
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f"Books read from the database at a time (default: {CHUNK_SIZE})."
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        lines = export_books(fmt, chunk_size=max(1, options['chunk_size']))
+
+        count = -1 if fmt == 'csv' else 0  # the CSV header is not a book
+        try:
+            if path == '-':
+                for line in lines:
+                    sys.stdout.write(line)
+                    count += 1
+            else:
+                with open(path, 'w', encoding='utf-8', newline='') as export_file:
+                    for line in lines:
+                        export_file.write(line)
+                        count += 1
+        except OSError as e:
+            raise CommandError(f"Cannot write {path}: {e}")
+
+        self.stderr.write(f"Exported {max(count, 0)} book(s).")
@@ -0,0 +1,70 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin.book_management.importer import BATCH_SIZE, FORMATS, detect_format, import_books
+
+
+class Command(BaseCommand):
+    help = (
+        "Import books from a CSV or JSON Lines file, creating missing "
+        "categories, publishers and authors. Rows that cannot be imported "
+        "are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import ('-' for standard input).")
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help="File format (default: from the file extension, CSV unless .jsonl)."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f"Rows written per transaction (default: {BATCH_SIZE})."
+        )
+        parser.add_argument(
+            '--errors',
+            help="Write the skipped rows and their errors to this CSV file."
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Validate and import everything, then roll it all back."
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        batch_size = max(1, options['batch_size'])
+
+        try:
+            if path == '-':
+                report = import_books(sys.stdin, fmt, batch_size, options['dry_run'])
+            else:
+                with open(path, encoding='utf-8-sig', newline='') as import_file:
+                    report = import_books(import_file, fmt, batch_size, options['dry_run'])
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        for error in report.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"Line {error.line}: {error.error}"))
+        if report.skipped > 20:
+            self.stdout.write(self.style.WARNING(f"... and {report.skipped - 20} more"))
+
+        if options['errors']:
+            try:
+                with open(options['errors'], 'w', encoding='utf-8', newline='') as errors_file:
+                    report.write_errors(errors_file)
+            except OSError as e:
+                raise CommandError(f"Cannot write {options['errors']}: {e}")
+
+        names = report.created_names
+        summary = (
+            f"{'Would import' if report.dry_run else 'Imported'} {report.created} of {report.rows} row(s) "
+            f"in {report.elapsed:.1f}s, skipped {report.skipped}; new categories: {names['categories']}, "
+            f"publishers: {names['publishers']}, authors: {names['authors']}."
+        )
+        self.stdout.write(self.style.SUCCESS(summary) if not report.skipped else summary)
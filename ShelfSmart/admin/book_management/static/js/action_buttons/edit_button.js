@@ -47,15 +47,18 @@ async function editBook(bookId) {
         document.getElementById('update-total-copies').value = book.total_copies || '';
         document.getElementById('update-quantity').value = book.quantity || '';
         
-        // Set category dropdown by ID
+        // Set category dropdown by ID (the pickers only hold the options
+        // searched for, see option_picker.js)
         const categorySelect = document.getElementById('update-category');
         if (book.category_id) {
+            ensureOption(categorySelect, book.category_id, book.category_name);
             categorySelect.value = book.category_id;
         }
         
         // Set publisher dropdown by ID
         const publisherSelect = document.getElementById('update-publisher');
         if (book.publisher_id) {
+            ensureOption(publisherSelect, book.publisher_id, book.publisher_name);
             publisherSelect.value = book.publisher_id;
         }
         
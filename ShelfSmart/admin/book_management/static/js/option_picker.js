@@ -0,0 +1,105 @@
+// Category, Publisher and Author pickers
+// The add/edit forms do not render every option: each picker select gets a
+// search box and loads the matching options from the lookup API as you type.
+
+const OPTION_PICKER_LIMIT = 50;
+const OPTION_PICKER_DELAY = 150; // ms to wait after the last keystroke
+
+// Picker options - fetched from the lookup API instead of re-rendering the books page
+async function fetchOptions(kind, params) {
+  const response = await fetch(`/admin-panel/books/api/options/${kind}/?${new URLSearchParams(params)}`);
+  if (!response.ok) {
+    throw new Error(`Failed to load ${kind}`);
+  }
+  const data = await response.json();
+  return data.success ? data.options : [];
+}
+
+// Find the option named exactly `name` (ignoring case)
+async function findOption(kind, name) {
+  const options = await fetchOptions(kind, { q: name, limit: 20 });
+  const wanted = name.trim().toLowerCase();
+  return options.find(option => option.name.trim().toLowerCase() === wanted);
+}
+
+// Add an option to a select unless it is already there
+function ensureOption(select, id, label) {
+  if (!select) return null;
+  let option = Array.from(select.options).find(opt => opt.value === String(id));
+  if (!option) {
+    option = new Option(label, id);
+    select.add(option);
+  }
+  return option;
+}
+
+// Select entry `id`, loading its name first when it is not one of the options yet
+async function selectOption(select, kind, id, label) {
+  if (!select || !id) return;
+  const loaded = Array.from(select.options).some(opt => opt.value === String(id));
+  if (!loaded && !label) {
+    const [option] = await fetchOptions(kind, { ids: id });
+    label = option ? (option.path || option.name) : String(id);
+  }
+  ensureOption(select, id, label);
+  select.value = id;
+}
+
+// Replace the options of a picker with those matching `query`, keeping the selected one
+async function loadOptions(select, kind, query) {
+  const request = (select.pickerRequest || 0) + 1;
+  select.pickerRequest = request;
+  const options = await fetchOptions(kind, { q: query, limit: OPTION_PICKER_LIMIT });
+  if (select.pickerRequest !== request) return; // A newer search has been sent
+
+  const selected = select.value;
+  Array.from(select.options).forEach(opt => {
+    if (opt.value !== '' && opt.value !== selected) opt.remove();
+  });
+  options.forEach(option => ensureOption(select, option.id, option.path || option.name));
+  select.value = selected;
+  select.dataset.loaded = 'true';
+}
+
+// Add a search box above a select with data-options="categories|publishers|authors"
+function attachPicker(select) {
+  const kind = select.dataset.options;
+  if (!kind || select.dataset.pickerAttached) return;
+  select.dataset.pickerAttached = 'true';
+
+  const search = document.createElement('input');
+  search.type = 'search';
+  search.className = 'option-picker-search';
+  search.placeholder = `Search ${kind}...`;
+  search.autocomplete = 'off';
+  select.parentNode.insertBefore(search, select);
+
+  const load = (query) => loadOptions(select, kind, query).catch(error => {
+    console.error(`Error loading ${kind}:`, error);
+  });
+
+  let timer = null;
+  search.addEventListener('input', () => {
+    clearTimeout(timer);
+    timer = setTimeout(() => load(search.value.trim()), OPTION_PICKER_DELAY);
+  });
+
+  // The first options are loaded when the picker is first used
+  const loadFirst = () => {
+    if (!select.dataset.loaded) load(search.value.trim());
+  };
+  search.addEventListener('focus', loadFirst);
+  select.addEventListener('focus', loadFirst);
+  select.addEventListener('mousedown', loadFirst);
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+  document.querySelectorAll('select[data-options]').forEach(attachPicker);
+});
+
+// Make functions globally available
+window.fetchOptions = fetchOptions;
+window.findOption = findOption;
+window.ensureOption = ensureOption;
+window.selectOption = selectOption;
+window.attachPicker = attachPicker;
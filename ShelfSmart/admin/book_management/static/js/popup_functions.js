@@ -19,7 +19,8 @@ function updateDateTime() {
     setInterval(updateDateTime, 60000)
   })
   
-  // Search functionality
+  // Search functionality - narrows the current page while typing; Enter
+  // submits the search form to search every book
   document.addEventListener("DOMContentLoaded", () => {
     const searchInput = document.getElementById("searchInput")
     if (searchInput) {
@@ -66,20 +67,12 @@ function updateDateTime() {
     authorEntry.className = "author-entry"
     authorEntry.setAttribute("data-author-index", authorFieldIndex)
   
-    // Get the author select options from the first author field
-    const firstSelect = document.querySelector(".author-select")
-    let authorOptions = '<option value="">Select Author</option>'
-    if (firstSelect) {
-      Array.from(firstSelect.options).slice(1).forEach(option => {
-        authorOptions += `<option value="${option.value}">${option.textContent}</option>`
-      })
-    }
-  
+    // Authors are loaded by the picker as you search (see option_picker.js)
     authorEntry.innerHTML = `
       <div class="form-group">
         <label for="author-${authorFieldIndex}">Author Name</label>
-        <select id="author-${authorFieldIndex}" name="authors[]" class="author-select" required>
-          ${authorOptions}
+        <select id="author-${authorFieldIndex}" name="authors[]" class="author-select" data-options="authors" required>
+          <option value="">Select Author</option>
         </select>
       </div>
       <div class="form-group">
@@ -97,6 +90,7 @@ function updateDateTime() {
     `
   
     authorsContainer.appendChild(authorEntry)
+    attachPicker(authorEntry.querySelector(".author-select"))
     authorFieldIndex++
   }
 
@@ -288,39 +282,28 @@ function updateDateTime() {
         // Auto-select matched category from database
         if (data.matched_category_id) {
           const categorySelect = document.getElementById('add-category')
-          categorySelect.value = data.matched_category_id
+          selectOption(categorySelect, 'categories', data.matched_category_id).catch(console.error)
           console.log('Auto-selected category ID:', data.matched_category_id)
         }
         
         // Auto-select matched publisher from database
         if (data.matched_publisher_id) {
           const publisherSelect = document.getElementById('add-publisher')
-          publisherSelect.value = data.matched_publisher_id
+          selectOption(publisherSelect, 'publishers', data.matched_publisher_id).catch(console.error)
           console.log('Auto-selected publisher ID:', data.matched_publisher_id)
         }
         
         // Auto-select matched authors from database
         if (data.matched_author_ids && data.matched_author_ids.length > 0) {
-          // Get the first author field
-          const firstAuthorSelect = document.getElementById('author-0')
-          if (firstAuthorSelect && data.matched_author_ids[0]) {
-            firstAuthorSelect.value = data.matched_author_ids[0].id
-            console.log('Auto-selected author ID:', data.matched_author_ids[0].id)
-          }
-          
-          // If there are more authors, add additional author fields
-          for (let i = 1; i < data.matched_author_ids.length; i++) {
-            // Add a new author field if we have more matched authors
+          // Add author fields until there is one per matched author
+          while (document.querySelectorAll('#authorsContainer .author-select').length < data.matched_author_ids.length) {
             addAuthorField()
-            // Wait a bit for the DOM to update, then set the value
-            setTimeout(() => {
-              const authorSelect = document.getElementById(`author-${i}`)
-              if (authorSelect && data.matched_author_ids[i]) {
-                authorSelect.value = data.matched_author_ids[i].id
-                console.log(`Auto-selected author ${i} ID:`, data.matched_author_ids[i].id)
-              }
-            }, 100 * i)
           }
+          const authorSelects = document.querySelectorAll('#authorsContainer .author-select')
+          data.matched_author_ids.forEach((author, i) => {
+            selectOption(authorSelects[i], 'authors', author.id, author.name)
+            console.log(`Auto-selected author ${i} ID:`, author.id)
+          })
         }
         
         // Show additional info with match status and Add buttons
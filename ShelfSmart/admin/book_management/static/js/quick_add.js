@@ -221,29 +221,16 @@ async function quickAddAuthor(authorName) {
   }
 }
 
-// Dropdown refresh functions - Fetch fresh data and rebuild dropdowns
+// Dropdown refresh functions - Add the new entry to the dropdowns and select it
 async function refreshCategoryDropdown(newCategoryName) {
   try {
-    // Fetch fresh page content
-    const response = await fetch('/admin-panel/books/');
-    if (response.ok) {
-      const html = await response.text();
-      
-      // Extract category options using regex
-      const categoryMatch = html.match(/<select[^>]*id="add-category"[^>]*>([\s\S]*?)<\/select>/);
-      if (categoryMatch) {
-        const currentSelect = document.getElementById('add-category');
-        currentSelect.innerHTML = categoryMatch[1];
-        
-        // Auto-select the newly added category
-        const newOption = Array.from(currentSelect.options).find(option => 
-          option.text.trim().toLowerCase() === newCategoryName.toLowerCase()
-        );
-        if (newOption) {
-          currentSelect.value = newOption.value;
-          return true;
-        }
-      }
+    const category = await findOption('categories', newCategoryName);
+    if (category) {
+      ensureOption(document.getElementById('update-category'), category.id, category.path || category.name);
+      const currentSelect = document.getElementById('add-category');
+      ensureOption(currentSelect, category.id, category.path || category.name);
+      currentSelect.value = category.id;
+      return true;
     }
   } catch (error) {
     console.error('Error refreshing category dropdown:', error);
@@ -253,26 +240,13 @@ async function refreshCategoryDropdown(newCategoryName) {
 
 async function refreshPublisherDropdown(newPublisherName) {
   try {
-    // Fetch fresh page content
-    const response = await fetch('/admin-panel/books/');
-    if (response.ok) {
-      const html = await response.text();
-      
-      // Extract publisher options using regex
-      const publisherMatch = html.match(/<select[^>]*id="add-publisher"[^>]*>([\s\S]*?)<\/select>/);
-      if (publisherMatch) {
-        const currentSelect = document.getElementById('add-publisher');
-        currentSelect.innerHTML = publisherMatch[1];
-        
-        // Auto-select the newly added publisher
-        const newOption = Array.from(currentSelect.options).find(option => 
-          option.text.trim().toLowerCase() === newPublisherName.toLowerCase()
-        );
-        if (newOption) {
-          currentSelect.value = newOption.value;
-          return true;
-        }
-      }
+    const publisher = await findOption('publishers', newPublisherName);
+    if (publisher) {
+      ensureOption(document.getElementById('update-publisher'), publisher.id, publisher.name);
+      const currentSelect = document.getElementById('add-publisher');
+      ensureOption(currentSelect, publisher.id, publisher.name);
+      currentSelect.value = publisher.id;
+      return true;
     }
   } catch (error) {
     console.error('Error refreshing publisher dropdown:', error);
@@ -282,37 +256,18 @@ async function refreshPublisherDropdown(newPublisherName) {
 
 async function refreshAuthorDropdown(newAuthorName) {
   try {
-    // Fetch fresh page content
-    const response = await fetch('/admin-panel/books/');
-    if (response.ok) {
-      const html = await response.text();
-      
-      // Extract author options using regex
-      const authorMatch = html.match(/<select[^>]*id="author-0"[^>]*>([\s\S]*?)<\/select>/);
-      if (authorMatch) {
-        const newOptionsHTML = authorMatch[1];
-        
-        // Update all author dropdowns
-        const allAuthorSelects = document.querySelectorAll('.author-select');
-        allAuthorSelects.forEach(select => {
-          const currentValue = select.value;
-          select.innerHTML = newOptionsHTML;
-          
-          // Restore previous selection if it still exists
-          if (currentValue && Array.from(select.options).some(opt => opt.value === currentValue)) {
-            select.value = currentValue;
-          }
-        });
-        
-        // Auto-select the newly added author in the first dropdown
-        const firstAuthorSelect = document.getElementById('author-0');
-        const newOption = Array.from(firstAuthorSelect.options).find(option => 
-          option.text.trim().toLowerCase() === newAuthorName.toLowerCase()
-        );
-        if (newOption) {
-          firstAuthorSelect.value = newOption.value;
-          return true;
-        }
+    const author = await findOption('authors', newAuthorName);
+    if (author) {
+      // Update all author dropdowns
+      document.querySelectorAll('.author-select').forEach(select => {
+        ensureOption(select, author.id, author.name);
+      });
+
+      // Auto-select the newly added author in the first dropdown
+      const firstAuthorSelect = document.getElementById('author-0');
+      if (firstAuthorSelect) {
+        firstAuthorSelect.value = author.id;
+        return true;
       }
     }
   } catch (error) {
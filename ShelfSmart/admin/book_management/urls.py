@@ -5,5 +5,8 @@ app_name = 'book_management'
 
 urlpatterns = [
     path('', views.book_management, name='management'),
+    path('import/', views.import_books, name='import_books'),
+    path('export/', views.export_books, name='export_books'),
     path('api/book/<int:book_id>/', views.get_book_details, name='get_book_details'),
+    path('api/options/<str:kind>/', views.lookup_options, name='lookup_options'),
 ]
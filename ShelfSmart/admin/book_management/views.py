@@ -1,16 +1,35 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
 from user_auth.decorators import admin_required
 import logging
 
 from datetime import datetime, date
+import csv
+import hashlib
 import json
+from admin.common import name_index
+from admin.common.category_tree import get_tree
 from admin.common.models import Book, Category, Publisher, Author, BookAuthor
+from catalog_search.backends import search_filter
+from . import exporter, importer
 
 logger = logging.getLogger(__name__)
 
+# Rows per page of the management table
+PAGE_SIZE = 50
+
+# Columns loaded for the book list (details come from get_book_details)
+BOOK_LIST_FIELDS = (
+    'id', 'isbn', 'title', 'language', 'quantity', 'total_copies', 'created_at',
+    'category__category_name', 'publisher__publisher_name',
+)
+
 def _single_line(value: str) -> str:
     """Normalize input to a single line: remove CR/LF, collapse internal whitespace, and strip."""
     if value is None:
@@ -216,11 +235,14 @@ def book_management(request):
 
         return redirect("/admin-panel/books/")
     
-    # GET request - fetch all books, categories, publishers, and authors
+    # GET request - one page of books and the categories for the filter. The
+    # add/edit pickers load their options from lookup_options as you type
+    # and the view popup loads the details from get_book_details.
     try:
         # Read filters from query params
         category_id = request.GET.get('category')
         sort_by = request.GET.get('sort', '-created_at')
+        search_query = _single_line(request.GET.get('q', ''))
 
         # Validate sort parameter to prevent injection attacks
         allowed_sort_fields = [
@@ -232,33 +254,41 @@ def book_management(request):
         if sort_by not in allowed_sort_fields:
             sort_by = '-created_at'
 
-        # Base queryset with related data
-        books_query = Book.objects.select_related('category', 'publisher').prefetch_related(
-            'book_authors__author'
-        ).all()
+        # Base queryset with only the columns the table shows; description
+        # and the other detail fields stay in the database
+        books_query = Book.objects.select_related('category', 'publisher').only(*BOOK_LIST_FIELDS)
 
         # Apply category filter if provided
         if category_id:
             try:
-                books_query = books_query.filter(category_id=category_id)
+                books_query = books_query.filter(category_id=int(category_id))
             except ValueError:
-                pass
+                category_id = None
 
-        # Apply sorting
-        books_qs = books_query.order_by(sort_by)
+        # Full-text matches (title, authors, category, publisher...) or an ISBN prefix
+        if search_query:
+            isbn = search_query.replace('-', '').replace(' ', '')
+            matches = search_filter(search_query)
+            if isbn.rstrip('xX').isdigit():
+                matches |= Q(isbn__startswith=isbn)
+            books_query = books_query.filter(matches)
+
+        # Apply sorting, by id within equal values so pages do not overlap
+        books_qs = books_query.order_by(sort_by, '-pk' if sort_by.startswith('-') else 'pk')
+        page_obj = Paginator(books_qs, PAGE_SIZE).get_page(request.GET.get('page'))
+
+        # Authors of the whole page in one query
+        page_authors = {}
+        book_authors = BookAuthor.objects.filter(
+            book_id__in=[b.id for b in page_obj]
+        ).order_by('book_id', 'author__name').values_list('book_id', 'author__name')
+        for book_id, name in book_authors:
+            page_authors.setdefault(book_id, []).append(name)
 
-        # Fetch all categories for dropdown
-        categories = Category.objects.all().order_by('category_name')
-        # Fetch all publishers for dropdown
-        publishers = Publisher.objects.all().order_by('publisher_name')
-        # Fetch all authors for dropdown
-        authors = Author.objects.all().order_by('name')
-        
         # Format books data with new schema
         books = []
-        for b in books_qs:
-            # Get authors for this book
-            authors_list = [ba.author.name for ba in b.book_authors.all()]
+        for b in page_obj:
+            authors_list = page_authors.get(b.id)
             authors_str = ", ".join(authors_list) if authors_list else "No authors"
             
             books.append({
@@ -266,8 +296,6 @@ def book_management(request):
                 "book_id": b.book_id,  # Alias property
                 "title": b.title,
                 "isbn": b.isbn or "",
-                "subtitle": b.subtitle or "",
-                "description": b.description or "",
                 "category_id": b.category.id if b.category else None,
                 "category_name": b.category.category_name if b.category else "N/A",
                 "publisher_id": b.publisher.id if b.publisher else None,
@@ -278,15 +306,27 @@ def book_management(request):
                 "total_copies": b.total_copies,
                 "availability": b.computed_availability,
                 "created_at": b.created_at,
-                "updated_at": b.updated_at,
             })
 
+        # Categories for the filter dropdown, from the cached tree
+        tree = get_tree()
+        categories = sorted(
+            ({"id": pk, "category_name": tree.name(pk)} for pk, _ in tree.ordered()),
+            key=lambda category: category["category_name"].casefold()
+        )
+
+        # Keep the filters on the pagination links
+        query = request.GET.copy()
+        query.pop("page", None)
+        filter_query = query.urlencode()
+
         context = {
             "user_info": get_current_user_info(request),
             "books": books,
             "categories": categories,
-            "publishers": publishers,
-            "authors": authors,
+            "page_obj": page_obj,
+            "filter_query": filter_query,
+            "search_query": search_query,
             "selected_category": category_id,
             "selected_sort": sort_by,
         }
@@ -349,3 +389,153 @@ def get_book_details(request, book_id):
     except Exception as e:
         logger.exception("Error fetching book details: %s", e)
         return JsonResponse({"success": False, "error": str(e)}, status=500)
+
+# Skipped rows listed on the import page; the import_books command can
+# write the full list to a file
+IMPORT_ERRORS_SHOWN = 100
+
+@admin_required
+def import_books(request):
+    """Upload a CSV or JSON Lines file of books (see importer.py for the columns)."""
+    report = None
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        fmt = request.POST.get("format") or None
+        if not upload:
+            messages.error(request, "Choose a CSV or JSON Lines file to import.")
+        elif fmt and fmt not in importer.FORMATS:
+            messages.error(request, "Unknown file format.")
+        else:
+            try:
+                report = importer.import_uploaded_file(
+                    upload, fmt, dry_run=request.POST.get("dry_run") == "on"
+                )
+                logger.info(
+                    "[dashboard] import %s by user=%s: %s created, %s skipped",
+                    upload.name, request.user, report.created, report.skipped
+                )
+            except UnicodeDecodeError:
+                messages.error(request, "The file is not UTF-8 text.")
+            except csv.Error as e:
+                messages.error(request, f"The file is not valid CSV: {e}")
+
+    return render(request, "book_management/import_books.html", {
+        "user_info": get_current_user_info(request),
+        "report": report,
+        "errors": report.errors[:IMPORT_ERRORS_SHOWN] if report else [],
+        "formats": importer.FORMATS,
+    })
+
+@admin_required
+def export_books(request):
+    """Download the catalog (or one category of it) as CSV or JSON Lines."""
+    fmt = request.GET.get("format", "csv")
+    if fmt not in exporter.FORMATS:
+        return JsonResponse({"success": False, "error": "Unknown export format"}, status=400)
+
+    books = Book.objects.all()
+    category_id = request.GET.get("category")
+    if category_id:
+        if not category_id.isdigit():
+            return JsonResponse({"success": False, "error": "Invalid category"}, status=400)
+        books = books.filter(category_id=category_id)
+
+    response = StreamingHttpResponse(
+        exporter.export_books(fmt, books), content_type=exporter.CONTENT_TYPES[fmt]
+    )
+    filename = f"shelfsmart-books-{date.today():%Y%m%d}.{fmt}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+# Models behind the category, publisher and author pickers
+OPTION_MODELS = {
+    "categories": Category,
+    "publishers": Publisher,
+    "authors": Author,
+}
+OPTIONS_DEFAULT_LIMIT = 50
+OPTIONS_MAX_LIMIT = 200
+
+
+def _options_etag(request, kind):
+    model = OPTION_MODELS.get(kind)
+    if model is None:
+        return None
+    # The answer only changes when the names do. Their version is one
+    # primary key lookup in the database, so every worker agrees on it and
+    # an entry another process just added changes it.
+    key = f"{name_index.current_stamp(model)}:{request.GET.urlencode()}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def _later_word_matches(model, key, count, found):
+    """
+    Up to ``count`` entries not in ``found`` with a later word starting with
+    ``key`` (e.g. "tolk" for "J. R. R. Tolkien"), which the prefix index
+    cannot answer. The name index suggests them and one primary key query
+    confirms them, so an entry that is gone or was renamed is left out.
+    """
+    suggested = [
+        match.id
+        for match in name_index.get_index(model).autocomplete(key, count + len(found), first_word=False)
+        if match.id not in found
+    ][:count]
+    if not suggested:
+        return []
+    field = name_index.NAME_FIELDS[model]
+    confirmed = dict(
+        model.objects.filter(pk__in=suggested, name_key__contains=f" {key}").values_list("pk", field)
+    )
+    return [(pk, confirmed[pk]) for pk in suggested if pk in confirmed]
+
+
+@admin_required
+@require_GET
+@condition(etag_func=_options_etag)
+def lookup_options(request, kind):
+    """
+    Options for a category, publisher or author picker as JSON.
+
+    GET ``q`` keeps the names starting with it, then those with a later
+    word starting with it (ignoring case, accents and punctuation),
+    ``limit`` caps the answer (default 50, at most 200) and ``ids`` (comma
+    separated) asks for specific entries instead, e.g. those of a book
+    being edited. Names starting with ``q`` are a prefix scan of the
+    indexed ``name_key`` column, so a name just added by any process is
+    found. Answers carry an ETag that changes with the names, so browsers
+    can revalidate instead of downloading them again.
+    """
+    model = OPTION_MODELS.get(kind)
+    if model is None:
+        return JsonResponse({"success": False, "error": "Unknown option list"}, status=404)
+
+    try:
+        limit = int(request.GET.get("limit") or OPTIONS_DEFAULT_LIMIT)
+        ids = [int(pk) for pk in request.GET.get("ids", "").split(",") if pk.strip()]
+    except ValueError:
+        return JsonResponse({"success": False, "error": "limit and ids must be numbers"}, status=400)
+    limit = max(1, min(limit, OPTIONS_MAX_LIMIT))
+
+    field = name_index.NAME_FIELDS[model]
+    if ids:
+        entries = model.objects.filter(pk__in=ids).order_by(field, "pk")
+        rows = list(entries.values_list("pk", field)[:limit + 1])
+    else:
+        key = name_index.normalize_name(_single_line(request.GET.get("q", "")))
+        # A prefix scan of the name_key index
+        entries = model.objects.filter(name_key__startswith=key).order_by("name_key", "pk")
+        rows = list(entries.values_list("pk", field)[:limit + 1])
+        if key and len(rows) <= limit:
+            rows += _later_word_matches(model, key, limit + 1 - len(rows), {pk for pk, _ in rows})
+
+    tree = get_tree() if model is Category else None
+    options = []
+    for pk, name in rows[:limit]:
+        option = {"id": pk, "name": name}
+        if tree is not None and pk in tree:
+            option["path"] = tree.full_path(pk)
+        options.append(option)
+
+    response = JsonResponse({"success": True, "options": options, "has_more": len(rows) > limit})
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
@@ -56,26 +57,17 @@ def catalog_admin(request):
                 # Mark book as returned
                 borrow_id = request.POST.get("borrow_id")
                 
-                # Get the borrow record
-                borrow_record = BorrowRecord.objects.select_related('book').get(id=borrow_id)
-                
-                # Mark as returned
-                borrow_record.is_returned = True
-                borrow_record.return_date = date.today()
-                borrow_record.save()
-                
-                # Update book quantity and availability
+                # Close the loan and restock the copy in one transaction
+                borrow_record = BorrowRecord.objects.mark_returned(borrow_id, return_date=date.today())
                 book = borrow_record.book
-                book.quantity += 1
-                if book.quantity > 0:
-                    book.availability = "Available"
-                book.save()
                 
                 messages.success(request, "Book marked as returned successfully!")
                 logger.info(f"Admin returned book {book.title} for user {borrow_record.user_id}")
                 
         except BorrowRecord.DoesNotExist:
             messages.error(request, "Borrow record not found.")
+        except BorrowRecord.AlreadyReturned:
+            messages.info(request, "This book has already been returned.")
         except Exception as e:
             logger.error(f"Error returning book: {str(e)}")
             messages.error(request, f"Error: {str(e)}")
@@ -84,45 +76,28 @@ def catalog_admin(request):
     
     try:
         # Fetch all borrowed books (not returned) with user information
-        borrowed_books = BorrowRecord.objects.filter(
+        borrowed_books = list(BorrowRecord.objects.filter(
             is_returned=False
-        ).select_related('book').order_by('-borrowed_date')
-        
-        # Add user information to each record
-        borrowed_books_with_users = []
-        for record in borrowed_books:
-            try:
-                user = User.objects.get(id=record.user_id)
-                record.user = user  # Attach user object to the record
-                borrowed_books_with_users.append(record)
-            except User.DoesNotExist:
-                # Skip records where user no longer exists
-                continue
+        ).select_related('user', 'book').order_by('-borrowed_date'))
 
         # Fetch overdue books with days overdue calculation
         today = date.today()
-        overdue_books = BorrowRecord.objects.filter(
+        overdue_books = list(BorrowRecord.objects.filter(
             is_returned=False,
             due_date__lt=today
-        ).select_related('book').order_by('due_date')
-        
-        # Add user information and calculate days overdue
-        overdue_books_with_users = []
+        ).select_related('user', 'book').order_by('due_date'))
+
         for record in overdue_books:
-            try:
-                user = User.objects.get(id=record.user_id)
-                record.user = user  # Attach user object to the record
-                record.days_overdue = (today - record.due_date).days
-                overdue_books_with_users.append(record)
-            except User.DoesNotExist:
-                continue
+            record.days_overdue = (today - record.due_date).days
 
         context = {
             "user_info": get_current_user_info(request),
-            "borrowed_books": borrowed_books_with_users,
-            "overdue_books": overdue_books_with_users,
-            "borrowed_count": len(borrowed_books_with_users),
-            "overdue_count": len(overdue_books_with_users),
+            "borrowed_books": borrowed_books,
+            "overdue_books": overdue_books,
+            "borrowed_count": len(borrowed_books),
+            "overdue_count": len(overdue_books),
+            # Initial state of the "one email per borrower" checkbox
+            "digest_default": getattr(settings, "NOTIFICATION_DIGEST", False),
         }
 
         return render(request, "catalog_management/catalog_admin.html", context)
@@ -136,28 +111,19 @@ def catalog_admin(request):
             "overdue_books": [],
             "borrowed_count": 0,
             "overdue_count": 0,
+            "digest_default": getattr(settings, "NOTIFICATION_DIGEST", False),
         })
 
 @admin_required
 def student_catalog(request):
     """Student Catalog - View borrowed and returned books"""
     try:
-        # Get all borrow records for all users
-        all_records = BorrowRecord.objects.select_related('book').order_by('-borrowed_date')
-        
-        # Add user information to each record
-        records_with_users = []
-        for record in all_records:
-            try:
-                user = User.objects.get(id=record.user_id)
-                record.user = user  # Attach user object to the record
-                records_with_users.append(record)
-            except User.DoesNotExist:
-                continue
-        
+        # Get all borrow records for all users, with their user and book
+        all_records = BorrowRecord.objects.select_related('user', 'book').order_by('-borrowed_date')
+
         context = {
             "user_info": get_current_user_info(request),
-            "borrow_records": records_with_users,
+            "borrow_records": all_records,
         }
         
         return render(request, "catalog_management/catalog_student.html", context)
@@ -2,14 +2,20 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from user_auth.decorators import admin_required
+from django.core.paginator import Paginator
+from django.db.models import Count
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 import logging
 
 from admin.common.models import Category
+from admin.common.name_index import find_existing
 
 logger = logging.getLogger(__name__)
 
+# Rows per page of the management table
+PAGE_SIZE = 50
+
 
 def get_current_user_info(request):
     """Helper function to get current user's info from Django User object"""
@@ -68,8 +74,10 @@ def category_management(request):
                     return redirect("/admin-panel/categories/")
 
                 # Check if category name already exists
-                if Category.objects.filter(category_name=category_name).exists():
-                    messages.error(request, f"Category '{category_name}' already exists.")
+                # (ignoring case, accents and punctuation, e.g. from ISBN quick-add)
+                existing = find_existing(Category, category_name)
+                if existing:
+                    messages.error(request, f"Category '{category_name}' already exists as '{existing.name}'.")
                     return redirect("/admin-panel/categories/")
 
                 parent_category = None
@@ -103,9 +111,9 @@ def category_management(request):
                     return redirect("/admin-panel/categories/")
 
                 # Check if new name conflicts with another category
-                existing = Category.objects.filter(category_name=new_name).exclude(pk=category_id)
-                if existing.exists():
-                    messages.error(request, f"Category '{new_name}' already exists.")
+                existing = find_existing(Category, new_name, exclude_pk=category.pk)
+                if existing:
+                    messages.error(request, f"Category '{new_name}' already exists as '{existing.name}'.")
                     return redirect("/admin-panel/categories/")
 
                 category.category_name = new_name
@@ -124,7 +132,11 @@ def category_management(request):
                 else:
                     category.parent_category = None
 
-                category.save()
+                try:
+                    category.save()
+                except Category.InvalidParent as e:
+                    messages.error(request, str(e))
+                    return redirect("/admin-panel/categories/")
                 logger.info("[category_management] Updated category id=%s", category.id)
                 messages.success(request, "Category updated successfully!")
 
@@ -156,10 +168,18 @@ def category_management(request):
     
     # GET request - fetch all categories
     try:
-        categories_qs = Category.objects.select_related('parent_category').all().order_by('category_name')
+        search_query = request.GET.get("q", "").strip()
+        categories_qs = Category.objects.select_related('parent_category').annotate(
+            # distinct: both joins multiply the rows counted
+            book_count=Count('books', distinct=True),
+            subcategory_count=Count('subcategories', distinct=True),
+        ).order_by('category_name', 'pk')  # by id within equal names so pages do not overlap
+        if search_query:
+            categories_qs = categories_qs.filter(category_name__icontains=search_query)
+        page_obj = Paginator(categories_qs, PAGE_SIZE).get_page(request.GET.get("page"))
         categories = []
         
-        for c in categories_qs:
+        for c in page_obj:
             categories.append({
                 "id": c.id,
                 "category_id": c.category_id,
@@ -170,17 +190,25 @@ def category_management(request):
                 "full_path": c.get_full_path(),
                 "created_at": c.created_at,
                 "updated_at": c.updated_at,
-                "book_count": c.books.count(),
-                "subcategory_count": c.subcategories.count(),
+                "book_count": c.book_count,
+                "subcategory_count": c.subcategory_count,
             })
 
         # Get root categories for parent dropdown
         root_categories = Category.objects.filter(parent_category__isnull=True).order_by('category_name')
 
+        # Keep the search on the pagination links
+        query = request.GET.copy()
+        query.pop("page", None)
+        filter_query = query.urlencode()
+
         context = {
             "user_info": get_current_user_info(request),
             "categories": categories,
             "root_categories": root_categories,
+            "page_obj": page_obj,
+            "search_query": search_query,
+            "filter_query": filter_query,
             "active_page": "categories",
         }
         return render(request, "category_management/category_management.html", context)
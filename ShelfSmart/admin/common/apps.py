@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admin.common'
+
+    def ready(self):
+        # Connect the receivers that keep the name index and category tree fresh
+        from . import category_tree, name_index  # noqa: F401
@@ -0,0 +1,213 @@
+"""
+Cached category tree.
+
+Each ``Category`` stores its materialized ``path``: the ids from the root
+down to itself, e.g. ``"3/17/42/"`` (see ``Category.save``). A category and
+all of its subcategories are then one indexed prefix match::
+
+    path = Category.objects.filter(pk=category_id).values_list('path', flat=True).first()
+    Book.objects.filter(category__path__startswith=path)
+
+``CategoryTree`` holds every category in memory, so full paths, ancestors
+and descendants need no queries. It is meant for display: it can lag
+behind changes made by other processes (see below), so filters read the
+path from the database as above. Like the name indexes (see
+``name_index.py``) it is built on first use in each process and rebuilt
+when a change stamp in Django's cache moves on: saves and deletes bump the
+stamp once the transaction commits. Without a cache shared between
+processes, other processes notice within ``CATEGORY_TREE_MAX_AGE`` seconds.
+"""
+
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category
+
+PATH_SEPARATOR = '/'
+
+# Rebuild the tree at least this often, in case a change was made by
+# another process that does not share our cache
+MAX_AGE_SECONDS = getattr(settings, 'CATEGORY_TREE_MAX_AGE', 300)
+
+STAMP_KEY = 'category_tree:stamp'
+
+
+def build_paths(rows: Iterable[Tuple[int, Optional[int]]]) -> Dict[int, str]:
+    """
+    Materialized paths for ``(id, parent_id)`` rows. A parent loop (which
+    the admin forms do not allow) is cut where it repeats.
+    """
+    parents = dict(rows)
+    paths: Dict[int, str] = {}
+    for category_id in parents:
+        chain = []
+        current = category_id
+        while current is not None and current not in paths and current not in chain:
+            chain.append(current)
+            current = parents.get(current)
+        prefix = paths.get(current, '')
+        for node in reversed(chain):
+            prefix = f'{prefix}{node}{PATH_SEPARATOR}'
+            paths[node] = prefix
+    return paths
+
+
+def rebuild_paths() -> int:
+    """
+    Recompute every category's path from its parent, e.g. after categories
+    were created with ``bulk_create``. Returns the number of paths fixed.
+    """
+    rows = list(Category.objects.values_list('id', 'parent_category_id', 'path'))
+    paths = build_paths((category_id, parent_id) for category_id, parent_id, _ in rows)
+    stale = [
+        Category(id=category_id, path=paths[category_id])
+        for category_id, _, path in rows
+        if path != paths[category_id]
+    ]
+    Category.objects.bulk_update(stale, ['path'], batch_size=500)
+    if stale:
+        transaction.on_commit(invalidate)
+    return len(stale)
+
+
+class CategoryTree:
+    """Every category's name, parent, children and path, in memory."""
+
+    def __init__(self, rows: Iterable[Tuple[int, str, Optional[int], str]], stamp: Optional[str] = None):
+        self.stamp = stamp
+        self.built_at = time.monotonic()
+        self._names: Dict[int, str] = {}
+        self._parents: Dict[int, Optional[int]] = {}
+        self._paths: Dict[int, str] = {}
+        self._children: Dict[Optional[int], List[int]] = defaultdict(list)
+        self._full_paths: Dict[int, str] = {}
+
+        for category_id, name, parent_id, path in rows:
+            self._names[category_id] = name
+            self._parents[category_id] = parent_id
+            self._paths[category_id] = path
+        for category_id, parent_id in self._parents.items():
+            # A parent that is gone leaves its child at the root
+            self._children[parent_id if parent_id in self._names else None].append(category_id)
+        for children in self._children.values():
+            children.sort(key=lambda child: self._names[child].casefold())
+
+    def __contains__(self, category_id) -> bool:
+        return category_id in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+    def name(self, category_id: int) -> str:
+        return self._names[category_id]
+
+    def parent(self, category_id: int) -> Optional[int]:
+        return self._parents[category_id]
+
+    def path(self, category_id: int) -> str:
+        """The materialized path of ``category_id``, for prefix filters."""
+        return self._paths[category_id]
+
+    def children(self, category_id: Optional[int] = None) -> List[int]:
+        """Direct subcategories of ``category_id`` (root categories for None), by name."""
+        return list(self._children.get(category_id, []))
+
+    def ancestors(self, category_id: int) -> List[int]:
+        """Ids from the root down to the parent of ``category_id``."""
+        ancestors = []
+        parent_id = self._parents[category_id]
+        while parent_id in self._names and parent_id not in ancestors and parent_id != category_id:
+            ancestors.append(parent_id)
+            parent_id = self._parents[parent_id]
+        ancestors.reverse()
+        return ancestors
+
+    def descendants(self, category_id: int, include_self: bool = True) -> List[int]:
+        """``category_id`` (optionally) and every category below it, depth first."""
+        found = [category_id] if include_self else []
+        seen = {category_id}
+        stack = list(reversed(self._children.get(category_id, [])))
+        while stack:
+            child = stack.pop()
+            if child in seen:
+                continue
+            seen.add(child)
+            found.append(child)
+            stack.extend(reversed(self._children.get(child, [])))
+        return found
+
+    def full_path(self, category_id: int) -> str:
+        """Names from the root down, e.g. ``Fiction > Fantasy``."""
+        if category_id not in self._full_paths:
+            self._full_paths[category_id] = ' > '.join(
+                self._names[node] for node in self.ancestors(category_id) + [category_id]
+            )
+        return self._full_paths[category_id]
+
+    def ordered(self) -> List[Tuple[int, int]]:
+        """``(id, depth)`` of every category in tree order, for indented dropdowns."""
+        ordered = []
+        for root in self._children.get(None, []):
+            root_depth = len(self.ancestors(root))
+            for node in self.descendants(root):
+                ordered.append((node, len(self.ancestors(node)) - root_depth))
+        return ordered
+
+
+_tree: Optional[CategoryTree] = None
+_lock = threading.Lock()
+
+
+def _current_stamp() -> str:
+    stamp = cache.get(STAMP_KEY)
+    if stamp is None:
+        # First use, or the cache lost it: start a new generation
+        cache.add(STAMP_KEY, uuid.uuid4().hex, None)
+        stamp = cache.get(STAMP_KEY)
+    return stamp
+
+
+def _is_current(tree: Optional[CategoryTree], stamp: str) -> bool:
+    return tree is not None and tree.stamp == stamp and time.monotonic() - tree.built_at < MAX_AGE_SECONDS
+
+
+def get_tree() -> CategoryTree:
+    """The up-to-date CategoryTree."""
+    global _tree
+    stamp = _current_stamp()
+    tree = _tree
+    if _is_current(tree, stamp):
+        return tree
+
+    with _lock:
+        if not _is_current(_tree, stamp):
+            _tree = CategoryTree(
+                Category.objects.values_list('id', 'category_name', 'parent_category_id', 'path').iterator(),
+                stamp
+            )
+        return _tree
+
+
+def invalidate() -> None:
+    """Make every process rebuild the tree on its next use."""
+    global _tree
+    cache.set(STAMP_KEY, uuid.uuid4().hex, None)
+    _tree = None
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, raw=False, **kwargs):
+    if raw:
+        return
+    # Rebuilding before the commit would miss the change
+    transaction.on_commit(invalidate)
@@ -0,0 +1,34 @@
+"""
+Database expressions shared across apps.
+"""
+
+from django.db.models import Func, IntegerField
+
+
+class DaysBetween(Func):
+    """
+    Whole days from ``start`` to ``end`` (``end - start``) for two date
+    expressions, computed by the database.
+
+    Usage: ``DaysBetween(Value(today, output_field=DateField()), 'due_date')``
+    """
+    arity = 2
+    output_field = IntegerField()
+
+    def __init__(self, end, start, **extra):
+        super().__init__(end, start, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # PostgreSQL: subtracting two dates yields an integer number of days
+        return super().as_sql(compiler, connection, template='(%(expressions)s)', arg_joiner=' - ', **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function='DATEDIFF', **extra_context)
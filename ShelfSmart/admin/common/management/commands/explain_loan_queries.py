@@ -0,0 +1,110 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth
+
+from admin.common.models import Book, BorrowRecord
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the query plans of the dashboard, notification and catalog loan "
+        "queries with and without the BorrowRecord indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--after-only',
+            action='store_true',
+            help="Only print the plans with the indexes in place."
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            help="User id for the per-user queries (defaults to the first user)."
+        )
+
+    def handle(self, *args, **options):
+        user = self._get_user(options['user'])
+
+        if not options['after_only']:
+            if connection.features.can_rollback_ddl:
+                self._print_heading("BEFORE (BorrowRecord indexes dropped)")
+                self._explain_without_indexes(user)
+            else:
+                self.stderr.write(self.style.WARNING(
+                    f"{connection.vendor} cannot roll back DDL; skipping the 'before' plans."
+                ))
+
+        self._print_heading("AFTER (current schema)")
+        self._explain_all(user)
+
+    def _get_user(self, user_id):
+        users = User.objects.order_by('pk')
+        if user_id is not None:
+            users = users.filter(pk=user_id)
+        return users.first()
+
+    def _explain_without_indexes(self, user):
+        """Drop the indexes inside a transaction, explain, then roll back."""
+        quote_name = connection.ops.quote_name
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for index in BorrowRecord._meta.indexes:
+                        cursor.execute(f'DROP INDEX {quote_name(index.name)}')
+                self._explain_all(user)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _explain_all(self, user):
+        for label, queryset in self._queries(user):
+            self.stdout.write(self.style.MIGRATE_LABEL(label))
+            self.stdout.write(queryset.explain())
+            self.stdout.write('')
+
+    def _queries(self, user):
+        today = date.today()
+        open_loans = BorrowRecord.objects.filter(is_returned=False)
+
+        queries = [
+            ("Dashboard: overdue borrowers",
+             open_loans.filter(due_date__lt=today).select_related('user', 'book').order_by('due_date')),
+            ("Dashboard: loans borrowed per month",
+             BorrowRecord.objects.filter(borrowed_date__year=today.year)
+             .annotate(month=ExtractMonth('borrowed_date')).values('month')
+             .annotate(count=Count('id')).order_by('month')),
+            ("Dashboard: loans returned per month",
+             BorrowRecord.objects.filter(return_date__year=today.year, is_returned=True)
+             .annotate(month=ExtractMonth('return_date')).values('month')
+             .annotate(count=Count('id')).order_by('month')),
+            ("Notifications: loans due soon",
+             open_loans.filter(due_date__range=(today, today + timedelta(days=3)))
+             .select_related('user', 'book')),
+        ]
+
+        if user is not None:
+            queries += [
+                (f"Notifications: overdue loans of user {user.pk}",
+                 open_loans.filter(user_id=user.pk, due_date__lt=today).order_by('due_date')),
+                (f"User dashboard: open loans of user {user.pk}",
+                 open_loans.filter(user_id=user.pk).select_related('book').order_by('-borrowed_date')),
+                (f"Catalog: first page with availability for user {user.pk}",
+                 Book.objects.with_user_availability(user).order_by('-created_at', '-id')[:20]),
+            ]
+
+        return queries
+
+    def _print_heading(self, text):
+        self.stdout.write(self.style.SUCCESS(f"=== {text} ==="))
+        self.stdout.write('')
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:28
+
+import datetime
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+
+
+def close_duplicate_open_loans(apps, schema_editor):
+    """
+    Close loans that would violate the new constraint.
+
+    Racing borrows could leave a user with several open loans of the same book.
+    The oldest one is kept; every extra loan is closed and its copy restocked.
+    """
+    BorrowRecord = apps.get_model('common', 'BorrowRecord')
+    Book = apps.get_model('common', 'Book')
+
+    duplicates = (
+        BorrowRecord.objects.filter(is_returned=False)
+        .values('user_id', 'book_id')
+        .annotate(open_loans=Count('id'), keep_id=Min('id'))
+        .filter(open_loans__gt=1)
+    )
+    today = datetime.date.today()
+    for group in duplicates:
+        extra = BorrowRecord.objects.filter(
+            user_id=group['user_id'],
+            book_id=group['book_id'],
+            is_returned=False
+        ).exclude(id=group['keep_id'])
+        closed = extra.update(is_returned=True, return_date=today)
+        Book.objects.filter(pk=group['book_id']).update(
+            quantity=F('quantity') + closed,
+            availability='available'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0006_borrowrecord_renewal_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_open_loans, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='borrowrecord',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_returned', False)), fields=('user_id', 'book'), name='unique_open_loan_per_user_book'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def delete_orphaned_loans(apps, schema_editor):
+    """
+    Remove borrow records whose user no longer exists.
+
+    ``user_id`` used to be a plain integer, so deleting a user left their
+    records behind. Those rows would break the new foreign key; they are
+    deleted, and copies still out on open loans are put back in stock.
+    """
+    BorrowRecord = apps.get_model('common', 'BorrowRecord')
+    Book = apps.get_model('common', 'Book')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    orphaned = BorrowRecord.objects.exclude(user_id__in=User.objects.values('pk'))
+
+    open_per_book = (
+        orphaned.filter(is_returned=False)
+        .values('book_id')
+        .annotate(open_loans=Count('id'))
+    )
+    for row in open_per_book:
+        Book.objects.filter(pk=row['book_id']).update(
+            quantity=F('quantity') + row['open_loans'],
+            availability='available'
+        )
+
+    orphaned.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0007_borrowrecord_unique_open_loan'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_orphaned_loans, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='borrowrecord',
+            name='unique_open_loan_per_user_book',
+        ),
+        # Pin the column name so the rename below leaves the table untouched;
+        # the foreign key keeps the same ``user_id`` column.
+        migrations.AlterField(
+            model_name='borrowrecord',
+            name='user_id',
+            field=models.IntegerField(db_column='user_id'),
+        ),
+        migrations.RenameField(
+            model_name='borrowrecord',
+            old_name='user_id',
+            new_name='user',
+        ),
+        migrations.AlterField(
+            model_name='borrowrecord',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='borrow_records', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='borrowrecord',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_returned', False)), fields=('user', 'book'), name='unique_open_loan_per_user_book'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:59
+
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    """Set each category's path to the ids from its root down to itself."""
+    Category = apps.get_model('common', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_category_id'))
+    paths = {}
+    for category_id in parents:
+        chain = []
+        current = category_id
+        while current is not None and current not in paths and current not in chain:
+            chain.append(current)
+            current = parents.get(current)
+        prefix = paths.get(current, '')
+        for node in reversed(chain):
+            prefix = f'{prefix}{node}/'
+            paths[node] = prefix
+    Category.objects.bulk_update(
+        [Category(id=category_id, path=path) for category_id, path in paths.items()],
+        ['path'],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0009_borrowrecord_loan_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text="Ids from the root category down to this one, e.g. '3/17/42/'", max_length=255),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
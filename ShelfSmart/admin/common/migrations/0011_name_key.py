@@ -0,0 +1,69 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:17
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+NAME_FIELDS = {
+    'Author': 'name',
+    'Category': 'category_name',
+    'Publisher': 'publisher_name',
+}
+
+
+def normalize_name(name):
+    # A copy of admin.common.normalize.normalize_name as of this migration
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    name = name.casefold().replace('&', ' and ').replace('_', ' ')
+    return ' '.join(re.sub(r'[^\w]+', ' ', name).split())[:255]
+
+
+def fill_name_keys(apps, schema_editor):
+    """Set the normalized name of every category, publisher and author."""
+    for model_name, field in NAME_FIELDS.items():
+        model = apps.get_model('common', model_name)
+        model.objects.bulk_update(
+            [model(id=pk, name_key=normalize_name(name)) for pk, name in model.objects.values_list('id', field)],
+            ['name_key'],
+            batch_size=500
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0010_category_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='author',
+            name='name_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Normalized name, for duplicate checks and prefix search', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='name_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Normalized name, for duplicate checks and prefix search', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='publisher',
+            name='name_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Normalized name, for duplicate checks and prefix search', max_length=255),
+        ),
+        migrations.RunPython(fill_name_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(fields=['name_key'], name='author_name_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['name_key'], name='category_name_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='publisher',
+            index=models.Index(fields=['name_key'], name='publisher_name_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0011_name_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NameListVersion',
+            fields=[
+                ('model', models.CharField(help_text='Model label, e.g. common.author', max_length=100, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Name List Version',
+                'verbose_name_plural': 'Name List Versions',
+            },
+        ),
+    ]
@@ -1,4 +1,45 @@
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Value, When
+from django.db.models.functions import Concat, Substr
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .normalize import MAX_KEY_LENGTH, normalize_name
+from .signals import loan_returned
+
+
+class BookQuerySet(models.QuerySet):
+    def with_user_availability(self, user):
+        """
+        Annotate each book with ``user_availability`` for the given user.
+
+        The user's open loans are resolved with a single correlated ``EXISTS``
+        subquery, so a whole page of books costs one query instead of one
+        ``BorrowRecord`` lookup per row.
+        """
+        if user is not None and user.is_authenticated:
+            has_open_loan = Exists(
+                BorrowRecord.objects.filter(
+                    user_id=user.id,
+                    book=OuterRef('pk'),
+                    is_returned=False
+                )
+            )
+        else:
+            has_open_loan = Value(False, output_field=models.BooleanField())
+
+        return self.annotate(
+            user_has_open_loan=has_open_loan,
+            user_availability=Case(
+                When(quantity__lte=0, then=Value('unavailable')),
+                When(user_has_open_loan=True, then=Value('borrowed')),
+                default=Value('available'),
+                output_field=models.CharField()
+            )
+        )
+
 
 class Book(models.Model):
     """Book model with comprehensive schema for library management"""
@@ -47,6 +88,8 @@ class Book(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BookQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
@@ -66,7 +109,16 @@ class Book(models.Model):
         return 'available' if self.quantity > 0 else 'borrowed'
     
     def get_user_availability(self, user):
-        """Get availability status for a specific user"""
+        """
+        Get availability status for a specific user.
+
+        Prefer ``Book.objects.with_user_availability(user)`` when loading books;
+        this falls back to a per-book query only when the annotation is missing.
+        """
+        annotated = self.__dict__.get('user_availability')
+        if annotated is not None:
+            return annotated
+
         if self.quantity <= 0:
             return 'unavailable'
         
@@ -129,8 +181,120 @@ class BookAuthor(models.Model):
         ordering = ['book', 'author']
 
 
+class BorrowRecordManager(models.Manager):
+    def borrow(self, user, book_id, due_date):
+        """
+        Atomically lend one copy of a book to a user.
+
+        The loan row is inserted first, so the partial unique constraint on open
+        (user, book) loans rejects a duplicate borrow immediately; the copy is
+        then taken with a single conditional ``UPDATE ... WHERE quantity > 0``.
+        Nothing is read and written back from Python, so concurrent borrowers
+        can neither lose updates nor oversell copies.
+
+        Raises ``BorrowRecord.AlreadyBorrowed`` or ``BorrowRecord.Unavailable``;
+        in both cases nothing is written.
+        """
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    record = self.create(
+                        user_id=user.id,
+                        book_id=book_id,
+                        due_date=due_date,
+                        is_returned=False
+                    )
+            except IntegrityError:
+                raise self.model.AlreadyBorrowed("User already has an open loan for this book")
+
+            taken = Book.objects.filter(pk=book_id, quantity__gt=0).update(
+                quantity=F('quantity') - 1,
+                availability=Case(
+                    When(quantity__lte=1, then=Value('borrowed')),
+                    default=F('availability')
+                ),
+                updated_at=timezone.now()
+            )
+            if not taken:
+                # Rolls back the loan inserted above
+                raise self.model.Unavailable("No copies of this book are available")
+
+        return record
+
+    def mark_returned(self, record_id, return_date=None):
+        """
+        Atomically close an open loan and put its copy back on the shelf.
+
+        Only the request that actually flips ``is_returned`` restocks the book,
+        so a double-submitted return cannot inflate the quantity. Raises
+        ``BorrowRecord.DoesNotExist`` or ``BorrowRecord.AlreadyReturned``.
+        """
+        record = self.select_related('book').get(pk=record_id)
+        return_date = return_date or timezone.localdate()
+        now = timezone.now()
+
+        with transaction.atomic():
+            closed = self.filter(pk=record.pk, is_returned=False).update(
+                is_returned=True,
+                return_date=return_date,
+                updated_at=now
+            )
+            if not closed:
+                raise self.model.AlreadyReturned("This loan has already been returned")
+
+            Book.objects.filter(pk=record.book_id).update(
+                quantity=F('quantity') + 1,
+                availability='available',
+                updated_at=now
+            )
+
+            record.is_returned = True
+            record.return_date = return_date
+            loan_returned.send(sender=self.model, record=record)
+
+        return record
+
+    def restock_open_loans(self, **filters):
+        """
+        Put the copies of the matching open loans back in stock, e.g. before
+        the loans are deleted along with their user. Returns the number of
+        copies restocked.
+        """
+        open_per_book = (
+            self.filter(is_returned=False, **filters)
+            .values('book_id')
+            .annotate(open_loans=Count('id'))
+            .order_by()
+        )
+        restocked = 0
+        now = timezone.now()
+        for row in open_per_book:
+            Book.objects.filter(pk=row['book_id']).update(
+                quantity=F('quantity') + row['open_loans'],
+                availability='available',
+                updated_at=now
+            )
+            restocked += row['open_loans']
+        return restocked
+
+
 class BorrowRecord(models.Model):
-    user_id = models.IntegerField()
+    class Unavailable(Exception):
+        """Raised when no copies of the book are left to borrow."""
+
+    class AlreadyBorrowed(Exception):
+        """Raised when the user already has an open loan for the book."""
+
+    class AlreadyReturned(Exception):
+        """Raised when returning a loan that is already closed."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='borrow_records',
+        # Covered by the leading column of borrow_user_open_due_idx
+        db_index=False
+    )
     book = models.ForeignKey(Book, on_delete=models.CASCADE)
     borrowed_date = models.DateField(auto_now_add=True)
     due_date = models.DateField()
@@ -140,22 +304,90 @@ class BorrowRecord(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BorrowRecordManager()
+
     def __str__(self):
         return f"{self.book.title} - User {self.user_id}"
 
     class Meta:
         db_table = 'dashboard_borrowrecord'  # Keep the same table name for compatibility
+        constraints = [
+            # A user can hold at most one open loan of the same book
+            models.UniqueConstraint(
+                fields=['user', 'book'],
+                condition=Q(is_returned=False),
+                name='unique_open_loan_per_user_book'
+            ),
+        ]
+        indexes = [
+            # Overdue and due-soon scans across all users only ever look at
+            # open loans, so the index skips the (much larger) returned history.
+            models.Index(
+                fields=['due_date'],
+                condition=Q(is_returned=False),
+                name='borrow_open_due_date_idx'
+            ),
+            # A user's loans, optionally narrowed to open ones and a due date range
+            models.Index(
+                fields=['user', 'is_returned', 'due_date'],
+                name='borrow_user_open_due_idx'
+            ),
+            # Dashboard borrow/return statistics by date
+            models.Index(fields=['borrowed_date'], name='borrow_borrowed_date_idx'),
+            models.Index(
+                fields=['return_date'],
+                condition=Q(is_returned=True),
+                name='borrow_returned_date_idx'
+            ),
+        ]
+
+
+class NameKeyMixin:
+    """
+    Keeps ``name_key``, the normalized name (see ``normalize.py``) used for
+    duplicate checks and the pickers' prefix search, in step with the name
+    field given by ``NAME_FIELD``. Code that bypasses ``save()``, such as
+    ``bulk_create``, has to set it itself.
+    """
+    NAME_FIELD = ''
 
+    def save(self, *args, **kwargs):
+        self.name_key = normalize_name(getattr(self, self.NAME_FIELD))[:MAX_KEY_LENGTH]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.NAME_FIELD in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'name_key'}
+        super().save(*args, **kwargs)
 
-class Author(models.Model):
+
+def _name_key_field():
+    return models.CharField(
+        max_length=MAX_KEY_LENGTH,
+        blank=True,
+        default='',
+        editable=False,
+        help_text="Normalized name, for duplicate checks and prefix search"
+    )
+
+
+def _name_key_index(prefix):
+    # Prefix search is LIKE 'key%': the pattern operator class lets
+    # PostgreSQL use the index whatever the database collation (other
+    # databases ignore it)
+    return models.Index(fields=['name_key'], name=f'{prefix}_name_key_idx', opclasses=['varchar_pattern_ops'])
+
+
+class Author(NameKeyMixin, models.Model):
     """Author model for storing book author information"""
     # author_id is automatically created as 'id' by Django
     name = models.CharField(max_length=100, null=False, blank=False, help_text="Author's name")
     biography = models.TextField(blank=True, null=True, help_text="Author biography")
     nationality = models.CharField(max_length=50, blank=True, null=True, help_text="Author nationality")
+    name_key = _name_key_field()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    NAME_FIELD = 'name'
+
     def __str__(self):
         return self.name
 
@@ -169,9 +401,10 @@ class Author(models.Model):
         verbose_name = 'Author'
         verbose_name_plural = 'Authors'
         ordering = ['name']
+        indexes = [_name_key_index('author')]
 
 
-class Category(models.Model):
+class Category(NameKeyMixin, models.Model):
     """Category model for book categorization with support for hierarchical categories"""
     # category_id is automatically created as 'id' by Django
     category_name = models.CharField(max_length=100, unique=True, null=False, blank=False, help_text="Category name")
@@ -184,10 +417,32 @@ class Category(models.Model):
         related_name='subcategories',
         help_text="Parent category for hierarchical structure"
     )
+    path = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        help_text="Ids from the root category down to this one, e.g. '3/17/42/'"
+    )
+    name_key = _name_key_field()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class InvalidParent(ValueError):
+        """Raised when a category would become its own ancestor."""
+
+    NAME_FIELD = 'category_name'
+
     def __str__(self):
+        from .category_tree import get_tree
+
+        tree = get_tree()
+        if self.pk in tree and tree.parent(self.pk) == self.parent_category_id:
+            parent_id = self.parent_category_id
+            if parent_id is None or parent_id not in tree:
+                return self.category_name
+            return f"{tree.name(parent_id)} > {self.category_name}"
         if self.parent_category:
             return f"{self.parent_category.category_name} > {self.category_name}"
         return self.category_name
@@ -204,18 +459,60 @@ class Category(models.Model):
     
     def get_full_path(self):
         """Get the full hierarchical path of the category"""
+        from .category_tree import get_tree
+
+        tree = get_tree()
+        if self.pk in tree and tree.parent(self.pk) == self.parent_category_id:
+            parent_id = self.parent_category_id
+            prefix = f"{tree.full_path(parent_id)} > " if parent_id in tree else ""
+            return f"{prefix}{self.category_name}"
+        # Not in the cached tree yet, e.g. saved in the current transaction
         if self.parent_category:
             return f"{self.parent_category.get_full_path()} > {self.category_name}"
         return self.category_name
 
+    def save(self, *args, **kwargs):
+        """
+        Save the category and keep the materialized ``path`` of it and its
+        subcategories in step with ``parent_category``.
+        """
+        parent_path = ''
+        if self.parent_category_id is not None:
+            parent_path = Category.objects.filter(pk=self.parent_category_id).values_list('path', flat=True).first() or ''
+            if self.pk is not None and str(self.pk) in parent_path.split('/'):
+                raise Category.InvalidParent("A category cannot be moved under itself or one of its subcategories.")
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'path'}
+
+        with transaction.atomic():
+            old_path = ''
+            if self.pk is not None:
+                old_path = Category.objects.filter(pk=self.pk).values_list('path', flat=True).first() or ''
+                self.path = f"{parent_path}{self.pk}/"
+            super().save(*args, **kwargs)
+
+            path = f"{parent_path}{self.pk}/"
+            if self.path != path:
+                # A new row: its id was not known before the insert
+                self.path = path
+                Category.objects.filter(pk=self.pk).update(path=path)
+            if old_path and old_path != path:
+                # Moved: re-root the paths of every subcategory
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(path), Substr('path', len(old_path) + 1))
+                )
+
     class Meta:
         db_table = 'category'
         verbose_name = 'Category'
         verbose_name_plural = 'Categories'
         ordering = ['category_name']
+        indexes = [_name_key_index('category')]
 
 
-class Publisher(models.Model):
+class Publisher(NameKeyMixin, models.Model):
     """Publisher model for storing book publisher information"""
     # publisher_id is automatically created as 'id' by Django
     publisher_name = models.CharField(max_length=100, unique=True, null=False, blank=False, help_text="Publisher name")
@@ -228,9 +525,12 @@ class Publisher(models.Model):
         null=True,
         help_text="Year the publisher was established"
     )
+    name_key = _name_key_field()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    NAME_FIELD = 'publisher_name'
+
     def __str__(self):
         return self.publisher_name
 
@@ -243,3 +543,46 @@ class Publisher(models.Model):
         db_table = 'publisher'
         verbose_name = 'Publisher'
         verbose_name_plural = 'Publishers'
+        indexes = [_name_key_index('publisher')]
+
+
+class NameListVersion(models.Model):
+    """
+    Change counter of one model's names (categories, publishers or
+    authors), bumped after every save or delete commits. Reading it is a
+    primary key lookup, so every process can cheaply tell whether its
+    in-memory name index or a picker ETag is out of date.
+    """
+    model = models.CharField(max_length=100, primary_key=True, help_text="Model label, e.g. common.author")
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Name List Version'
+        verbose_name_plural = 'Name List Versions'
+
+    def __str__(self):
+        return f"{self.model} v{self.version}"
+
+    @classmethod
+    def current(cls, model):
+        """The version of ``model``'s names, 0 before their first change."""
+        return cls.objects.filter(model=model._meta.label_lower).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls, model):
+        """Move ``model``'s names on to a new version."""
+        label = model._meta.label_lower
+        if not cls.objects.filter(model=label).update(version=F('version') + 1):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(model=label, version=1)
+            except IntegrityError:
+                # Created by a concurrent bump in the meantime
+                cls.objects.filter(model=label).update(version=F('version') + 1)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def restock_loans_of_deleted_user(sender, instance, **kwargs):
+    # The user's loans are deleted with them (CASCADE); copies they still
+    # had are put back first. Runs in the same transaction as the delete.
+    BorrowRecord.objects.restock_open_loans(user=instance)
@@ -0,0 +1,253 @@
+"""
+In-memory name matching for categories, publishers and authors.
+
+Names are compared by a normalized key (see ``normalize.py``): casefolded,
+accents stripped, punctuation turned into spaces ("J.R.R. Tolkien" and
+"J. R. R. Tolkien" share the key ``j r r tolkien``). Each model's names are
+held in a ``NameIndex`` with token and trigram postings, so ranking a name
+against the whole table takes microseconds instead of an ``icontains`` scan
+per name, and with sorted keys, so finding the names with a word starting
+with a prefix is a binary search.
+
+An index can lag behind the database (see below), so it only ever suggests:
+whether a name exists is asked of the database, through the indexed
+``name_key`` column.
+
+An index is built on first use in each process and rebuilt when its model
+changes: saves and deletes bump the model's ``NameListVersion`` row once the
+transaction commits, and an index built from an older version is rebuilt on
+its next use, in whichever process it lives.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Author, Category, NameListVersion, Publisher
+from .normalize import normalize_name
+
+# The field holding the name of each indexed model
+NAME_FIELDS = {
+    Category: 'category_name',
+    Publisher: 'publisher_name',
+    Author: 'name',
+}
+
+# Lowest score best_match accepts as the same name
+MATCH_THRESHOLD = 0.75
+
+# Rebuild an index at least this often, in case a change bypassed the
+# signals (e.g. a queryset update)
+MAX_AGE_SECONDS = getattr(settings, 'NAME_INDEX_MAX_AGE', 300)
+
+
+def trigrams(key: str) -> Set[str]:
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameMatch(NamedTuple):
+    id: int
+    name: str
+    score: float
+
+
+class NameIndex:
+    """
+    Ranked lookup of names by normalized key.
+
+    ``search`` scores candidates found through the postings:
+
+    - 1.0 when the keys are equal;
+    - 0.8 to 0.99 when every word of the query appears in the name (what
+      the old ``icontains`` lookup matched), higher the closer the two are;
+    - otherwise the trigram (Dice) similarity of the keys.
+    """
+
+    def __init__(self, names: Iterable[Tuple[int, str]], stamp: Optional[int] = None):
+        self.stamp = stamp
+        self.built_at = time.monotonic()
+        self._names: Dict[int, str] = {}
+        self._keys: Dict[int, str] = {}
+        self._trigram_counts: Dict[int, int] = {}
+        self._by_key: Dict[str, List[int]] = defaultdict(list)
+        self._token_postings: Dict[str, Set[int]] = defaultdict(set)
+        self._trigram_postings: Dict[str, Set[int]] = defaultdict(set)
+        # (key, name, pk) of every entry, and (rest of key, name, pk) from
+        # the start of each later word, both sorted for prefix lookups
+        self._sorted_keys: List[Tuple[str, str, int]] = []
+        self._sorted_word_starts: List[Tuple[str, str, int]] = []
+
+        for pk, name in names:
+            key = normalize_name(name)
+            if not key:
+                continue
+            grams = trigrams(key)
+            self._names[pk] = name
+            self._keys[pk] = key
+            self._trigram_counts[pk] = len(grams)
+            self._by_key[key].append(pk)
+            for token in key.split():
+                self._token_postings[token].add(pk)
+            for gram in grams:
+                self._trigram_postings[gram].add(pk)
+            folded = name.casefold()
+            self._sorted_keys.append((key, folded, pk))
+            for start, char in enumerate(key):
+                if char == ' ':
+                    self._sorted_word_starts.append((key[start + 1:], folded, pk))
+
+        self._sorted_keys.sort()
+        self._sorted_word_starts.sort()
+
+    def __len__(self):
+        return len(self._names)
+
+    def name(self, pk: int) -> Optional[str]:
+        """The name of entry ``pk``, None if it is not indexed."""
+        return self._names.get(pk)
+
+    def autocomplete(self, prefix: str, limit: int = 10, first_word: bool = True) -> List[NameMatch]:
+        """
+        The first ``limit`` entries, alphabetically, whose name starts with
+        ``prefix`` (score 1.0), followed by those with a later word that
+        starts with it (score 0.9), e.g. "tolk" finds "J. R. R. Tolkien".
+        Without ``first_word`` only the latter are returned. An empty prefix
+        lists the first entries.
+
+        Both lists are sorted, so this is a binary search and a scan of at
+        most ``limit`` entries each, whatever the size of the table.
+        """
+        key = normalize_name(prefix)
+        matches = []
+        seen = set()
+        lists = [(self._sorted_word_starts, 0.9)]
+        if first_word:
+            lists.insert(0, (self._sorted_keys, 1.0))
+        for entries, score in lists:
+            position = bisect_left(entries, (key,))
+            while len(matches) < limit and position < len(entries):
+                entry_key, _, pk = entries[position]
+                if not entry_key.startswith(key):
+                    break
+                if pk not in seen:
+                    seen.add(pk)
+                    matches.append(NameMatch(pk, self._names[pk], score))
+                position += 1
+        return matches
+
+    def exact(self, name: str) -> List[NameMatch]:
+        """Entries whose normalized name equals that of ``name``."""
+        return [
+            NameMatch(pk, self._names[pk], 1.0)
+            for pk in self._by_key.get(normalize_name(name), [])
+        ]
+
+    def search(self, name: str, limit: int = 5, min_score: float = 0.3) -> List[NameMatch]:
+        """The best ``limit`` entries for ``name``, best first."""
+        key = normalize_name(name)
+        if not key:
+            return []
+
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            for pk in self._trigram_postings.get(gram, ()):
+                shared[pk] += 1
+
+        tokens = key.split()
+        postings = [self._token_postings.get(token, set()) for token in tokens]
+        containing = set.intersection(*postings) if all(postings) else set()
+
+        matches = []
+        for pk in shared.keys() | containing:
+            dice = 2 * shared[pk] / (len(grams) + self._trigram_counts[pk])
+            if self._keys[pk] == key:
+                score = 1.0
+            elif pk in containing:
+                score = 0.8 + 0.19 * dice
+            else:
+                score = dice
+            if score >= min_score:
+                matches.append(NameMatch(pk, self._names[pk], round(score, 4)))
+
+        matches.sort(key=lambda match: (-match.score, len(match.name), match.id))
+        return matches[:limit]
+
+    def best_match(self, name: str, min_score: float = MATCH_THRESHOLD) -> Optional[NameMatch]:
+        """The highest ranked entry for ``name`` if it scores at least ``min_score``."""
+        matches = self.search(name, limit=1, min_score=min_score)
+        return matches[0] if matches else None
+
+
+_indexes: Dict[type, NameIndex] = {}
+_lock = threading.Lock()
+
+
+def current_stamp(model) -> int:
+    """
+    The change stamp of ``model``'s names: it moves on whenever a category,
+    publisher or author (as ``model``) is saved or deleted. One primary key
+    lookup, shared by every process.
+    """
+    return NameListVersion.current(model)
+
+
+def get_index(model) -> NameIndex:
+    """The up-to-date NameIndex for ``model`` (Category, Publisher or Author)."""
+    field = NAME_FIELDS[model]
+    stamp = current_stamp(model)
+    index = _indexes.get(model)
+    if index is not None and index.stamp == stamp and time.monotonic() - index.built_at < MAX_AGE_SECONDS:
+        return index
+
+    with _lock:
+        index = _indexes.get(model)
+        if index is None or index.stamp != stamp or time.monotonic() - index.built_at >= MAX_AGE_SECONDS:
+            index = NameIndex(model.objects.values_list('pk', field).iterator(), stamp)
+            _indexes[model] = index
+    return index
+
+
+def find_existing(model, name: str, exclude_pk: Optional[int] = None) -> Optional[NameMatch]:
+    """
+    The entry of ``model`` already named ``name`` (ignoring case, accents
+    and punctuation), for duplicate checks. Asked of the database through
+    the indexed ``name_key`` column, so an entry just added by another
+    process is found even if this process's index has not caught up.
+    """
+    field = NAME_FIELDS[model]
+    entries = model.objects.filter(
+        Q(name_key=normalize_name(name)) | Q(**{f'{field}__iexact': name})
+    )
+    if exclude_pk is not None:
+        entries = entries.exclude(pk=exclude_pk)
+    existing = entries.order_by('pk').values_list('pk', field).first()
+    return NameMatch(existing[0], existing[1], 1.0) if existing else None
+
+
+def invalidate(model) -> None:
+    """Make every process rebuild ``model``'s index on its next use."""
+    NameListVersion.bump(model)
+    _indexes.pop(model, None)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Publisher)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Publisher)
+@receiver(post_delete, sender=Author)
+def invalidate_name_index(sender, raw=False, **kwargs):
+    if raw:
+        return
+    # Rebuilding before the commit would miss the change
+    transaction.on_commit(lambda: invalidate(sender))
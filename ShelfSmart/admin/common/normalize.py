@@ -0,0 +1,24 @@
+"""
+Comparison keys for category, publisher and author names.
+
+A name is normalized by stripping accents, casefolding and turning
+punctuation into spaces, so "J.R.R. Tolkien" and "J. R. R. Tolkien" share
+the key ``j r r tolkien``. The key is stored in each model's ``name_key``
+column (indexed for prefix search) and used by the in-memory name indexes.
+"""
+
+import re
+import unicodedata
+
+# Longest key stored in ``name_key``
+MAX_KEY_LENGTH = 255
+
+_PUNCTUATION = re.compile(r'[^\w]+')
+
+
+def normalize_name(name: str) -> str:
+    """Return the comparison key for ``name``."""
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    name = name.casefold().replace('&', ' and ').replace('_', ' ')
+    return ' '.join(_PUNCTUATION.sub(' ', name).split())
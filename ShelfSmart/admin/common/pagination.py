@@ -0,0 +1,149 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are addressed by an opaque cursor holding the sort value and primary key
+of the boundary row instead of an OFFSET, so fetching a deep page costs the
+same as fetching the first one. The primary key is always used as a tiebreaker
+so the ordering is total and stable even when sort values repeat.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+NEXT = 'next'
+PREVIOUS = 'prev'
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded or does not match the sort."""
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse a requested page size, clamping it to ``1..maximum``."""
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(page_size, maximum))
+
+
+def encode_cursor(sort_by, value, pk, direction):
+    """Build an opaque, URL-safe cursor for the row ``(value, pk)``."""
+    if isinstance(value, datetime):
+        payload = {'s': sort_by, 'v': value.isoformat(), 't': 'dt', 'id': pk, 'd': direction}
+    else:
+        payload = {'s': sort_by, 'v': value, 'id': pk, 'd': direction}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_by):
+    """
+    Decode a cursor produced by :func:`encode_cursor`.
+
+    Returns a ``(value, pk, direction)`` tuple. Raises :class:`InvalidCursor`
+    if the cursor is malformed or was issued for a different sort order.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        value = payload['v']
+        pk = int(payload['id'])
+        direction = payload.get('d', NEXT)
+        issued_for = payload.get('s')
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+        raise InvalidCursor('Malformed cursor')
+
+    if issued_for != sort_by:
+        raise InvalidCursor('Cursor does not match the requested sort order')
+    if direction not in (NEXT, PREVIOUS):
+        raise InvalidCursor('Unknown cursor direction')
+    if payload.get('t') == 'dt':
+        value = parse_datetime(value)
+        if value is None:
+            raise InvalidCursor('Malformed cursor timestamp')
+
+    return value, pk, direction
+
+
+class KeysetPage:
+    """A single page of results together with the cursors around it."""
+
+    def __init__(self, items, sort_by, has_next, has_previous, page_size):
+        self.items = items
+        self.sort_by = sort_by
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.page_size = page_size
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def next_cursor(self):
+        if not self.has_next or not self.items:
+            return None
+        last = self.items[-1]
+        return encode_cursor(self.sort_by, last.keyset_value, last.pk, NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous or not self.items:
+            return None
+        first = self.items[0]
+        return encode_cursor(self.sort_by, first.keyset_value, first.pk, PREVIOUS)
+
+
+def paginate_keyset(queryset, sort_by, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return one :class:`KeysetPage` of ``queryset`` ordered by ``sort_by``.
+
+    ``sort_by`` is a single field name or lookup path, optionally prefixed with
+    ``-`` for descending order; callers are expected to have validated it
+    against their own whitelist. ``cursor`` is the value of a previous page's
+    ``next_cursor`` or ``previous_cursor``. Raises :class:`InvalidCursor` if the
+    cursor cannot be used with this sort.
+    """
+    field = sort_by.lstrip('-')
+    descending = sort_by.startswith('-')
+
+    direction = NEXT
+    queryset = queryset.annotate(keyset_value=F(field))
+
+    if cursor:
+        value, pk, direction = decode_cursor(cursor, sort_by)
+        # Walking backwards flips the comparison and the ordering; the rows are
+        # reversed again below so every page is returned in display order.
+        forwards = (direction == NEXT) != descending
+        op = 'gt' if forwards else 'lt'
+        queryset = queryset.filter(
+            Q(**{f'keyset_value__{op}': value})
+            | Q(keyset_value=value, **{f'pk__{op}': pk})
+        )
+
+    fetch_descending = descending != (direction == PREVIOUS)
+    if fetch_descending:
+        queryset = queryset.order_by(F('keyset_value').desc(), '-pk')
+    else:
+        queryset = queryset.order_by(F('keyset_value').asc(), 'pk')
+
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if direction == PREVIOUS:
+        rows.reverse()
+        return KeysetPage(rows, sort_by, has_next=True, has_previous=has_more, page_size=page_size)
+
+    return KeysetPage(rows, sort_by, has_next=has_more, has_previous=cursor is not None, page_size=page_size)
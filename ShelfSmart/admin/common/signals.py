@@ -0,0 +1,12 @@
+"""
+Signals for changes that do not go through ``Model.save()``.
+
+Loans are closed with a conditional ``UPDATE`` (see
+``BorrowRecordManager.mark_returned``), so ``post_save`` never fires for a
+return. ``loan_returned`` is sent instead, inside the same transaction, with
+the closed ``BorrowRecord`` as ``record``.
+"""
+
+from django.dispatch import Signal
+
+loan_returned = Signal()
@@ -2,14 +2,20 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from user_auth.decorators import admin_required
+from django.core.paginator import Paginator
+from django.db.models import Count
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 import logging
 
 from admin.common.models import Publisher
+from admin.common.name_index import find_existing
 
 logger = logging.getLogger(__name__)
 
+# Rows per page of the management table
+PAGE_SIZE = 50
+
 
 def get_current_user_info(request):
     """Helper function to get current user's info from Django User object"""
@@ -71,8 +77,10 @@ def publisher_management(request):
                     return redirect("/admin-panel/publishers/")
 
                 # Check if publisher name already exists
-                if Publisher.objects.filter(publisher_name=publisher_name).exists():
-                    messages.error(request, f"Publisher '{publisher_name}' already exists.")
+                # (ignoring case, accents and punctuation, e.g. from ISBN quick-add)
+                existing = find_existing(Publisher, publisher_name)
+                if existing:
+                    messages.error(request, f"Publisher '{publisher_name}' already exists as '{existing.name}'.")
                     return redirect("/admin-panel/publishers/")
 
                 publisher = Publisher(
@@ -104,9 +112,9 @@ def publisher_management(request):
                     return redirect("/admin-panel/publishers/")
 
                 # Check if new name conflicts with another publisher
-                existing = Publisher.objects.filter(publisher_name=new_name).exclude(pk=publisher_id)
-                if existing.exists():
-                    messages.error(request, f"Publisher '{new_name}' already exists.")
+                existing = find_existing(Publisher, new_name, exclude_pk=publisher.pk)
+                if existing:
+                    messages.error(request, f"Publisher '{new_name}' already exists as '{existing.name}'.")
                     return redirect("/admin-panel/publishers/")
 
                 publisher.publisher_name = new_name
@@ -143,10 +151,16 @@ def publisher_management(request):
     
     # GET request - fetch all publishers
     try:
-        publishers_qs = Publisher.objects.all().order_by('publisher_name')
+        search_query = request.GET.get("q", "").strip()
+        publishers_qs = Publisher.objects.annotate(
+            book_count=Count('books', distinct=True)
+        ).order_by('publisher_name', 'pk')  # by id within equal names so pages do not overlap
+        if search_query:
+            publishers_qs = publishers_qs.filter(publisher_name__icontains=search_query)
+        page_obj = Paginator(publishers_qs, PAGE_SIZE).get_page(request.GET.get("page"))
         publishers = []
         
-        for p in publishers_qs:
+        for p in page_obj:
             publishers.append({
                 "id": p.id,
                 "publisher_id": p.publisher_id,
@@ -158,12 +172,20 @@ def publisher_management(request):
                 "established_year": p.established_year or "",
                 "created_at": p.created_at,
                 "updated_at": p.updated_at,
-                "book_count": p.books.count(),
+                "book_count": p.book_count,
             })
 
+        # Keep the search on the pagination links
+        query = request.GET.copy()
+        query.pop("page", None)
+        filter_query = query.urlencode()
+
         context = {
             "user_info": get_current_user_info(request),
             "publishers": publishers,
+            "page_obj": page_obj,
+            "search_query": search_query,
+            "filter_query": filter_query,
             "active_page": "publishers",
         }
         return render(request, "publisher_management/publisher_management.html", context)
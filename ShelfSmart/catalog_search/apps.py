@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class CatalogSearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'catalog_search'
+    verbose_name = 'Catalog Full-Text Search'
+
+    def ready(self):
+        # Keep the search index in sync with book changes
+        from . import signals  # noqa: F401
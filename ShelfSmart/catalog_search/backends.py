@@ -0,0 +1,325 @@
+"""
+Full-text search backends for the book catalog.
+
+Every backend keeps one search document per book, built from the book's
+title, subtitle and description, its authors' names and its category and
+publisher names, and answers ranked queries against it:
+
+- PostgreSQL: ``book_search_document`` holds a weighted ``tsvector`` per book
+  behind a GIN index and results are ranked with ``ts_rank_cd``.
+- SQLite: ``book_search_fts`` is an FTS5 virtual table keyed by book id and
+  results are ranked with ``bm25``.
+- Any other database (or SQLite built without FTS5) falls back to ``LIKE``
+  matching, ordered by title.
+
+Queries are answered inside the database: :func:`search_filter` restricts a
+book queryset to the matches and :func:`search_rank` orders them, so callers
+paginate over every match instead of a capped list of ids.
+
+The tables are created by ``migrations/0001_initial.py`` and kept up to date
+by ``signals.py``; ``manage.py rebuild_search_index`` rebuilds them from scratch.
+"""
+
+import logging
+import re
+
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Q, Subquery
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+# Books (re)indexed per round trip
+INDEX_BATCH_SIZE = 500
+
+# Text search configuration used on PostgreSQL
+POSTGRES_SEARCH_CONFIG = 'english'
+
+POSTGRES_TABLE = 'book_search_document'
+SQLITE_TABLE = 'book_search_fts'
+
+# Outer book column the rank subqueries are correlated with
+_BOOK_ID_COLUMN = '"book"."id"'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_MAX_QUERY_TOKENS = 16
+
+
+def tokenize(query):
+    """Split a free-text query into lowercase word tokens."""
+    return _TOKEN_RE.findall((query or '').lower())[:_MAX_QUERY_TOKENS]
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def build_documents(book_queryset):
+    """
+    Yield ``(book_id, fields)`` for every book in ``book_queryset``, where
+    ``fields`` maps each indexed field to its text.
+
+    Authors, category and publisher are loaded in bulk, so a batch of books
+    costs a constant number of queries.
+    """
+    books = book_queryset.select_related('category', 'publisher').prefetch_related(
+        'book_authors__author'
+    )
+    for book in books.iterator(chunk_size=INDEX_BATCH_SIZE):
+        yield book.id, {
+            'title': book.title or '',
+            'subtitle': book.subtitle or '',
+            'authors': ' '.join(ba.author.name for ba in book.book_authors.all()),
+            'category': book.category.category_name if book.category_id else '',
+            'publisher': book.publisher.publisher_name if book.publisher_id else '',
+            'description': book.description or '',
+        }
+
+
+class BaseSearchBackend:
+    """Common indexing logic; subclasses provide the storage and the query."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def _default_queryset(self):
+        from admin.common.models import Book
+        return Book.objects.all()
+
+    def index_books(self, book_ids, book_queryset=None):
+        """
+        (Re)index the given books. Ids that no longer match a book are removed
+        from the index, so this is also safe to call after a delete.
+        """
+        book_queryset = book_queryset if book_queryset is not None else self._default_queryset()
+        ids = sorted({int(book_id) for book_id in book_ids if book_id is not None})
+        for chunk in _chunks(ids, INDEX_BATCH_SIZE):
+            documents = list(build_documents(book_queryset.filter(id__in=chunk)))
+            with transaction.atomic(using=self.connection.alias):
+                self._delete(chunk)
+                self._insert(documents)
+
+    def rebuild(self, book_queryset=None):
+        """Drop every search document and index all books again. Returns the count."""
+        book_queryset = book_queryset if book_queryset is not None else self._default_queryset()
+        indexed = 0
+        with transaction.atomic(using=self.connection.alias):
+            self._clear()
+            batch = []
+            for document in build_documents(book_queryset.order_by('id')):
+                batch.append(document)
+                if len(batch) >= INDEX_BATCH_SIZE:
+                    self._insert(batch)
+                    indexed += len(batch)
+                    batch = []
+            if batch:
+                self._insert(batch)
+                indexed += len(batch)
+        return indexed
+
+    def matches(self, tokens):
+        """Expression usable as ``id__in`` selecting the books matching ``tokens``."""
+        raise NotImplementedError
+
+    def rank(self, tokens):
+        """
+        Expression ranking a matching book against ``tokens``; lower values
+        are better matches. Only meaningful on rows selected by :meth:`matches`.
+        """
+        raise NotImplementedError
+
+    # Storage hooks
+    def _clear(self):
+        raise NotImplementedError
+
+    def _delete(self, book_ids):
+        raise NotImplementedError
+
+    def _insert(self, documents):
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Weighted ``tsvector`` documents with a GIN index."""
+
+    # Title and authors weigh most, then subtitle, then category/publisher,
+    # and the (long) description least.
+    _INSERT_SQL = (
+        f'INSERT INTO {POSTGRES_TABLE} (book_id, document) VALUES (%s, '
+        f"setweight(to_tsvector('{POSTGRES_SEARCH_CONFIG}', %s), 'A') || "
+        f"setweight(to_tsvector('{POSTGRES_SEARCH_CONFIG}', %s), 'A') || "
+        f"setweight(to_tsvector('{POSTGRES_SEARCH_CONFIG}', %s), 'B') || "
+        f"setweight(to_tsvector('{POSTGRES_SEARCH_CONFIG}', %s), 'C') || "
+        f"setweight(to_tsvector('{POSTGRES_SEARCH_CONFIG}', %s), 'C') || "
+        f"setweight(to_tsvector('{POSTGRES_SEARCH_CONFIG}', %s), 'D'))"
+    )
+
+    def _clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {POSTGRES_TABLE}')
+
+    def _delete(self, book_ids):
+        if not book_ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {POSTGRES_TABLE} WHERE book_id = ANY(%s)', [list(book_ids)])
+
+    def _insert(self, documents):
+        if not documents:
+            return
+        rows = [
+            (book_id, f['title'], f['authors'], f['subtitle'], f['category'], f['publisher'], f['description'])
+            for book_id, f in documents
+        ]
+        with self.connection.cursor() as cursor:
+            cursor.executemany(self._INSERT_SQL, rows)
+
+    @staticmethod
+    def _tsquery(tokens):
+        # Every token must match; each one is a prefix so partially typed
+        # words still find results. Tokens are \w+ only, so they are safe to
+        # embed in the tsquery syntax.
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def matches(self, tokens):
+        return RawSQL(
+            f'SELECT book_id FROM {POSTGRES_TABLE} '
+            f"WHERE document @@ to_tsquery('{POSTGRES_SEARCH_CONFIG}', %s)",
+            [self._tsquery(tokens)]
+        )
+
+    def rank(self, tokens):
+        # Negated so that, as with bm25(), lower is better. Cast to double
+        # precision so the value survives a round trip through a page cursor.
+        return RawSQL(
+            f'SELECT -ts_rank_cd(document, '
+            f"to_tsquery('{POSTGRES_SEARCH_CONFIG}', %s))::double precision "
+            f'FROM {POSTGRES_TABLE} WHERE book_id = {_BOOK_ID_COLUMN}',
+            [self._tsquery(tokens)],
+            output_field=FloatField()
+        )
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """FTS5 virtual table whose rowid is the book id."""
+
+    _COLUMNS = ('title', 'subtitle', 'authors', 'category', 'publisher', 'description')
+    # bm25() column weights, in _COLUMNS order
+    _WEIGHTS = '10.0, 4.0, 8.0, 3.0, 3.0, 1.0'
+
+    def _clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+
+    def _delete(self, book_ids):
+        if not book_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(book_ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({placeholders})', list(book_ids))
+
+    def _insert(self, documents):
+        if not documents:
+            return
+        columns = ', '.join(self._COLUMNS)
+        placeholders = ', '.join(['%s'] * (len(self._COLUMNS) + 1))
+        rows = [
+            (book_id, *(fields[column] for column in self._COLUMNS))
+            for book_id, fields in documents
+        ]
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {SQLITE_TABLE} (rowid, {columns}) VALUES ({placeholders})',
+                rows
+            )
+
+    @staticmethod
+    def _match(tokens):
+        # Quoted prefix terms, implicitly ANDed by FTS5
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def matches(self, tokens):
+        return RawSQL(
+            f'SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s',
+            [self._match(tokens)]
+        )
+
+    def rank(self, tokens):
+        return RawSQL(
+            f'SELECT bm25({SQLITE_TABLE}, {self._WEIGHTS}) FROM {SQLITE_TABLE} '
+            f'WHERE {SQLITE_TABLE} MATCH %s AND rowid = {_BOOK_ID_COLUMN}',
+            [self._match(tokens)],
+            output_field=FloatField()
+        )
+
+
+class LikeSearchBackend(BaseSearchBackend):
+    """Unindexed fallback that matches every token with ``icontains``."""
+
+    def index_books(self, book_ids, book_queryset=None):
+        pass
+
+    def rebuild(self, book_queryset=None):
+        return 0
+
+    def matches(self, tokens):
+        from admin.common.models import Book
+
+        books = Book.objects.all()
+        for token in tokens:
+            books = books.filter(
+                Q(title__icontains=token)
+                | Q(subtitle__icontains=token)
+                | Q(description__icontains=token)
+                | Q(book_authors__author__name__icontains=token)
+                | Q(category__category_name__icontains=token)
+                | Q(publisher__publisher_name__icontains=token)
+            )
+        return Subquery(books.values('id'))
+
+    def rank(self, tokens):
+        return F('title')
+
+
+def backend_for(db_connection):
+    """Pick the search backend supported by ``db_connection``."""
+    if db_connection.vendor == 'postgresql':
+        return PostgresSearchBackend(db_connection)
+    if db_connection.vendor == 'sqlite':
+        with db_connection.cursor() as cursor:
+            tables = db_connection.introspection.table_names(cursor)
+        if SQLITE_TABLE in tables:
+            return SQLiteFTSSearchBackend(db_connection)
+    return LikeSearchBackend(db_connection)
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the process-wide search backend for the default database."""
+    global _backend
+    if _backend is None:
+        _backend = backend_for(connection)
+    return _backend
+
+
+def search_filter(query):
+    """
+    Return a ``Q`` restricting a book queryset to the matches for ``query``.
+    A query without any words matches nothing.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return Q(pk__in=[])
+    return Q(id__in=get_backend().matches(tokens))
+
+
+def search_rank(query):
+    """
+    Return an expression to annotate matching books with that orders them
+    best match first when sorted ascending. Callers break ties themselves,
+    e.g. on the primary key.
+    """
+    return get_backend().rank(tokenize(query))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from catalog_search.backends import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the catalog full-text search index from scratch."
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        indexed = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {indexed} book(s) using {backend.__class__.__name__}."
+        ))
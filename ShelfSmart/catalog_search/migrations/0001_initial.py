@@ -0,0 +1,92 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# The schema as of this migration, written out rather than imported from
+# catalog_search.backends so later changes to the app cannot alter it
+POSTGRES_TABLE = 'book_search_document'
+SQLITE_TABLE = 'book_search_fts'
+
+POSTGRES_FILL_SQL = (
+    f'INSERT INTO {POSTGRES_TABLE} (book_id, document) '
+    'SELECT b.id, '
+    "setweight(to_tsvector('english', coalesce(b.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(an.names, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(b.subtitle, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(c.category_name, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(p.publisher_name, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(b.description, '')), 'D') "
+    'FROM book b '
+    'LEFT JOIN category c ON c.id = b.category_id '
+    'LEFT JOIN publisher p ON p.id = b.publisher_id '
+    "LEFT JOIN (SELECT ba.book_id, string_agg(a.name, ' ') AS names "
+    '           FROM book_author ba JOIN author a ON a.id = ba.author_id '
+    '           GROUP BY ba.book_id) an ON an.book_id = b.id'
+)
+
+SQLITE_FILL_SQL = (
+    f'INSERT INTO {SQLITE_TABLE} '
+    '(rowid, title, subtitle, authors, category, publisher, description) '
+    "SELECT b.id, coalesce(b.title, ''), coalesce(b.subtitle, ''), coalesce(an.names, ''), "
+    "coalesce(c.category_name, ''), coalesce(p.publisher_name, ''), coalesce(b.description, '') "
+    'FROM book b '
+    'LEFT JOIN category c ON c.id = b.category_id '
+    'LEFT JOIN publisher p ON p.id = b.publisher_id '
+    "LEFT JOIN (SELECT ba.book_id, group_concat(a.name, ' ') AS names "
+    '           FROM book_author ba JOIN author a ON a.id = ba.author_id '
+    '           GROUP BY ba.book_id) an ON an.book_id = b.id'
+)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ('
+            '    book_id bigint PRIMARY KEY REFERENCES book (id) ON DELETE CASCADE,'
+            '    document tsvector NOT NULL'
+            ')'
+        )
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_gin ON {POSTGRES_TABLE} USING GIN (document)'
+        )
+        fill_sql = POSTGRES_FILL_SQL
+    elif connection.vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5('
+                'title, subtitle, authors, category, publisher, description, '
+                "tokenize = 'unicode61 remove_diacritics 2'"
+                ')'
+            )
+        except OperationalError:
+            # SQLite compiled without FTS5; search falls back to LIKE matching
+            return
+        fill_sql = SQLITE_FILL_SQL
+    else:
+        return
+
+    # Index the existing catalog
+    schema_editor.execute(fill_sql)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {POSTGRES_TABLE}')
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SQLITE_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('common', '0006_borrowrecord_renewal_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,5 @@
+from django.db import models
+
+# The search index lives in vendor-specific tables created by
+# migrations/0001_initial.py (a tsvector table on PostgreSQL, an FTS5 virtual
+# table on SQLite), so there are no Django models here.
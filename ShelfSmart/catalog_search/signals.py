@@ -0,0 +1,67 @@
+"""
+Keep the catalog search index fresh.
+
+Saving or deleting a book, or changing its authors, re-indexes only the books
+involved once the surrounding transaction commits, so the index never needs a
+full rebuild during normal use. Renaming an author, category or publisher
+re-indexes the books that carry that name.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from admin.common.models import Author, Book, BookAuthor, Category, Publisher
+
+from .backends import get_backend
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_reindex(book_ids):
+    """Re-index ``book_ids`` after the current transaction commits."""
+    book_ids = list(book_ids)
+    if not book_ids:
+        return
+
+    def _reindex():
+        try:
+            get_backend().index_books(book_ids)
+        except Exception:
+            # Never fail the write that triggered this; a rebuild fixes drift
+            logger.exception("Failed to update search index for books %s", book_ids)
+
+    transaction.on_commit(_reindex)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def reindex_book(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_reindex([instance.pk])
+
+
+@receiver(post_save, sender=BookAuthor)
+@receiver(post_delete, sender=BookAuthor)
+def reindex_book_authors(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_reindex([instance.book_id])
+
+
+@receiver(post_save, sender=Author)
+def reindex_author_books(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    schedule_reindex(instance.book_authors.values_list('book_id', flat=True))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Publisher)
+def reindex_related_books(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    schedule_reindex(instance.books.values_list('id', flat=True))
@@ -1,3 +1,12 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import NotificationDelivery
+
+
+@admin.register(NotificationDelivery)
+class NotificationDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("borrow_record", "kind", "bucket", "status", "digest", "recipient", "updated_at")
+    list_filter = ("status", "kind", "digest", "bucket")
+    search_fields = ("recipient", "borrow_record__user__username", "borrow_record__book__title")
+    readonly_fields = ("borrow_record", "kind", "bucket", "status", "digest", "recipient", "error",
+                       "created_at", "updated_at")
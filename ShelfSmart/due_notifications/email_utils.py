@@ -1,15 +1,126 @@
 """Email notification utilities for due and overdue book reminders"""
 
+import uuid
+from collections import defaultdict
 from datetime import date, timedelta
-from typing import List, Dict, Any
-from django.core.mail import send_mail
+from itertools import groupby
+from typing import List, Dict, Any, Optional, Tuple
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, CharField, Exists, OuterRef, Q, QuerySet, Value, When
+from django.utils import timezone
 from admin.common.models import BorrowRecord
+from .models import NotificationDelivery
 import logging
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Emails sent over one SMTP connection before it is closed and reopened
+EMAIL_BATCH_SIZE = getattr(settings, 'NOTIFICATION_EMAIL_BATCH_SIZE', 50)
+
+# Loans fetched per database round trip by the scheduled sender
+SCHEDULE_CHUNK_SIZE = 2000
+
+# A ``sending`` claim older than this is assumed to belong to a run that died
+CLAIM_TIMEOUT_SECONDS = getattr(settings, 'NOTIFICATION_CLAIM_TIMEOUT', 3600)
+
+# A built message (None if it cannot be sent), its result details and the
+# (borrow record, notification kind) pairs it covers
+PendingEntry = Tuple[Optional[EmailMessage], Dict[str, Any], List[Tuple[BorrowRecord, str]]]
+
+
+def build_due_reminder_message(user_email: str, user_name: str, book_title: str,
+                               due_date: date) -> EmailMessage:
+    """
+    Build (but do not send) the reminder email for a book that is due soon.
+    """
+    days_until_due = (due_date - date.today()).days
+    
+    subject = "ShelfSmart - Book Due Soon Reminder"
+    message = (
+        f"Hello {user_name},\n\n"
+        f"This is a friendly reminder that the book \"{book_title}\" is due in {days_until_due} day(s).\n\n"
+        f"Due Date: {due_date.strftime('%B %d, %Y')}\n\n"
+        "Please return the book on or before the due date to avoid any penalties.\n\n"
+        "Thank you for using ShelfSmart!\n\n"
+        "Best regards,\n"
+        "ShelfSmart Library Team"
+    )
+    return EmailMessage(subject=subject, body=message, to=[user_email])
+
+
+def build_overdue_notification_message(user_email: str, user_name: str, book_title: str,
+                                       due_date: date, days_overdue: int) -> EmailMessage:
+    """
+    Build (but do not send) the notice email for an overdue book.
+    """
+    subject = "ShelfSmart - Overdue Book Notice"
+    message = (
+        f"Hello {user_name},\n\n"
+        f"This is a notice that the book \"{book_title}\" is now overdue.\n\n"
+        f"Due Date: {due_date.strftime('%B %d, %Y')}\n"
+        f"Days Overdue: {days_overdue} day(s)\n\n"
+        "Please return the book as soon as possible to avoid further penalties. "
+        "Late returns may affect your borrowing privileges.\n\n"
+        "If you have already returned the book, please disregard this message.\n\n"
+        "Thank you for your prompt attention to this matter.\n\n"
+        "Best regards,\n"
+        "ShelfSmart Library Team"
+    )
+    return EmailMessage(subject=subject, body=message, to=[user_email])
+
+
+def build_digest_message(user_email: str, user_name: str, overdue_records: List[BorrowRecord],
+                         due_soon_records: List[BorrowRecord]) -> EmailMessage:
+    """
+    Build (but do not send) one email listing all of a user's overdue and
+    due-soon books.
+    """
+    today = date.today()
+    lines = [f"Hello {user_name},\n"]
+    
+    if overdue_records:
+        lines.append("The following book(s) are overdue:\n")
+        for record in overdue_records:
+            days_overdue = (today - record.due_date).days
+            lines.append(
+                f"  - \"{record.book.title}\" - due {record.due_date.strftime('%B %d, %Y')} "
+                f"({days_overdue} day(s) overdue)"
+            )
+        lines.append(
+            "\nPlease return them as soon as possible to avoid further penalties. "
+            "Late returns may affect your borrowing privileges.\n"
+        )
+    
+    if due_soon_records:
+        lines.append("The following book(s) are due soon:\n")
+        for record in due_soon_records:
+            days_until_due = (record.due_date - today).days
+            lines.append(
+                f"  - \"{record.book.title}\" - due {record.due_date.strftime('%B %d, %Y')} "
+                f"(in {days_until_due} day(s))"
+            )
+        lines.append("\nPlease return them on or before their due dates to avoid any penalties.\n")
+    
+    lines.append(
+        "If you have already returned a book, please disregard it.\n\n"
+        "Thank you for using ShelfSmart!\n\n"
+        "Best regards,\n"
+        "ShelfSmart Library Team"
+    )
+    
+    if overdue_records:
+        subject = f"ShelfSmart - {len(overdue_records)} Overdue Book(s)"
+        if due_soon_records:
+            subject += f" and {len(due_soon_records)} Due Soon"
+    else:
+        subject = f"ShelfSmart - {len(due_soon_records)} Book(s) Due Soon"
+    
+    return EmailMessage(subject=subject, body="\n".join(lines), to=[user_email])
+
 
 def send_due_reminder_email(user_email: str, user_name: str, book_title: str, due_date: date) -> bool:
     """
@@ -29,26 +140,7 @@ def send_due_reminder_email(user_email: str, user_name: str, book_title: str, du
         return False
     
     try:
-        days_until_due = (due_date - date.today()).days
-        
-        subject = "ShelfSmart - Book Due Soon Reminder"
-        message = (
-            f"Hello {user_name},\n\n"
-            f"This is a friendly reminder that the book \"{book_title}\" is due in {days_until_due} day(s).\n\n"
-            f"Due Date: {due_date.strftime('%B %d, %Y')}\n\n"
-            "Please return the book on or before the due date to avoid any penalties.\n\n"
-            "Thank you for using ShelfSmart!\n\n"
-            "Best regards,\n"
-            "ShelfSmart Library Team"
-        )
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=None,
-            recipient_list=[user_email],
-            fail_silently=False
-        )
+        build_due_reminder_message(user_email, user_name, book_title, due_date).send(fail_silently=False)
         
         logger.info(f"Due reminder sent to {user_email} for book '{book_title}'")
         return True
@@ -78,27 +170,9 @@ def send_overdue_notification_email(user_email: str, user_name: str, book_title:
         return False
     
     try:
-        subject = "ShelfSmart - Overdue Book Notice"
-        message = (
-            f"Hello {user_name},\n\n"
-            f"This is a notice that the book \"{book_title}\" is now overdue.\n\n"
-            f"Due Date: {due_date.strftime('%B %d, %Y')}\n"
-            f"Days Overdue: {days_overdue} day(s)\n\n"
-            "Please return the book as soon as possible to avoid further penalties. "
-            "Late returns may affect your borrowing privileges.\n\n"
-            "If you have already returned the book, please disregard this message.\n\n"
-            "Thank you for your prompt attention to this matter.\n\n"
-            "Best regards,\n"
-            "ShelfSmart Library Team"
-        )
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=None,
-            recipient_list=[user_email],
-            fail_silently=False
-        )
+        build_overdue_notification_message(
+            user_email, user_name, book_title, due_date, days_overdue
+        ).send(fail_silently=False)
         
         logger.info(f"Overdue notification sent to {user_email} for book '{book_title}'")
         return True
@@ -108,12 +182,147 @@ def send_overdue_notification_email(user_email: str, user_name: str, book_title:
         return False
 
 
-def get_due_soon_records(days_threshold: int = 3) -> List[BorrowRecord]:
+def deliver_messages(email_messages: List[EmailMessage],
+                     batch_size: Optional[int] = None) -> List[Optional[str]]:
+    """
+    Send ``email_messages`` over one reused mail connection per batch.
+    
+    Each batch opens a single SMTP (TLS) session and sends every message in
+    it before closing, instead of one session per email. Messages are handed
+    to the connection one at a time so each outcome is known; if a send
+    fails the connection is recycled and delivery carries on with the next
+    message.
+    
+    Args:
+        email_messages: Messages to send
+        batch_size: Messages per connection (default: NOTIFICATION_EMAIL_BATCH_SIZE)
+    
+    Returns:
+        A list parallel to ``email_messages``: None for each message that was
+        sent, or the error text for each one that was not
+    """
+    batch_size = max(1, batch_size or EMAIL_BATCH_SIZE)
+    errors: List[Optional[str]] = []
+    
+    for start in range(0, len(email_messages), batch_size):
+        batch = email_messages[start:start + batch_size]
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            logger.error(f"Could not open mail connection: {str(e)}")
+            errors.extend([str(e)] * len(batch))
+            continue
+        
+        try:
+            for message in batch:
+                message.connection = connection
+                try:
+                    sent = connection.send_messages([message])
+                    errors.append(None if sent else "Message was not accepted for delivery")
+                except Exception as e:
+                    logger.error(f"Failed to send email to {', '.join(message.to)}: {str(e)}")
+                    errors.append(str(e))
+                    # The session may be unusable after an SMTP error
+                    connection.close()
+                    connection.open()
+        except Exception as e:
+            # Reconnecting failed: nothing else in this batch can go out
+            logger.error(f"Mail connection lost: {str(e)}")
+            errors.extend([str(e)] * (len(batch) - (len(errors) - start)))
+        finally:
+            connection.close()
+    
+    return errors
+
+
+def _exclude_delivered(records: QuerySet, kind) -> QuerySet:
+    """
+    Drop records that already have a sent notification of ``kind`` today,
+    as a ``NOT EXISTS`` anti-join in the same query. ``kind`` may also be an
+    expression over the record, e.g. ``OuterRef('notification_kind')``.
+    """
+    delivered = NotificationDelivery.objects.filter(
+        borrow_record=OuterRef('pk'),
+        kind=kind,
+        bucket=NotificationDelivery.current_bucket(),
+        status=NotificationDelivery.SENT
+    )
+    return records.filter(~Exists(delivered))
+
+
+def record_deliveries(deliveries: List[NotificationDelivery]) -> None:
+    """
+    Write delivery outcomes to the ledger in one statement, updating the
+    row of an earlier failed attempt on the same day.
+    """
+    if not deliveries:
+        return
+    NotificationDelivery.objects.bulk_create(
+        deliveries,
+        update_conflicts=True,
+        unique_fields=['borrow_record', 'kind', 'bucket'],
+        update_fields=['status', 'digest', 'recipient', 'error', 'updated_at'],
+    )
+
+
+def claim_deliveries(covered: List[Tuple[BorrowRecord, str]], bucket: date) -> set:
+    """
+    Claim today's ledger rows for the ``(borrow record, kind)`` pairs in
+    ``covered`` before anything is sent, and return the ``(record id, kind)``
+    pairs this run now owns.
+    
+    New rows are inserted as ``sending`` under the unique constraint, so
+    when two runs overlap only one of them gets each row. Rows of earlier
+    failed attempts, and claims left by a run that died, are taken over with
+    a conditional ``UPDATE``.
+    """
+    if not covered:
+        return set()
+    
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    record_ids_by_kind = defaultdict(set)
+    for record, kind in covered:
+        record_ids_by_kind[kind].add(record.pk)
+    rows = NotificationDelivery.objects.filter(bucket=bucket)
+    
+    with transaction.atomic():
+        NotificationDelivery.objects.bulk_create(
+            [
+                NotificationDelivery(
+                    borrow_record=record, kind=kind, bucket=bucket,
+                    status=NotificationDelivery.SENDING, claim=token
+                )
+                for record, kind in covered
+            ],
+            ignore_conflicts=True,
+        )
+        takeover = Q(status=NotificationDelivery.FAILED) | Q(
+            status=NotificationDelivery.SENDING,
+            updated_at__lt=now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)
+        )
+        for kind, record_ids in record_ids_by_kind.items():
+            rows.filter(takeover, kind=kind, borrow_record_id__in=record_ids).update(
+                status=NotificationDelivery.SENDING, claim=token, updated_at=now
+            )
+    
+    owned = set()
+    for kind, record_ids in record_ids_by_kind.items():
+        owned.update(
+            rows.filter(claim=token, kind=kind, borrow_record_id__in=record_ids)
+            .values_list('borrow_record_id', 'kind')
+        )
+    return owned
+
+
+def get_due_soon_records(days_threshold: int = 3, exclude_delivered: bool = False) -> List[BorrowRecord]:
     """
     Get borrow records for books that are due soon (within the threshold).
     
     Args:
         days_threshold: Number of days to consider as "due soon" (default: 3)
+        exclude_delivered: Leave out records already reminded today
     
     Returns:
         List of BorrowRecord objects that are due soon
@@ -125,15 +334,21 @@ def get_due_soon_records(days_threshold: int = 3) -> List[BorrowRecord]:
         is_returned=False,
         due_date__gte=today,
         due_date__lte=threshold_date
-    ).select_related('book')
+    ).select_related('user', 'book')
+    
+    if exclude_delivered:
+        due_soon = _exclude_delivered(due_soon, NotificationDelivery.DUE_SOON)
     
     return list(due_soon)
 
 
-def get_overdue_records() -> List[BorrowRecord]:
+def get_overdue_records(exclude_delivered: bool = False) -> List[BorrowRecord]:
     """
     Get borrow records for books that are overdue.
     
+    Args:
+        exclude_delivered: Leave out records already notified today
+    
     Returns:
         List of BorrowRecord objects that are overdue
     """
@@ -142,144 +357,371 @@ def get_overdue_records() -> List[BorrowRecord]:
     overdue = BorrowRecord.objects.filter(
         is_returned=False,
         due_date__lt=today
-    ).select_related('book')
+    ).select_related('user', 'book')
+    
+    if exclude_delivered:
+        overdue = _exclude_delivered(overdue, NotificationDelivery.OVERDUE)
     
     return list(overdue)
 
 
-def send_bulk_due_reminders(days_threshold: int = 3) -> Dict[str, Any]:
+def send_bulk_due_reminders(days_threshold: int = 3, digest: bool = False) -> Dict[str, Any]:
     """
-    Send due reminders to all users with books due soon.
+    Send due reminders to all users with books due soon, skipping the
+    ones already reminded today (see NotificationDelivery).
     
     Args:
         days_threshold: Number of days to consider as "due soon" (default: 3)
+        digest: Send one email per user listing all their books instead of
+            one email per book (see send_notification_digests)
     
     Returns:
         Dictionary with success count, failure count, and details
     """
-    due_soon_records = get_due_soon_records(days_threshold)
+    if digest:
+        return send_notification_digests(days_threshold, include_overdue=False)
     
-    success_count = 0
-    failure_count = 0
-    details = []
+    due_soon_records = get_due_soon_records(days_threshold, exclude_delivered=True)
     
-    for record in due_soon_records:
-        try:
-            user = User.objects.get(id=record.user_id)
-            
-            success = send_due_reminder_email(
-                user_email=user.email,
-                user_name=user.get_full_name(),
-                book_title=record.book.title,
-                due_date=record.due_date
-            )
-            
-            if success:
-                success_count += 1
-                details.append({
-                    'user': user.username,
-                    'book': record.book.title,
-                    'status': 'success'
-                })
-            else:
-                failure_count += 1
-                details.append({
-                    'user': user.username,
-                    'book': record.book.title,
-                    'status': 'failed'
-                })
-                
-        except User.DoesNotExist:
-            failure_count += 1
-            details.append({
-                'user_id': record.user_id,
-                'book': record.book.title,
-                'status': 'user_not_found'
-            })
-            logger.warning(f"User {record.user_id} not found for borrow record")
-        except Exception as e:
-            failure_count += 1
-            details.append({
-                'user_id': record.user_id,
-                'book': record.book.title,
-                'status': 'error',
-                'error': str(e)
-            })
-            logger.error(f"Error sending due reminder: {str(e)}")
+    pending = [_due_reminder_entry(record) for record in due_soon_records]
     
-    return {
-        'total': len(due_soon_records),
-        'success': success_count,
-        'failure': failure_count,
-        'details': details
-    }
+    return _deliver_pending(pending, "due reminder")
 
 
-def send_bulk_overdue_notifications() -> Dict[str, Any]:
+def send_bulk_overdue_notifications(digest: bool = False) -> Dict[str, Any]:
     """
-    Send overdue notifications to all users with overdue books.
+    Send overdue notifications to all users with overdue books, skipping
+    the ones already notified today (see NotificationDelivery).
+    
+    Args:
+        digest: Send one email per user listing all their books instead of
+            one email per book (see send_notification_digests)
     
     Returns:
         Dictionary with success count, failure count, and details
     """
-    overdue_records = get_overdue_records()
+    if digest:
+        return send_notification_digests(include_due_soon=False)
+    
+    overdue_records = get_overdue_records(exclude_delivered=True)
+    today = date.today()
+    
+    pending = [_overdue_notification_entry(record, today) for record in overdue_records]
+    
+    return _deliver_pending(pending, "overdue notification")
+
+
+def _due_reminder_entry(record: BorrowRecord) -> PendingEntry:
+    """Build the pending entry for one due-soon loan (see _deliver_pending)."""
+    user = record.user
+    detail = {
+        'user': user.username,
+        'book': record.book.title,
+    }
+    message = None
+    if user.email:
+        message = build_due_reminder_message(
+            user_email=user.email,
+            user_name=user.get_full_name(),
+            book_title=record.book.title,
+            due_date=record.due_date
+        )
+    else:
+        logger.warning(f"No email address for user {user.get_full_name()}")
+    return message, detail, [(record, NotificationDelivery.DUE_SOON)]
+
+
+def _overdue_notification_entry(record: BorrowRecord, today: date) -> PendingEntry:
+    """Build the pending entry for one overdue loan (see _deliver_pending)."""
+    user = record.user
+    days_overdue = (today - record.due_date).days
+    detail = {
+        'user': user.username,
+        'book': record.book.title,
+        'days_overdue': days_overdue,
+    }
+    message = None
+    if user.email:
+        message = build_overdue_notification_message(
+            user_email=user.email,
+            user_name=user.get_full_name(),
+            book_title=record.book.title,
+            due_date=record.due_date,
+            days_overdue=days_overdue
+        )
+    else:
+        logger.warning(f"No email address for user {user.get_full_name()}")
+    return message, detail, [(record, NotificationDelivery.OVERDUE)]
+
+
+def _digest_entry(user: User, user_records: List[BorrowRecord], today: date) -> PendingEntry:
+    """Build the pending digest entry for one user's loans (see _deliver_pending)."""
+    overdue = [record for record in user_records if record.due_date < today]
+    due_soon = [record for record in user_records if record.due_date >= today]
+    detail = {
+        'user': user.username,
+        'books': [record.book.title for record in user_records],
+        'overdue': len(overdue),
+        'due_soon': len(due_soon),
+    }
+    message = None
+    if user.email:
+        message = build_digest_message(
+            user_email=user.email,
+            user_name=user.get_full_name(),
+            overdue_records=overdue,
+            due_soon_records=due_soon
+        )
+    else:
+        logger.warning(f"No email address for user {user.get_full_name()}")
+    deliveries = (
+        [(record, NotificationDelivery.OVERDUE) for record in overdue]
+        + [(record, NotificationDelivery.DUE_SOON) for record in due_soon]
+    )
+    return message, detail, deliveries
+
+
+def get_notification_records(days_threshold: int = 3, include_due_soon: bool = True,
+                             include_overdue: bool = True, exclude_delivered: bool = False) -> QuerySet:
+    """
+    Queryset of the open loans that are overdue and/or due soon, with their
+    user and book, ordered by user and due date.
+    
+    Args:
+        days_threshold: Number of days to consider as "due soon" (default: 3)
+        include_due_soon: Include loans due within the threshold
+        include_overdue: Include loans past their due date
+        exclude_delivered: Leave out loans already notified today
+    
+    Returns:
+        QuerySet of BorrowRecord objects grouped by user
+    """
     today = date.today()
+    records = BorrowRecord.objects.filter(is_returned=False)
+    
+    if include_overdue and include_due_soon:
+        records = records.filter(due_date__lte=today + timedelta(days=days_threshold))
+    elif include_overdue:
+        records = records.filter(due_date__lt=today)
+    elif include_due_soon:
+        records = records.filter(due_date__gte=today, due_date__lte=today + timedelta(days=days_threshold))
+    else:
+        return records.none()
+    
+    if exclude_delivered:
+        # Whether a loan counts as overdue or due soon decides which
+        # earlier delivery it is matched against
+        records = records.annotate(notification_kind=Case(
+            When(due_date__lt=today, then=Value(NotificationDelivery.OVERDUE)),
+            default=Value(NotificationDelivery.DUE_SOON),
+            output_field=CharField()
+        ))
+        records = _exclude_delivered(records, OuterRef('notification_kind'))
+    
+    return records.select_related('user', 'book').order_by('user_id', 'due_date', 'id')
+
+
+def get_digest_records(days_threshold: int = 3, include_due_soon: bool = True,
+                       include_overdue: bool = True, exclude_delivered: bool = False) -> List[BorrowRecord]:
+    """
+    Get the open loans to include in digests in a single query
+    (see get_notification_records).
+    
+    Returns:
+        List of BorrowRecord objects grouped by user
+    """
+    return list(get_notification_records(days_threshold, include_due_soon, include_overdue, exclude_delivered))
+
+
+def send_notification_digests(days_threshold: int = 3, include_due_soon: bool = True,
+                              include_overdue: bool = True) -> Dict[str, Any]:
+    """
+    Send each affected user a single email listing all of their overdue
+    and/or due-soon books, instead of one email per book. Books the user
+    was already notified about today are left out.
+    
+    Args:
+        days_threshold: Number of days to consider as "due soon" (default: 3)
+        include_due_soon: Include loans due within the threshold
+        include_overdue: Include loans past their due date
+    
+    Returns:
+        Dictionary with per-user (per-email) success count, failure count and
+        details, plus the same counts per borrow record under 'records'
+    """
+    today = date.today()
+    records = get_digest_records(days_threshold, include_due_soon, include_overdue, exclude_delivered=True)
+    
+    pending = [
+        _digest_entry(user, list(user_records), today)
+        for user, user_records in groupby(records, key=lambda record: record.user)
+    ]
+    
+    result = _deliver_pending(pending, "notification digest", digest=True)
+    
+    delivered_records = sum(
+        len(detail['books']) for detail in result['details'] if detail['status'] == 'success'
+    )
+    skipped_records = sum(
+        len(detail['books']) for detail in result['details'] if detail['status'] == 'skipped'
+    )
+    result['records'] = {
+        'total': len(records) - skipped_records,
+        'success': delivered_records,
+        'failure': len(records) - skipped_records - delivered_records,
+    }
+    return result
+
+
+def send_scheduled_notifications(days_threshold: int = 3, digest: bool = False,
+                                 chunk_size: int = SCHEDULE_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Send every due reminder and overdue notice that has not gone out today.
+    
+    Meant to be run unattended (see ``manage.py send_scheduled_notifications``).
+    Overdue and due-soon loans are read in one query, streamed in chunks of
+    ``chunk_size`` rows and delivered one mail batch at a time, so memory
+    use does not grow with the number of open loans. Running it again on
+    the same day only retries what failed.
+    
+    Args:
+        days_threshold: Number of days to consider as "due soon" (default: 3)
+        digest: Send one email per user listing all their books
+        chunk_size: Loans fetched from the database per round trip
+    
+    Returns:
+        Counts (no per-email details) under 'emails' and per borrow record
+        under 'records', each with 'total', 'success' and 'failure'
+    """
+    today = date.today()
+    records = get_notification_records(days_threshold, exclude_delivered=True).iterator(chunk_size=chunk_size)
+    
+    if digest:
+        # Records arrive ordered by user, so each group is one user's loans
+        entries = (
+            _digest_entry(user_records[0].user, user_records, today)
+            for user_records in (
+                list(group) for _, group in groupby(records, key=lambda record: record.user_id)
+            )
+        )
+        kind = "notification digest"
+    else:
+        entries = (
+            _overdue_notification_entry(record, today) if record.due_date < today
+            else _due_reminder_entry(record)
+            for record in records
+        )
+        kind = "scheduled notification"
+    
+    emails = {'total': 0, 'success': 0, 'failure': 0}
+    covered = {'total': 0, 'success': 0, 'failure': 0}
+    
+    def deliver(pending):
+        result = _deliver_pending(pending, kind, digest=digest)
+        for (_, _, deliveries), detail in zip(pending, result['details']):
+            if detail['status'] == 'skipped':
+                continue  # sent by an overlapping run
+            outcome = 'success' if detail['status'] == 'success' else 'failure'
+            emails['total'] += 1
+            emails[outcome] += 1
+            covered['total'] += len(deliveries)
+            covered[outcome] += len(deliveries)
+    
+    # Deliver one mail batch at a time instead of building every message first
+    pending = []
+    for entry in entries:
+        pending.append(entry)
+        if len(pending) >= EMAIL_BATCH_SIZE:
+            deliver(pending)
+            pending = []
+    if pending:
+        deliver(pending)
+    
+    return {'emails': emails, 'records': covered}
+
+
+def _deliver_pending(pending: List[PendingEntry],
+                     kind: str, digest: bool = False) -> Dict[str, Any]:
+    """
+    Claim the entries in the delivery ledger, deliver the built messages in
+    batches, account for every entry and record the outcome of each.
+    
+    ``pending`` pairs each message (None if it could not be built, e.g. the
+    user has no email address) with its result details and the
+    ``(borrow record, notification kind)`` pairs it covers. Entries another
+    run has claimed are not sent and are reported as ``skipped``.
+    """
+    bucket = NotificationDelivery.current_bucket()
+    owned = claim_deliveries([pair for _, _, covered in pending for pair in covered], bucket)
+    claimed = [
+        all((record.pk, kind) in owned for record, kind in covered)
+        for _, _, covered in pending
+    ]
+    
+    email_messages = [
+        message for (message, _, _), mine in zip(pending, claimed)
+        if message is not None and mine
+    ]
+    errors = iter(deliver_messages(email_messages))
     
     success_count = 0
     failure_count = 0
+    skipped_count = 0
     details = []
+    deliveries = []
     
-    for record in overdue_records:
-        try:
-            user = User.objects.get(id=record.user_id)
-            days_overdue = (today - record.due_date).days
-            
-            success = send_overdue_notification_email(
-                user_email=user.email,
-                user_name=user.get_full_name(),
-                book_title=record.book.title,
-                due_date=record.due_date,
-                days_overdue=days_overdue
+    for (message, detail, covered), mine in zip(pending, claimed):
+        if not mine:
+            # Being sent by an overlapping run. Rows of a digest this run
+            # claimed only partly are released for the next send to retry.
+            skipped_count += 1
+            details.append({**detail, 'status': 'skipped'})
+            deliveries.extend(
+                NotificationDelivery(
+                    borrow_record=record,
+                    kind=notification_kind,
+                    bucket=bucket,
+                    status=NotificationDelivery.FAILED,
+                    digest=digest,
+                    error="Part of the message was claimed by another run"
+                )
+                for record, notification_kind in covered
+                if (record.pk, notification_kind) in owned
             )
-            
-            if success:
+            continue
+        if message is None:
+            failure_count += 1
+            details.append({**detail, 'status': 'failed'})
+            error = "No email address"
+        else:
+            error = next(errors)
+            if error is None:
                 success_count += 1
-                details.append({
-                    'user': user.username,
-                    'book': record.book.title,
-                    'days_overdue': days_overdue,
-                    'status': 'success'
-                })
+                details.append({**detail, 'status': 'success'})
+                logger.info(f"{kind.capitalize()} sent to {message.to[0]}")
             else:
                 failure_count += 1
-                details.append({
-                    'user': user.username,
-                    'book': record.book.title,
-                    'days_overdue': days_overdue,
-                    'status': 'failed'
-                })
-                
-        except User.DoesNotExist:
-            failure_count += 1
-            details.append({
-                'user_id': record.user_id,
-                'book': record.book.title,
-                'status': 'user_not_found'
-            })
-            logger.warning(f"User {record.user_id} not found for borrow record")
-        except Exception as e:
-            failure_count += 1
-            details.append({
-                'user_id': record.user_id,
-                'book': record.book.title,
-                'status': 'error',
-                'error': str(e)
-            })
-            logger.error(f"Error sending overdue notification: {str(e)}")
+                details.append({**detail, 'status': 'error', 'error': error})
+        
+        deliveries.extend(
+            NotificationDelivery(
+                borrow_record=record,
+                kind=notification_kind,
+                bucket=bucket,
+                status=NotificationDelivery.SENT if error is None else NotificationDelivery.FAILED,
+                digest=digest,
+                recipient=message.to[0] if message is not None else '',
+                error=error or ''
+            )
+            for record, notification_kind in covered
+        )
+    
+    record_deliveries(deliveries)
     
     return {
-        'total': len(overdue_records),
+        'total': len(pending),
         'success': success_count,
         'failure': failure_count,
+        'skipped': skipped_count,
         'details': details
     }
@@ -0,0 +1,87 @@
+import argparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from due_notifications.email_utils import (
+    SCHEDULE_CHUNK_SIZE,
+    get_notification_records,
+    send_scheduled_notifications,
+)
+from settings.models import AppSettings
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the due reminders and overdue notices that have not gone out "
+        "today. Safe to run from cron as often as needed: loans already "
+        "notified today are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days-threshold',
+            type=int,
+            default=3,
+            help="Days before the due date to send a reminder (default: 3)."
+        )
+        parser.add_argument(
+            '--digest',
+            action=argparse.BooleanOptionalAction,
+            default=None,
+            help="Send one email per borrower (default: the NOTIFICATION_DIGEST setting)."
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=SCHEDULE_CHUNK_SIZE,
+            help=f"Loans read from the database at a time (default: {SCHEDULE_CHUNK_SIZE})."
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only count the loans that would be notified."
+        )
+
+    def handle(self, *args, **options):
+        days_threshold = options['days_threshold']
+        if days_threshold < 0:
+            raise CommandError("--days-threshold cannot be negative")
+        chunk_size = max(1, options['chunk_size'])
+        digest = options['digest']
+        if digest is None:
+            digest = getattr(settings, 'NOTIFICATION_DIGEST', False)
+
+        if not AppSettings.get_settings().email_notifications:
+            self.stdout.write("Email notifications are turned off in the app settings; nothing sent.")
+            return
+
+        if options['dry_run']:
+            counts = dict(
+                get_notification_records(days_threshold, exclude_delivered=True)
+                .order_by().values_list('notification_kind').annotate(count=Count('id'))
+            )
+            self.stdout.write(
+                f"Would notify {counts.get('overdue', 0)} overdue and "
+                f"{counts.get('due_soon', 0)} due-soon loan(s)."
+            )
+            return
+
+        result = send_scheduled_notifications(days_threshold, digest=digest, chunk_size=chunk_size)
+        emails, records = result['emails'], result['records']
+
+        if not records['total']:
+            self.stdout.write("Nothing to send.")
+            return
+
+        summary = (
+            f"Sent {emails['success']} of {emails['total']} email(s) "
+            f"covering {records['success']} of {records['total']} loan(s)."
+        )
+        if emails['failure']:
+            self.stdout.write(self.style.WARNING(
+                f"{summary} {emails['failure']} failed and will be retried on the next run."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('common', '0009_borrowrecord_loan_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('due_soon', 'Due soon'), ('overdue', 'Overdue')], max_length=20)),
+                ('bucket', models.DateField(help_text='Day the notification covers; at most one is sent per day')),
+                ('status', models.CharField(choices=[('sent', 'Sent'), ('failed', 'Failed')], max_length=20)),
+                ('digest', models.BooleanField(default=False, help_text='Sent as part of a per-user digest')),
+                ('recipient', models.EmailField(blank=True, max_length=254)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('borrow_record', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_deliveries', to='common.borrowrecord')),
+            ],
+            options={
+                'verbose_name': 'Notification Delivery',
+                'verbose_name_plural': 'Notification Deliveries',
+                'ordering': ['-updated_at', '-id'],
+                'indexes': [models.Index(fields=['bucket', 'status'], name='delivery_bucket_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('borrow_record', 'kind', 'bucket'), name='unique_delivery_per_record_kind_day')],
+            },
+        ),
+    ]
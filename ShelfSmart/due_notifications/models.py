@@ -1,3 +1,69 @@
+from datetime import date
+
 from django.db import models
 
-# Create your models here.
+from admin.common.models import BorrowRecord
+
+
+class NotificationDelivery(models.Model):
+    """
+    Ledger of reminder emails, one row per borrow record, kind and day.
+
+    The bulk senders skip records that already have a ``sent`` row for
+    today, so sending twice in a day does not email anyone twice. Before
+    sending, a run claims its rows as ``sending`` under the unique
+    constraint, so two overlapping runs never email the same loan. Failed
+    attempts are recorded too and are retried by the next send.
+    """
+    DUE_SOON = 'due_soon'
+    OVERDUE = 'overdue'
+    KIND_CHOICES = [
+        (DUE_SOON, 'Due soon'),
+        (OVERDUE, 'Overdue'),
+    ]
+
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    borrow_record = models.ForeignKey(
+        BorrowRecord,
+        on_delete=models.CASCADE,
+        related_name='notification_deliveries'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    bucket = models.DateField(help_text="Day the notification covers; at most one is sent per day")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    digest = models.BooleanField(default=False, help_text="Sent as part of a per-user digest")
+    recipient = models.EmailField(blank=True)
+    error = models.TextField(blank=True)
+    claim = models.CharField(max_length=32, blank=True, help_text="Run that claimed the row for sending")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-updated_at', '-id']
+        verbose_name = "Notification Delivery"
+        verbose_name_plural = "Notification Deliveries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['borrow_record', 'kind', 'bucket'],
+                name='unique_delivery_per_record_kind_day'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['bucket', 'status'], name='delivery_bucket_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for loan #{self.borrow_record_id} on {self.bucket}: {self.status}"
+
+    @staticmethod
+    def current_bucket():
+        """The bucket deliveries made now are recorded under."""
+        return date.today()
@@ -0,0 +1,15 @@
+"""Background tasks for due and overdue reminders (run by ``manage.py run_worker``)"""
+
+from job_queue.queue import task
+
+from .email_utils import send_bulk_due_reminders, send_bulk_overdue_notifications
+
+
+@task
+def send_due_reminders(days_threshold: int = 3, digest: bool = False):
+    return send_bulk_due_reminders(days_threshold, digest=digest)
+
+
+@task
+def send_overdue_notifications(digest: bool = False):
+    return send_bulk_overdue_notifications(digest=digest)
@@ -6,4 +6,5 @@ app_name = 'due_notifications'
 urlpatterns = [
     path('send-due-reminders/', views.send_due_reminders, name='send_due_reminders'),
     path('send-overdue-notifications/', views.send_overdue_notifications, name='send_overdue_notifications'),
+    path('history/', views.delivery_history, name='delivery_history'),
 ]
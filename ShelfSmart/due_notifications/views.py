@@ -1,18 +1,33 @@
-from django.shortcuts import redirect
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.shortcuts import redirect, render
 from django.contrib import messages
 from django.http import JsonResponse, HttpRequest, HttpResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_date
 from user_auth.decorators import admin_required
 import logging
 
-from .email_utils import send_bulk_due_reminders, send_bulk_overdue_notifications
+from admin.catalog_management.views import get_current_user_info
+from job_queue.models import Job
+from job_queue.queue import enqueue
+
+from . import tasks
+from .models import NotificationDelivery
 
 logger = logging.getLogger(__name__)
 
+# Rows per page in the delivery history
+DELIVERY_PAGE_SIZE = 25
+
 
 @admin_required
 def send_due_reminders(request: HttpRequest) -> HttpResponse:
     """
     Admin action to send due reminders to users with books due soon.
+    
+    The emails are sent by the background worker; the response carries the
+    job id, which the page polls through the job status endpoint.
     """
     if request.method != "POST":
         messages.error(request, "Invalid request method.")
@@ -22,43 +37,24 @@ def send_due_reminders(request: HttpRequest) -> HttpResponse:
         # Get days threshold from POST data, default to 3 days
         days_threshold = int(request.POST.get("days_threshold", 3))
         
-        # Send bulk due reminders
-        result = send_bulk_due_reminders(days_threshold)
-        
-        # Prepare success message
-        if result['success'] > 0:
-            messages.success(
-                request,
-                f"Successfully sent {result['success']} due reminder(s) out of {result['total']} eligible borrower(s)."
-            )
-        
-        # Add warning if there were failures
-        if result['failure'] > 0:
-            messages.warning(
-                request,
-                f"Failed to send {result['failure']} reminder(s). Check logs for details."
-            )
-        
-        # If no eligible borrowers
-        if result['total'] == 0:
-            messages.info(request, "No books are due soon. No reminders sent.")
-        
-        logger.info(
-            f"Admin {request.user.username} sent due reminders: "
-            f"{result['success']} success, {result['failure']} failed"
+        job = enqueue(
+            tasks.send_due_reminders,
+            {"days_threshold": days_threshold, "digest": _use_digest(request)},
+            created_by=request.user
         )
         
-        # Check if it's an AJAX request
-        if _is_ajax(request):
-            return JsonResponse({
-                'success': True,
-                'result': result,
-                'message': f"Sent {result['success']} out of {result['total']} reminders."
-            })
+        logger.info(f"Admin {request.user.username} queued due reminders as job #{job.pk}")
+        return _job_queued_response(request, job, "Due reminders")
         
     except ValueError:
         messages.error(request, "Invalid days threshold value.")
         logger.error(f"Invalid days threshold in send_due_reminders")
+        
+        if _is_ajax(request):
+            return JsonResponse({
+                'success': False,
+                'error': "Invalid days threshold value."
+            }, status=400)
     except Exception as e:
         messages.error(request, f"Error sending reminders: {str(e)}")
         logger.error(f"Error in send_due_reminders: {str(e)}")
@@ -76,45 +72,23 @@ def send_due_reminders(request: HttpRequest) -> HttpResponse:
 def send_overdue_notifications(request: HttpRequest) -> HttpResponse:
     """
     Admin action to send overdue notifications to users with overdue books.
+    
+    The emails are sent by the background worker; the response carries the
+    job id, which the page polls through the job status endpoint.
     """
     if request.method != "POST":
         messages.error(request, "Invalid request method.")
         return redirect("/admin-panel/catalog/admin/")
     
     try:
-        # Send bulk overdue notifications
-        result = send_bulk_overdue_notifications()
-        
-        # Prepare success message
-        if result['success'] > 0:
-            messages.success(
-                request,
-                f"Successfully sent {result['success']} overdue notification(s) out of {result['total']} overdue borrower(s)."
-            )
-        
-        # Add warning if there were failures
-        if result['failure'] > 0:
-            messages.warning(
-                request,
-                f"Failed to send {result['failure']} notification(s). Check logs for details."
-            )
-        
-        # If no overdue borrowers
-        if result['total'] == 0:
-            messages.info(request, "No overdue books found. No notifications sent.")
-        
-        logger.info(
-            f"Admin {request.user.username} sent overdue notifications: "
-            f"{result['success']} success, {result['failure']} failed"
+        job = enqueue(
+            tasks.send_overdue_notifications,
+            {"digest": _use_digest(request)},
+            created_by=request.user
         )
         
-        # Check if it's an AJAX request
-        if _is_ajax(request):
-            return JsonResponse({
-                'success': True,
-                'result': result,
-                'message': f"Sent {result['success']} out of {result['total']} notifications."
-            })
+        logger.info(f"Admin {request.user.username} queued overdue notifications as job #{job.pk}")
+        return _job_queued_response(request, job, "Overdue notifications")
         
     except Exception as e:
         messages.error(request, f"Error sending notifications: {str(e)}")
@@ -129,6 +103,90 @@ def send_overdue_notifications(request: HttpRequest) -> HttpResponse:
     return redirect("/admin-panel/catalog/admin/")
 
 
+@admin_required
+def delivery_history(request: HttpRequest) -> HttpResponse:
+    """
+    Admin view of the notification delivery ledger, newest first.
+    
+    GET filters: ``date_from``/``date_to`` (YYYY-MM-DD, on the day the
+    notification was for), ``status``, ``kind`` and ``page``.
+    """
+    deliveries = NotificationDelivery.objects.select_related(
+        'borrow_record__user', 'borrow_record__book'
+    )
+    
+    filters = {
+        'date_from': request.GET.get('date_from', '').strip(),
+        'date_to': request.GET.get('date_to', '').strip(),
+        'status': request.GET.get('status', '').strip(),
+        'kind': request.GET.get('kind', '').strip(),
+    }
+    
+    for key, lookup in (('date_from', 'bucket__gte'), ('date_to', 'bucket__lte')):
+        if not filters[key]:
+            continue
+        try:
+            day = parse_date(filters[key])
+        except ValueError:
+            day = None
+        if day is None:
+            messages.error(request, f"Invalid date: {filters[key]}. Use YYYY-MM-DD.")
+            filters[key] = ''
+            continue
+        deliveries = deliveries.filter(**{lookup: day})
+    
+    if filters['status'] in dict(NotificationDelivery.STATUS_CHOICES):
+        deliveries = deliveries.filter(status=filters['status'])
+    else:
+        filters['status'] = ''
+    
+    if filters['kind'] in dict(NotificationDelivery.KIND_CHOICES):
+        deliveries = deliveries.filter(kind=filters['kind'])
+    else:
+        filters['kind'] = ''
+    
+    page = Paginator(deliveries, DELIVERY_PAGE_SIZE).get_page(request.GET.get('page'))
+    
+    # Keep the filters on the pagination links
+    query = request.GET.copy()
+    query.pop('page', None)
+    
+    context = {
+        "user_info": get_current_user_info(request),
+        "deliveries": page,
+        "filters": filters,
+        "filter_query": query.urlencode(),
+        "status_choices": NotificationDelivery.STATUS_CHOICES,
+        "kind_choices": NotificationDelivery.KIND_CHOICES,
+    }
+    return render(request, "due_notifications/delivery_history.html", context)
+
+
+def _job_queued_response(request: HttpRequest, job: Job, label: str) -> HttpResponse:
+    """Respond to a queued send with the job id (AJAX) or a flash message."""
+    status_url = reverse("job_queue:job_status", args=[job.pk])
+    
+    if _is_ajax(request):
+        return JsonResponse({
+            'success': True,
+            'job_id': job.pk,
+            'status': job.status,
+            'status_url': status_url,
+            'message': f"{label} are being sent in the background (job #{job.pk})."
+        }, status=202)
+    
+    messages.info(request, f"{label} are being sent in the background (job #{job.pk}).")
+    return redirect("/admin-panel/catalog/admin/")
+
+
+def _use_digest(request: HttpRequest) -> bool:
+    """Whether to send one digest email per user (POST ``digest``, else the setting)."""
+    value = request.POST.get("digest")
+    if value is None:
+        return getattr(settings, "NOTIFICATION_DIGEST", False)
+    return value.lower() in ("1", "true", "on")
+
+
 def _is_ajax(request: HttpRequest) -> bool:
     """Check if the request is an AJAX request."""
     return request.headers.get("x-requested-with") == "XMLHttpRequest"
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from django.core.mail import send_mail
+
+from job_queue.queue import task
+
+from .models import PasswordResetOTP
+
+
+@task
+def send_otp_email(otp_id: int) -> dict:
+    """Email a password reset OTP, unless it was used or superseded meanwhile."""
+    otp = PasswordResetOTP.objects.select_related("user").filter(pk=otp_id).first()
+    if otp is None or otp.is_used or otp.is_expired:
+        return {"sent": False, "reason": "OTP is no longer valid"}
+
+    email = otp.user.email
+    if not email:
+        return {"sent": False, "reason": "User has no email address"}
+
+    subject = "ShelfSmart Password Reset OTP"
+    message = (
+        "Hello,\n\n"
+        "We received a request to reset your password for ShelfSmart. "
+        f"Use the following One-Time Password (OTP) to continue: {otp.code}\n\n"
+        "This OTP will expire in 10 minutes. If you did not request this change, "
+        "please ignore this email.\n\n"
+        "Thank you,\n"
+        "ShelfSmart Team"
+    )
+
+    send_mail(subject=subject, message=message, from_email=None, recipient_list=[email], fail_silently=False)
+    return {"sent": True}
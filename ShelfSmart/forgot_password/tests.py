@@ -1,3 +1,57 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from job_queue.models import Job
+from job_queue.queue import _run_eagerly, claim_jobs, run_job
+
+from .models import PasswordResetOTP
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class SendOtpTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="reader", email="reader@example.com", password="old-password"
+        )
+
+    def request_otp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("forgot_password:reset"),
+                {"send_otp": "1", "username": "reader"},
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+            )
+        self.assertEqual(response.status_code, 200)
+        return PasswordResetOTP.objects.get(user=self.user, is_used=False)
+
+    def assert_otp_delivered(self, otp):
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["reader@example.com"])
+        self.assertIn(otp.code, mail.outbox[0].body)
+        self.assertEqual(Job.objects.get().status, Job.SUCCEEDED)
+
+    @mock.patch("job_queue.queue.EAGER", True)
+    def test_otp_is_sent_without_a_worker(self):
+        # Run the job inline rather than on the background thread, which
+        # could not see this test's transaction
+        with mock.patch("job_queue.queue._start_eager", side_effect=_run_eagerly) as start:
+            otp = self.request_otp()
+        start.assert_called_once()
+        self.assert_otp_delivered(otp)
+
+    @mock.patch("job_queue.queue.EAGER", False)
+    def test_queued_otp_is_sent_by_the_worker(self):
+        otp = self.request_otp()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+
+        # What each run_worker thread does (the threads use their own
+        # connections, which cannot see this test's transaction)
+        for job in claim_jobs("test-worker", limit=10):
+            run_job(job)
+
+        self.assert_otp_delivered(otp)
@@ -4,15 +4,17 @@ from typing import Any, Dict, Tuple
 
 from django.contrib import messages
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
 from django.utils import timezone
 from django.views import View
 
+from job_queue.queue import enqueue
+
 from .forms import UsernameResetForm
 from .models import PasswordResetOTP
+from .tasks import send_otp_email
 
 
 UserModel = get_user_model()
@@ -77,7 +79,7 @@ class SimpleResetPasswordView(View):
             return self._respond_otp(error_payload, status=404, request=request)
 
         otp_instance = PasswordResetOTP.objects.create_for_user(user)
-        self._send_otp_email(user.email, otp_instance.code)
+        self._send_otp_email(otp_instance)
 
         success_payload = {
             "success": True,
@@ -86,22 +88,12 @@ class SimpleResetPasswordView(View):
         }
         return self._respond_otp(success_payload, request=request)
 
-    def _send_otp_email(self, email: str, code: str) -> None:
-        if not email:
+    def _send_otp_email(self, otp_instance: PasswordResetOTP) -> None:
+        # Sent by the background worker so the request does not wait on SMTP
+        if not otp_instance.user.email:
             return
 
-        subject = "ShelfSmart Password Reset OTP"
-        message = (
-            "Hello,\n\n"
-            "We received a request to reset your password for ShelfSmart. "
-            f"Use the following One-Time Password (OTP) to continue: {code}\n\n"
-            "This OTP will expire in 10 minutes. If you did not request this change, "
-            "please ignore this email.\n\n"
-            "Thank you,\n"
-            "ShelfSmart Team"
-        )
-
-        send_mail(subject=subject, message=message, from_email=None, recipient_list=[email], fail_silently=False)
+        enqueue(send_otp_email, {"otp_id": otp_instance.pk}, max_attempts=2)
 
     def _respond_otp(self, payload: Dict[str, Any], request: HttpRequest, *, status: int = 200) -> HttpResponse:
         if self._is_ajax(request):
@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import IsbnCacheEntry
+
+
+@admin.register(IsbnCacheEntry)
+class IsbnCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("isbn13", "provider", "found", "score", "fetched_at", "expires_at")
+    list_filter = ("found", "provider")
+    search_fields = ("isbn13",)
+    readonly_fields = ("isbn13", "provider", "found", "raw_payload", "volume_info", "score", "fetched_at")
@@ -0,0 +1,152 @@
+"""
+Turn ISBN lookups into the book details returned by the ISBN endpoints,
+including the ids of the matching categories, publishers and authors
+already in the catalog.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+
+from admin.common.models import Category, Publisher, Author
+from admin.common.name_index import get_index
+
+from .lookup import InvalidIsbn, IsbnLookup, LookupUnavailable, lookup_many, normalize_isbn
+
+logger = logging.getLogger(__name__)
+
+
+def clean_isbn(isbn: str) -> str:
+    """Remove any hyphens or spaces from ISBN."""
+    return str(isbn).strip().replace('-', '').replace(' ', '')
+
+
+def match_catalog(volume_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Find the catalog's category, publisher and authors for a volume by
+    ranked name matching (see admin.common.name_index).
+
+    Returns the ``matched_category_id``, ``matched_publisher_id`` and
+    ``matched_author_ids`` fields of the book details.
+    """
+    api_categories = volume_info.get('categories', [])
+    api_publisher = volume_info.get('publisher', '')
+    api_authors = volume_info.get('authors', [])
+
+    matched_category_id = None
+    matched_publisher_id = None
+    matched_author_ids = []
+
+    # Match Category: the first API category that is already in the catalog
+    if api_categories:
+        categories = get_index(Category)
+        for cat_name in api_categories:
+            category = categories.best_match(cat_name)
+            if category:
+                matched_category_id = category.id
+                logger.info(f'Matched category: {category.name} (ID: {category.id})')
+                break
+
+    # Match Publisher
+    if api_publisher:
+        publisher = get_index(Publisher).best_match(api_publisher)
+        if publisher:
+            matched_publisher_id = publisher.id
+            logger.info(f'Matched publisher: {publisher.name} (ID: {publisher.id})')
+
+    # Match Authors
+    if api_authors:
+        authors = get_index(Author)
+        for author_name in api_authors:
+            author = authors.best_match(author_name)
+            if author:
+                matched_author_ids.append({
+                    'id': author.id,
+                    'name': author.name
+                })
+                logger.info(f'Matched author: {author.name} (ID: {author.id})')
+
+    return {
+        'matched_category_id': matched_category_id,
+        'matched_publisher_id': matched_publisher_id,
+        'matched_author_ids': matched_author_ids,
+    }
+
+
+def book_details(isbn: str, result: IsbnLookup) -> Dict[str, Any]:
+    """Build the details of a found book with both API data and matched DB IDs."""
+    volume_info = result.volume_info
+    return {
+        'success': True,
+        'isbn': isbn,
+        'isbn13': result.isbn13,
+        'title': volume_info.get('title', ''),
+        'subtitle': volume_info.get('subtitle', ''),
+        'authors': volume_info.get('authors', []),
+        'publisher': volume_info.get('publisher', ''),
+        'publishedDate': volume_info.get('publishedDate', ''),
+        'description': volume_info.get('description', ''),
+        'pageCount': volume_info.get('pageCount', 0),
+        'categories': volume_info.get('categories', []),
+        'language': volume_info.get('language', ''),
+        'imageLinks': volume_info.get('imageLinks', {}),
+        'industryIdentifiers': volume_info.get('industryIdentifiers', []),
+        # Database matches
+        **match_catalog(volume_info),
+    }
+
+
+def lookup_error(error: Exception) -> Dict[str, Any]:
+    """The error message and HTTP status validate_isbn answers ``error`` with."""
+    if isinstance(error, requests.exceptions.Timeout):
+        return {'error': 'Request timeout. Please try again.', 'status': 504}
+    if isinstance(error, requests.exceptions.RequestException):
+        return {'error': 'Network error. Please check your connection.', 'status': 500}
+    if isinstance(error, LookupUnavailable):
+        return {'error': 'Failed to connect to the book information service', 'status': 500}
+    return {'error': 'An unexpected error occurred', 'status': 500}
+
+
+def resolve_isbns(isbns: Iterable[str], max_workers: Optional[int] = None,
+                  refresh: bool = False) -> List[Dict[str, Any]]:
+    """
+    Look up a list of ISBNs, e.g. a box of donated books.
+
+    The ISBNs are validated locally and deduplicated first, so malformed
+    ones never reach the provider and each book is looked up once (see
+    lookup_many).
+
+    Returns:
+        One entry per given ISBN, in order: the same details validate_isbn
+        returns, or ``{'success': False, 'isbn', 'error', 'status'}``
+    """
+    entries = []
+    for isbn in isbns:
+        isbn = clean_isbn(isbn)
+        try:
+            entries.append((isbn, normalize_isbn(isbn), None))
+        except InvalidIsbn as e:
+            entries.append((isbn, None, {'error': str(e), 'status': 400}))
+
+    results = lookup_many((isbn13 for _, isbn13, _ in entries if isbn13), max_workers, refresh)
+
+    # Duplicates share the catalog matching of their first occurrence
+    details_by_isbn13 = {}
+    resolved = []
+    for isbn, isbn13, error in entries:
+        result = results.get(isbn13) if isbn13 else None
+        if error is None and isinstance(result, Exception):
+            error = lookup_error(result)
+        elif error is None and not result.found:
+            error = {'error': 'No book found with this ISBN', 'status': 404}
+
+        if error is not None:
+            resolved.append({'success': False, 'isbn': isbn, **error})
+            continue
+
+        if isbn13 not in details_by_isbn13:
+            details_by_isbn13[isbn13] = book_details(isbn, result)
+        resolved.append({**details_by_isbn13[isbn13], 'isbn': isbn})
+
+    return resolved
@@ -0,0 +1,315 @@
+"""
+ISBN normalization and cached book-metadata lookups.
+
+``lookup_isbn`` answers from, in order: a small in-process LRU, the
+``IsbnCacheEntry`` table and finally the configured metadata provider
+(Google Books by default, see ``providers.py``). Every ISBN is
+cached under its ISBN-13 form, so the ISBN-10 and ISBN-13 of a book share
+one entry. Answers are kept for ``ISBN_CACHE_TTL`` seconds and
+"No book found" answers for ``ISBN_CACHE_NEGATIVE_TTL``; an expired entry
+is refreshed on the next lookup, or served as is if the API cannot be
+reached. Network errors are never cached.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from .models import IsbnCacheEntry
+from .providers import LookupUnavailable, get_provider
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SECONDS = getattr(settings, 'ISBN_CACHE_TTL', 30 * 24 * 3600)
+NEGATIVE_TTL_SECONDS = getattr(settings, 'ISBN_CACHE_NEGATIVE_TTL', 24 * 3600)
+
+# Lookups kept in memory per process; the least recently used go first
+MEMORY_CACHE_SIZE = getattr(settings, 'ISBN_CACHE_MEMORY_SIZE', 1024)
+
+# Provider requests made at the same time by lookup_many
+BULK_WORKERS = getattr(settings, 'ISBN_BULK_WORKERS', 8)
+
+FORMAT_ERROR = 'Invalid ISBN format. ISBN must be 10 or 13 digits.'
+CHECK_DIGIT_ERROR = 'Invalid ISBN. The check digit does not match.'
+
+
+class InvalidIsbn(ValueError):
+    """Raised for a malformed ISBN or one whose check digit is wrong."""
+
+
+class IsbnLookup(NamedTuple):
+    isbn13: str
+    found: bool
+    volume_info: Dict[str, Any]
+    score: int
+    expires_at: datetime
+    source: str  # 'memory', 'database' or 'network'
+
+
+def _isbn13_check_digit(first12: str) -> str:
+    total = sum(int(digit) * (3 if index % 2 else 1) for index, digit in enumerate(first12))
+    return str((10 - total % 10) % 10)
+
+
+def normalize_isbn(value: str) -> str:
+    """
+    Return the ISBN-13 form of ``value``, an ISBN-10 or ISBN-13 that may
+    contain hyphens and spaces. Raises InvalidIsbn if it is malformed or
+    its check digit is wrong.
+    """
+    isbn = value.replace('-', '').replace(' ', '').upper()
+
+    if len(isbn) == 10:
+        if not (isbn[:9].isdigit() and (isbn[9].isdigit() or isbn[9] == 'X')):
+            raise InvalidIsbn(FORMAT_ERROR)
+        check = 10 if isbn[9] == 'X' else int(isbn[9])
+        if (sum((10 - index) * int(digit) for index, digit in enumerate(isbn[:9])) + check) % 11:
+            raise InvalidIsbn(CHECK_DIGIT_ERROR)
+        first12 = '978' + isbn[:9]
+        return first12 + _isbn13_check_digit(first12)
+
+    if len(isbn) == 13 and isbn.isdigit():
+        if _isbn13_check_digit(isbn[:12]) != isbn[12]:
+            raise InvalidIsbn(CHECK_DIGIT_ERROR)
+        return isbn
+
+    raise InvalidIsbn(FORMAT_ERROR)
+
+
+def score_volume(volume_info: Dict[str, Any]) -> int:
+    """Score how complete a volume's metadata is."""
+    score = 0
+    if volume_info.get('title'): score += 1
+    if volume_info.get('authors'): score += 2  # Authors are important
+    if volume_info.get('publisher'): score += 2  # Publisher is important
+    if volume_info.get('categories'): score += 1
+    if volume_info.get('description'): score += 1
+    if volume_info.get('publishedDate'): score += 1
+    if volume_info.get('pageCount'): score += 1
+    if volume_info.get('imageLinks'): score += 1
+    return score
+
+
+def pick_best_volume(api_data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], int]:
+    """
+    Return the most complete ``volumeInfo`` in a volumes response and its
+    score, or ``(None, -1)`` if the response has no items.
+
+    Google Books may return several items for one ISBN, and the first one
+    does not always have the most complete data.
+    """
+    best_volume = None
+    best_score = -1
+    for item in api_data.get('items') or []:
+        volume_info = item.get('volumeInfo', {})
+        score = score_volume(volume_info)
+        if score > best_score:
+            best_score = score
+            best_volume = volume_info
+    return best_volume, best_score
+
+
+class _MemoryCache:
+    """A thread-safe LRU of IsbnLookup results that drops expired entries."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[str, IsbnLookup]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, isbn13: str) -> Optional[IsbnLookup]:
+        with self._lock:
+            result = self._entries.get(isbn13)
+            if result is None:
+                return None
+            if result.expires_at <= timezone.now():
+                del self._entries[isbn13]
+                return None
+            self._entries.move_to_end(isbn13)
+            return result
+
+    def set(self, result: IsbnLookup) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[result.isbn13] = result
+            self._entries.move_to_end(result.isbn13)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_memory_cache = _MemoryCache(MEMORY_CACHE_SIZE)
+
+
+def clear_memory_cache() -> None:
+    """Forget the lookups cached in this process (the table is kept)."""
+    _memory_cache.clear()
+
+
+def _from_entry(entry: IsbnCacheEntry, source: str) -> IsbnLookup:
+    return IsbnLookup(
+        isbn13=entry.isbn13,
+        found=entry.found,
+        volume_info=entry.volume_info,
+        score=entry.score,
+        expires_at=entry.expires_at,
+        source=source,
+    )
+
+
+def _entry_fields(api_data: Dict[str, Any], provider_name: str) -> Dict[str, Any]:
+    volume_info, score = pick_best_volume(api_data)
+    found = volume_info is not None
+    now = timezone.now()
+    ttl = CACHE_TTL_SECONDS if found else NEGATIVE_TTL_SECONDS
+    return {
+        'provider': provider_name,
+        'found': found,
+        'raw_payload': api_data,
+        'volume_info': volume_info or {},
+        'score': max(score, 0),
+        'fetched_at': now,
+        'expires_at': now + timedelta(seconds=ttl),
+    }
+
+
+def _store(isbn13: str, api_data: Dict[str, Any], provider_name: str) -> IsbnLookup:
+    entry, _ = IsbnCacheEntry.objects.update_or_create(
+        isbn13=isbn13,
+        defaults=_entry_fields(api_data, provider_name)
+    )
+    return _from_entry(entry, 'network')
+
+
+def _store_many(responses: Dict[str, Dict[str, Any]], provider_name: str) -> Dict[str, IsbnLookup]:
+    """Cache several provider responses with a single upsert."""
+    entries = [
+        IsbnCacheEntry(isbn13=isbn13, **_entry_fields(api_data, provider_name))
+        for isbn13, api_data in responses.items()
+    ]
+    IsbnCacheEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['isbn13'],
+        update_fields=['provider', 'found', 'raw_payload', 'volume_info', 'score', 'fetched_at', 'expires_at'],
+    )
+    return {entry.isbn13: _from_entry(entry, 'network') for entry in entries}
+
+
+def lookup_isbn(isbn: str, refresh: bool = False) -> IsbnLookup:
+    """
+    Look up the book metadata for ``isbn`` through the caches.
+
+    Args:
+        isbn: ISBN-10 or ISBN-13, hyphens and spaces allowed
+        refresh: Skip the caches and ask the provider again
+
+    Raises:
+        InvalidIsbn: The ISBN is malformed
+        LookupUnavailable, requests.RequestException: The provider could
+            not be reached and nothing is cached for the ISBN
+    """
+    isbn13 = normalize_isbn(isbn)
+    provider = get_provider()
+
+    if not refresh:
+        result = _memory_cache.get(isbn13)
+        if result is not None:
+            return result._replace(source='memory')
+
+    entry = IsbnCacheEntry.objects.filter(isbn13=isbn13).defer('raw_payload').first()
+    # An answer from another provider (e.g. the offline one) is not reused
+    if entry is not None and entry.provider == provider.name and entry.is_fresh and not refresh:
+        result = _from_entry(entry, 'database')
+        _memory_cache.set(result)
+        return result
+
+    try:
+        result = _store(isbn13, provider.fetch_volumes(isbn13), provider.name)
+    except (LookupUnavailable, requests.RequestException) as e:
+        if entry is None:
+            raise
+        # Better an old answer than none while the provider is down
+        logger.warning(f'Provider unavailable, serving the cached entry for ISBN {isbn13}: {str(e)}')
+        return _from_entry(entry, 'database')
+
+    _memory_cache.set(result)
+    return result
+
+
+def lookup_many(isbn13s: Iterable[str], max_workers: Optional[int] = None,
+                refresh: bool = False) -> Dict[str, Union[IsbnLookup, Exception]]:
+    """
+    Look up several normalized ISBN-13s at once.
+
+    Cached answers are read with one query. The rest are requested from the
+    provider concurrently on a pool of ``max_workers`` threads, which only
+    do network I/O, and are then cached with one upsert.
+
+    Returns:
+        ``{isbn13: IsbnLookup}``, or the exception that prevented an answer
+        in place of the IsbnLookup
+    """
+    provider = get_provider()
+    results: Dict[str, Union[IsbnLookup, Exception]] = {}
+    pending = list(dict.fromkeys(isbn13s))
+
+    if not refresh:
+        for isbn13 in pending:
+            result = _memory_cache.get(isbn13)
+            if result is not None:
+                results[isbn13] = result._replace(source='memory')
+        pending = [isbn13 for isbn13 in pending if isbn13 not in results]
+
+    entries = {}
+    if pending:
+        entries = {
+            entry.isbn13: entry
+            for entry in IsbnCacheEntry.objects.filter(isbn13__in=pending).defer('raw_payload')
+        }
+
+    misses = []
+    for isbn13 in pending:
+        entry = entries.get(isbn13)
+        if entry is not None and entry.provider == provider.name and entry.is_fresh and not refresh:
+            results[isbn13] = _from_entry(entry, 'database')
+            _memory_cache.set(results[isbn13])
+        else:
+            misses.append(isbn13)
+
+    if not misses:
+        return results
+
+    responses = {}
+    workers = max(1, min(max_workers or BULK_WORKERS, len(misses)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='isbn-lookup') as pool:
+        futures = {pool.submit(provider.fetch_volumes, isbn13): isbn13 for isbn13 in misses}
+        for future in as_completed(futures):
+            isbn13 = futures[future]
+            try:
+                responses[isbn13] = future.result()
+            except (LookupUnavailable, requests.RequestException, ValueError) as e:
+                entry = entries.get(isbn13)
+                if entry is None:
+                    results[isbn13] = e
+                else:
+                    logger.warning(f'Provider unavailable, serving the cached entry for ISBN {isbn13}: {str(e)}')
+                    results[isbn13] = _from_entry(entry, 'database')
+
+    if responses:
+        for isbn13, result in _store_many(responses, provider.name).items():
+            results[isbn13] = result
+            _memory_cache.set(result)
+
+    return results
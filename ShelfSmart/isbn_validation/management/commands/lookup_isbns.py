@@ -0,0 +1,73 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from isbn_validation.books import resolve_isbns
+
+
+class Command(BaseCommand):
+    help = (
+        "Look up book details for many ISBNs at once, e.g. to catalogue a box "
+        "of donated books. Uncached ISBNs are looked up concurrently."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('isbns', nargs='*', help="ISBNs to look up.")
+        parser.add_argument(
+            '--file',
+            help="Read ISBNs from this file, one per line ('-' for standard input)."
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help="Concurrent provider requests (default: the ISBN_BULK_WORKERS setting)."
+        )
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            help="Ignore cached answers and ask the provider again."
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help="Print each result as a line of JSON."
+        )
+
+    def handle(self, *args, **options):
+        isbns = list(options['isbns'])
+        if options['file']:
+            isbns.extend(self._read_isbns(options['file']))
+        if not isbns:
+            raise CommandError("Give ISBNs as arguments or with --file")
+
+        started = time.monotonic()
+        results = resolve_isbns(isbns, max_workers=options['workers'], refresh=options['refresh'])
+        elapsed = time.monotonic() - started
+
+        for result in results:
+            if options['json']:
+                self.stdout.write(json.dumps(result, ensure_ascii=False))
+            elif result['success']:
+                authors = ', '.join(result['authors']) or 'unknown author'
+                self.stdout.write(f"{result['isbn']}  {result['title']} ({authors})")
+            else:
+                self.stdout.write(self.style.WARNING(f"{result['isbn']}  {result['error']}"))
+
+        found = sum(1 for result in results if result['success'])
+        self.stderr.write(
+            f"Found {found} of {len(results)} ISBN(s) in {elapsed:.2f}s."
+        )
+
+    def _read_isbns(self, path):
+        try:
+            if path == '-':
+                lines = sys.stdin.read().splitlines()
+            else:
+                with open(path, encoding='utf-8') as isbn_file:
+                    lines = isbn_file.read().splitlines()
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+        return [line.strip() for line in lines if line.strip()]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IsbnCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('isbn13', models.CharField(max_length=13, unique=True)),
+                ('found', models.BooleanField(default=False)),
+                ('raw_payload', models.JSONField(blank=True, help_text='Response as returned by the API', null=True)),
+                ('volume_info', models.JSONField(blank=True, default=dict, help_text='The most complete volume in the response')),
+                ('score', models.SmallIntegerField(default=0, help_text='Completeness score of volume_info')),
+                ('fetched_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'ISBN Cache Entry',
+                'verbose_name_plural': 'ISBN Cache Entries',
+            },
+        ),
+    ]
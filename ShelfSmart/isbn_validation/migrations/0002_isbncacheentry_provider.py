@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('isbn_validation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='isbncacheentry',
+            name='provider',
+            field=models.CharField(default='google', help_text='Metadata provider that answered', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='isbncacheentry',
+            name='raw_payload',
+            field=models.JSONField(blank=True, help_text='Response as returned by the provider', null=True),
+        ),
+    ]
@@ -1,3 +1,30 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class IsbnCacheEntry(models.Model):
+    """
+    Cached book-metadata lookup for one ISBN, keyed by its ISBN-13 form.
+
+    ``found=False`` rows cache "No book found" answers so unknown ISBNs are
+    not looked up again until they expire. See ``lookup.py``.
+    """
+    isbn13 = models.CharField(max_length=13, unique=True)
+    provider = models.CharField(max_length=50, default='google', help_text="Metadata provider that answered")
+    found = models.BooleanField(default=False)
+    raw_payload = models.JSONField(null=True, blank=True, help_text="Response as returned by the provider")
+    volume_info = models.JSONField(default=dict, blank=True, help_text="The most complete volume in the response")
+    score = models.SmallIntegerField(default=0, help_text="Completeness score of volume_info")
+    fetched_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "ISBN Cache Entry"
+        verbose_name_plural = "ISBN Cache Entries"
+
+    def __str__(self):
+        return f"{self.isbn13} ({'found' if self.found else 'not found'})"
+
+    @property
+    def is_fresh(self):
+        return self.expires_at > timezone.now()
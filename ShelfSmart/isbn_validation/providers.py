@@ -0,0 +1,237 @@
+"""
+Book-metadata providers for ISBN lookups.
+
+A provider turns an ISBN-13 into a response shaped like the Google Books
+volumes API (``{'totalItems': n, 'items': [{'volumeInfo': {...}}]}``), so
+the rest of the lookup code does not care where the data came from. The
+provider in use is picked by name from ``ISBN_METADATA_PROVIDERS`` with
+``ISBN_METADATA_PROVIDER``, the same way Django picks a cache backend::
+
+    ISBN_METADATA_PROVIDERS = {
+        'google': {'BACKEND': 'isbn_validation.providers.GoogleBooksProvider',
+                   'OPTIONS': {'read_timeout': 5}},
+        'local': {'BACKEND': 'isbn_validation.providers.LocalJsonlProvider',
+                  'OPTIONS': {'path': '/data/books.jsonl'}},
+    }
+
+``LocalJsonlProvider`` answers from a file, so lookups, imports and
+benchmarks can run without network access.
+"""
+
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDERS = {
+    'google': {'BACKEND': 'isbn_validation.providers.GoogleBooksProvider'},
+}
+
+
+class LookupUnavailable(Exception):
+    """Raised when a provider cannot answer right now."""
+
+
+class BookMetadataProvider:
+    """Base class for metadata providers."""
+
+    name = 'provider'
+
+    def fetch_volumes(self, isbn13: str) -> Dict[str, Any]:
+        """
+        Return the volumes matching ``isbn13`` in the Google Books response
+        format, with ``totalItems`` 0 if there are none.
+
+        Raises LookupUnavailable (or a requests exception) if the provider
+        cannot be reached.
+        """
+        raise NotImplementedError
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing service for a while.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail straight away for ``reset_timeout`` seconds. The first call
+    after that is let through as a trial: success closes the circuit
+    again, failure keeps it open for another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """Whether a call may be made now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Let one trial call through; others wait for its outcome
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f'Circuit opened after {self._failures} consecutive failures')
+                self._opened_at = time.monotonic()
+
+
+class GoogleBooksProvider(BookMetadataProvider):
+    """
+    Google Books volumes API over a pooled keep-alive session, behind a
+    circuit breaker.
+    """
+
+    name = 'google'
+
+    def __init__(self, url: str = 'https://www.googleapis.com/books/v1/volumes',
+                 api_key: str = '', connect_timeout: float = 3.05, read_timeout: float = 10,
+                 pool_size: int = 10, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def fetch_volumes(self, isbn13: str) -> Dict[str, Any]:
+        if not self.breaker.allow():
+            raise LookupUnavailable('Google Books API is unavailable (circuit open)')
+
+        params = {'q': f'isbn:{isbn13}'}
+        if self.api_key:
+            params['key'] = self.api_key
+
+        logger.info(f'Calling Google Books API for ISBN {isbn13}')
+        try:
+            response = self.session.get(self.url, params=params, timeout=self.timeout)
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+
+        if response.status_code != 200:
+            logger.error(f'Google Books API error: {response.status_code}')
+            # Rate limiting and server errors mean the service is struggling;
+            # other errors are about this request
+            if response.status_code == 429 or response.status_code >= 500:
+                self.breaker.record_failure()
+            raise LookupUnavailable(f'Google Books API returned {response.status_code}')
+
+        self.breaker.record_success()
+        return response.json()
+
+
+class LocalJsonlProvider(BookMetadataProvider):
+    """
+    Answers from a JSON Lines file with one volume per line, either a
+    Google Books item (``{"volumeInfo": {...}}``) or a bare ``volumeInfo``.
+    A volume is found by the ISBN-10/ISBN-13 in its ``industryIdentifiers``
+    or by a top-level ``"isbn"`` key. The file is read on first use.
+
+    ``latency`` (seconds) delays every answer, to stand in for a real API
+    in load tests.
+    """
+
+    name = 'local'
+
+    def __init__(self, path: str = '', latency: float = 0):
+        self.path = path
+        self.latency = latency
+        self._volumes: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        from .lookup import InvalidIsbn, normalize_isbn
+
+        volumes: Dict[str, List[Dict[str, Any]]] = {}
+        try:
+            with open(self.path, encoding='utf-8') as catalog:
+                for line_number, line in enumerate(catalog, start=1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f'{self.path}:{line_number}: not valid JSON, skipped')
+                        continue
+
+                    volume_info = record.get('volumeInfo', record)
+                    identifiers = [record.get('isbn', '')] + [
+                        identifier.get('identifier', '')
+                        for identifier in volume_info.get('industryIdentifiers', [])
+                        if identifier.get('type') in ('ISBN_10', 'ISBN_13')
+                    ]
+                    for identifier in identifiers:
+                        try:
+                            isbn13 = normalize_isbn(str(identifier))
+                        except InvalidIsbn:
+                            continue
+                        items = volumes.setdefault(isbn13, [])
+                        if not any(item['volumeInfo'] is volume_info for item in items):
+                            items.append({'volumeInfo': volume_info})
+        except OSError as e:
+            raise ImproperlyConfigured(f'Cannot read the local book catalog {self.path!r}: {e}')
+
+        logger.info(f'Loaded {len(volumes)} ISBN(s) from {self.path}')
+        return volumes
+
+    def fetch_volumes(self, isbn13: str) -> Dict[str, Any]:
+        if self._volumes is None:
+            with self._lock:
+                if self._volumes is None:
+                    self._volumes = self._load()
+        if self.latency:
+            time.sleep(self.latency)
+        items = self._volumes.get(isbn13, [])
+        return {'totalItems': len(items), 'items': items}
+
+
+@lru_cache(maxsize=None)
+def get_provider(name: Optional[str] = None) -> BookMetadataProvider:
+    """
+    Return the configured provider (or the one called ``name``). Providers
+    are created once per process so their connection pools and circuit
+    breakers are shared.
+    """
+    name = name or getattr(settings, 'ISBN_METADATA_PROVIDER', 'google')
+    providers = getattr(settings, 'ISBN_METADATA_PROVIDERS', DEFAULT_PROVIDERS)
+    try:
+        config = providers[name]
+    except KeyError:
+        raise ImproperlyConfigured(f"No book metadata provider named '{name}' in ISBN_METADATA_PROVIDERS")
+
+    provider = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+    provider.name = name
+    return provider
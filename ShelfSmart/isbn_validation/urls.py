@@ -5,4 +5,5 @@ app_name = 'isbn_validation'
 
 urlpatterns = [
     path('validate/', views.validate_isbn, name='validate_isbn'),
+    path('validate/bulk/', views.validate_isbns_bulk, name='validate_isbns_bulk'),
 ]
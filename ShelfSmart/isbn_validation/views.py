@@ -1,10 +1,14 @@
+import json
 import requests
 import logging
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
-from admin.common.models import Category, Publisher, Author
+from django.conf import settings
+from user_auth.decorators import admin_required
+
+from .books import book_details, clean_isbn, resolve_isbns
+from .lookup import InvalidIsbn, LookupUnavailable, lookup_isbn
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +16,11 @@ logger = logging.getLogger(__name__)
 @csrf_exempt
 def validate_isbn(request):
     """
-    Validate ISBN using Google Books API and return book details.
+    Validate ISBN using the book metadata provider (Google Books by default)
+    and return book details.
+    
+    Lookups are cached per ISBN (see lookup.py), so repeat requests for the
+    same book do not reach the provider.
     
     Expected POST data:
     - isbn: The ISBN number to validate (10 or 13 digits)
@@ -21,7 +29,6 @@ def validate_isbn(request):
     - JSON response with book details or error message
     """
     try:
-        import json
         data = json.loads(request.body)
         isbn = data.get('isbn', '').strip()
         
@@ -32,138 +39,38 @@ def validate_isbn(request):
             }, status=400)
         
         # Remove any hyphens or spaces from ISBN
-        isbn = isbn.replace('-', '').replace(' ', '')
+        isbn = clean_isbn(isbn)
         
-        # Validate ISBN format (10 or 13 digits)
-        if not (isbn.isdigit() and (len(isbn) == 10 or len(isbn) == 13)):
+        try:
+            result = lookup_isbn(isbn)
+        except InvalidIsbn as e:
             return JsonResponse({
                 'success': False,
-                'error': 'Invalid ISBN format. ISBN must be 10 or 13 digits.'
+                'error': str(e)
             }, status=400)
-        
-        # Call Google Books API
-        api_url = f'https://www.googleapis.com/books/v1/volumes?q=isbn:{isbn}'
-        logger.info(f'Calling Google Books API: {api_url}')
-        
-        response = requests.get(api_url, timeout=10)
-        
-        if response.status_code != 200:
-            logger.error(f'Google Books API error: {response.status_code}')
+        except LookupUnavailable:
             return JsonResponse({
                 'success': False,
-                'error': 'Failed to connect to Google Books API'
+                'error': 'Failed to connect to the book information service'
             }, status=500)
         
-        api_data = response.json()
-        
         # Check if book was found
-        if api_data.get('totalItems', 0) == 0:
+        if not result.found:
             return JsonResponse({
                 'success': False,
                 'error': 'No book found with this ISBN'
             }, status=404)
         
-        # Extract book information with fallback to other items
-        # Google Books API may return multiple items, and the first one might not have complete data
-        # We'll check all items and use the one with the most complete information
-        
-        best_item = None
-        best_score = -1
-        
-        for item in api_data['items']:
-            volume_info = item.get('volumeInfo', {})
-            
-            # Score each item based on completeness
-            score = 0
-            if volume_info.get('title'): score += 1
-            if volume_info.get('authors'): score += 2  # Authors are important
-            if volume_info.get('publisher'): score += 2  # Publisher is important
-            if volume_info.get('categories'): score += 1
-            if volume_info.get('description'): score += 1
-            if volume_info.get('publishedDate'): score += 1
-            if volume_info.get('pageCount'): score += 1
-            if volume_info.get('imageLinks'): score += 1
-            
-            if score > best_score:
-                best_score = score
-                best_item = item
-        
-        # Use the best item found, or fallback to first item if none scored
-        if best_item is None:
-            best_item = api_data['items'][0]
-        
-        volume_info = best_item.get('volumeInfo', {})
-        logger.info(f'Using book item with completeness score: {best_score}')
-        
-        # Extract relevant fields from API
-        api_categories = volume_info.get('categories', [])
-        api_publisher = volume_info.get('publisher', '')
-        api_authors = volume_info.get('authors', [])
-        
-        # Query database for matching categories, publishers, and authors
-        matched_category_id = None
-        matched_publisher_id = None
-        matched_author_ids = []
-        
-        # Match Category: Try to find existing category by name (case-insensitive)
-        if api_categories:
-            for cat_name in api_categories:
-                category = Category.objects.filter(
-                    Q(category_name__iexact=cat_name) | Q(category_name__icontains=cat_name)
-                ).first()
-                if category:
-                    matched_category_id = category.id
-                    logger.info(f'Matched category: {category.category_name} (ID: {category.id})')
-                    break
-        
-        # Match Publisher: Try to find existing publisher by name (case-insensitive)
-        if api_publisher:
-            publisher = Publisher.objects.filter(
-                Q(publisher_name__iexact=api_publisher) | Q(publisher_name__icontains=api_publisher)
-            ).first()
-            if publisher:
-                matched_publisher_id = publisher.id
-                logger.info(f'Matched publisher: {publisher.publisher_name} (ID: {publisher.id})')
-        
-        # Match Authors: Try to find existing authors by name (case-insensitive)
-        if api_authors:
-            for author_name in api_authors:
-                author = Author.objects.filter(
-                    Q(name__iexact=author_name) | Q(name__icontains=author_name)
-                ).first()
-                if author:
-                    matched_author_ids.append({
-                        'id': author.id,
-                        'name': author.name
-                    })
-                    logger.info(f'Matched author: {author.name} (ID: {author.id})')
+        logger.info(f'Using book item with completeness score: {result.score} (from {result.source})')
         
         # Build response with both API data and matched DB IDs
-        book_data = {
-            'success': True,
-            'isbn': isbn,
-            'title': volume_info.get('title', ''),
-            'subtitle': volume_info.get('subtitle', ''),
-            'authors': api_authors,
-            'publisher': api_publisher,
-            'publishedDate': volume_info.get('publishedDate', ''),
-            'description': volume_info.get('description', ''),
-            'pageCount': volume_info.get('pageCount', 0),
-            'categories': api_categories,
-            'language': volume_info.get('language', ''),
-            'imageLinks': volume_info.get('imageLinks', {}),
-            'industryIdentifiers': volume_info.get('industryIdentifiers', []),
-            # Database matches
-            'matched_category_id': matched_category_id,
-            'matched_publisher_id': matched_publisher_id,
-            'matched_author_ids': matched_author_ids,
-        }
+        book_data = book_details(isbn, result)
         
         logger.info(f'Successfully validated ISBN: {isbn}')
         return JsonResponse(book_data)
         
     except requests.exceptions.Timeout:
-        logger.error('Google Books API timeout')
+        logger.error('Book metadata provider timeout')
         return JsonResponse({
             'success': False,
             'error': 'Request timeout. Please try again.'
@@ -188,3 +95,60 @@ def validate_isbn(request):
             'success': False,
             'error': 'An unexpected error occurred'
         }, status=500)
+
+
+@require_http_methods(["POST"])
+@admin_required
+def validate_isbns_bulk(request):
+    """
+    Validate many ISBNs at once and return the details of each book.
+    
+    Session authenticated, so callers must send the CSRF token in the
+    ``X-CSRFToken`` header.
+    
+    Expected POST data (JSON):
+    - isbns: List of ISBNs (10 or 13 digits), at most ISBN_BULK_MAX
+    
+    Returns:
+    - JSON response with one entry per ISBN, in order, each either the
+      payload validate_isbn returns or {success: false, isbn, error, status}
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid request data'
+        }, status=400)
+    
+    isbns = data.get('isbns') if isinstance(data, dict) else None
+    if not isinstance(isbns, list) or not isbns:
+        return JsonResponse({
+            'success': False,
+            'error': 'A list of ISBNs is required'
+        }, status=400)
+    
+    max_isbns = getattr(settings, 'ISBN_BULK_MAX', 500)
+    if len(isbns) > max_isbns:
+        return JsonResponse({
+            'success': False,
+            'error': f'At most {max_isbns} ISBNs can be validated at once'
+        }, status=400)
+    
+    try:
+        results = resolve_isbns(isbns)
+    except Exception as e:
+        logger.error(f'Unexpected error in bulk ISBN validation: {str(e)}')
+        return JsonResponse({
+            'success': False,
+            'error': 'An unexpected error occurred'
+        }, status=500)
+    
+    found = sum(1 for result in results if result['success'])
+    logger.info(f'Bulk validated {len(results)} ISBN(s), {found} found')
+    return JsonResponse({
+        'success': True,
+        'total': len(results),
+        'found': found,
+        'results': results,
+    })
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobQueueConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'job_queue'
+    verbose_name = 'Background Jobs'
+
+    def ready(self):
+        # Register the background tasks declared in each app's tasks.py
+        autodiscover_modules('tasks')
@@ -0,0 +1,94 @@
+import os
+import socket
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from job_queue.queue import claim_jobs, release_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the database job queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help="Number of jobs run at the same time, one thread each (default: 1)."
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help="Seconds to wait before checking again when the queue is empty (default: 2)."
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Exit once no due jobs are left instead of waiting for more."
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        poll_interval = max(0.1, options['poll_interval'])
+        once = options['once']
+        worker_name = f"{socket.gethostname()}:{os.getpid()}"
+
+        released = release_stale_jobs()
+        if released:
+            self.stdout.write(self.style.WARNING(f"Released {released} stale job(s)."))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker {worker_name} started with concurrency {concurrency}."
+        ))
+
+        stop = threading.Event()
+        processed = [0] * concurrency
+        threads = [
+            threading.Thread(
+                target=self._work,
+                args=(f"{worker_name}/{index}", index, processed, stop, poll_interval, once),
+                daemon=True,
+            )
+            for index in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the running jobs finish...")
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS(f"Worker stopped after {sum(processed)} job(s)."))
+
+    def _work(self, worker_id, index, processed, stop, poll_interval, once):
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                jobs = claim_jobs(worker_id, limit=1)
+                if not jobs:
+                    if once:
+                        return
+                    release_stale_jobs()
+                    stop.wait(poll_interval)
+                    continue
+
+                for job in jobs:
+                    started = time.monotonic()
+                    job = run_job(job)
+                    processed[index] += 1
+                    self.stdout.write(
+                        f"[{worker_id}] Job #{job.pk} {job.task}: {job.status} "
+                        f"({time.monotonic() - started:.2f}s)"
+                    )
+        finally:
+            connections.close_all()
@@ -0,0 +1,259 @@
+"""
+A small job queue stored in the application database.
+
+Apps declare background tasks in their ``tasks.py`` with :func:`task` and
+queue them with :func:`enqueue`; ``manage.py run_worker`` claims and runs
+them, or, with ``JOB_QUEUE_EAGER`` (the default), the enqueuing process runs
+them itself on a background thread once its transaction commits, so the
+request that queued them is not held up.
+
+Claiming uses ``SELECT ... FOR UPDATE SKIP LOCKED`` where the database
+supports it (PostgreSQL), so concurrent workers never block on or pick the
+same job. Elsewhere (SQLite) a job is claimed with a conditional
+``UPDATE ... WHERE status = 'queued' AND run_at <= now``; only one
+worker's update can match.
+
+Failed jobs are retried with exponential backoff until ``max_attempts`` is
+reached; eager jobs are retried straight away on the same thread, as no
+worker would pick up a scheduled retry. Jobs left ``running`` by a crashed
+worker are requeued once their lock is older than ``JOB_QUEUE_STALE_AFTER``
+seconds.
+"""
+
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Run jobs in-process right after the enqueuing transaction commits instead
+# of waiting for a worker. On unless a deployment runs ``run_worker``, so
+# queued jobs are never left waiting for a worker that does not exist.
+EAGER = getattr(settings, 'JOB_QUEUE_EAGER', True)
+
+DEFAULT_MAX_ATTEMPTS = getattr(settings, 'JOB_QUEUE_MAX_ATTEMPTS', 3)
+
+# Retry delay: BACKOFF_BASE * 2 ** (attempt - 1) seconds, capped at BACKOFF_MAX
+BACKOFF_BASE_SECONDS = getattr(settings, 'JOB_QUEUE_BACKOFF_BASE', 30)
+BACKOFF_MAX_SECONDS = getattr(settings, 'JOB_QUEUE_BACKOFF_MAX', 3600)
+
+# A running job whose lock is older than this is assumed to be orphaned
+STALE_AFTER_SECONDS = getattr(settings, 'JOB_QUEUE_STALE_AFTER', 900)
+
+_registry = {}
+
+
+class UnknownTask(LookupError):
+    """Raised when a job names a task that is not registered."""
+
+
+def task(func=None, *, name=None):
+    """
+    Register ``func`` as a background task.
+
+    The task is called with the job's payload as keyword arguments and should
+    return something JSON-serializable, which is stored as the job's result.
+    It is registered as ``<module>.<function name>`` unless ``name`` is given.
+    """
+    def register(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        _registry[task_name] = func
+        func.task_name = task_name
+        return func
+
+    if func is not None:
+        return register(func)
+    return register
+
+
+def get_task(task_name):
+    try:
+        return _registry[task_name]
+    except KeyError:
+        raise UnknownTask(f"No task registered as '{task_name}'")
+
+
+def enqueue(task_func_or_name, payload=None, *, created_by=None, max_attempts=None, delay=None):
+    """
+    Queue a task and return its :class:`Job`.
+
+    The job becomes visible to workers when the surrounding transaction
+    commits.
+    """
+    task_name = getattr(task_func_or_name, 'task_name', task_func_or_name)
+    get_task(task_name)  # fail early on typos
+
+    job = Job.objects.create(
+        task=task_name,
+        payload=payload or {},
+        max_attempts=max_attempts or DEFAULT_MAX_ATTEMPTS,
+        run_at=timezone.now() + (delay or timedelta()),
+        created_by=created_by if created_by is not None and created_by.is_authenticated else None,
+    )
+
+    if EAGER:
+        transaction.on_commit(lambda: _start_eager(job.pk))
+
+    return job
+
+
+def _start_eager(job_pk):
+    threading.Thread(target=_run_eagerly_in_thread, args=(job_pk,), name=f'job-{job_pk}').start()
+
+
+def _run_eagerly_in_thread(job_pk):
+    try:
+        _run_eagerly(job_pk)
+    except Exception:
+        logger.exception(f"Eager run of job #{job_pk} crashed")
+    finally:
+        # The thread's own connection
+        connection.close()
+
+
+def _run_eagerly(job_pk):
+    job = claim_job(job_pk, worker_id='eager')
+    while job is not None:
+        run_job(job)
+        if job.status != Job.QUEUED:
+            break
+        # Requeued for a retry that no worker will pick up; retry now until
+        # the job succeeds or runs out of attempts
+        job = claim_job(job_pk, worker_id='eager')
+
+
+def _claim_update(worker_id, now):
+    return {
+        'status': Job.RUNNING,
+        'locked_by': worker_id,
+        'locked_at': now,
+        'attempts': F('attempts') + 1,
+        'updated_at': now,
+    }
+
+
+def claim_job(job_pk, worker_id):
+    """Claim one specific queued job. Returns it, or None if someone else did."""
+    now = timezone.now()
+    claimed = Job.objects.filter(pk=job_pk, status=Job.QUEUED).update(**_claim_update(worker_id, now))
+    return Job.objects.get(pk=job_pk) if claimed else None
+
+
+def claim_jobs(worker_id, limit=1):
+    """Claim up to ``limit`` due jobs for ``worker_id``, oldest first."""
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job_pks = list(
+                due.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit]
+            )
+            Job.objects.filter(pk__in=job_pks).update(**_claim_update(worker_id, now))
+    else:
+        # Look at a few more candidates than needed in case other workers
+        # win some of them; each conditional UPDATE claims at most one job.
+        job_pks = []
+        for job_pk in due.values_list('pk', flat=True)[:limit * 4]:
+            # Re-check the whole condition: the job may have been run, failed
+            # and been rescheduled since the candidates were read
+            if due.filter(pk=job_pk).update(**_claim_update(worker_id, now)):
+                job_pks.append(job_pk)
+                if len(job_pks) >= limit:
+                    break
+
+    return list(Job.objects.filter(pk__in=job_pks).order_by('run_at', 'id'))
+
+
+def backoff_delay(attempt):
+    """Seconds to wait before retrying after failed attempt number ``attempt``."""
+    return min(BACKOFF_BASE_SECONDS * 2 ** max(attempt - 1, 0), BACKOFF_MAX_SECONDS)
+
+
+def run_job(job):
+    """
+    Run a claimed job and record the outcome. Failures are retried later
+    with backoff until the job runs out of attempts.
+    """
+    try:
+        result = get_task(job.task)(**job.payload)
+    except Exception as e:
+        _record_failure(job, e)
+        return job
+
+    now = timezone.now()
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.SUCCEEDED,
+        result=result,
+        last_error='',
+        finished_at=now,
+        updated_at=now,
+    )
+    job.status = Job.SUCCEEDED
+    job.result = result
+    logger.info(f"Job #{job.pk} {job.task} succeeded")
+    return job
+
+
+def _record_failure(job, error):
+    now = timezone.now()
+    message = f"{error.__class__.__name__}: {error}"
+    retry = not isinstance(error, UnknownTask) and job.attempts < job.max_attempts
+
+    if retry:
+        delay = backoff_delay(job.attempts)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.QUEUED,
+            run_at=now + timedelta(seconds=delay),
+            locked_by='',
+            locked_at=None,
+            last_error=message,
+            updated_at=now,
+        )
+        job.status = Job.QUEUED
+        logger.warning(f"Job #{job.pk} {job.task} failed (attempt {job.attempts}), retrying in {delay}s: {message}")
+    else:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED,
+            last_error=message + '\n\n' + traceback.format_exc(),
+            finished_at=now,
+            updated_at=now,
+        )
+        job.status = Job.FAILED
+        logger.error(f"Job #{job.pk} {job.task} failed permanently: {message}")
+
+    job.last_error = message
+
+
+def release_stale_jobs(stale_after=STALE_AFTER_SECONDS):
+    """
+    Requeue jobs whose worker died mid-run. Returns the number released.
+    Jobs that have used up their attempts are marked failed instead.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=stale_after))
+
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED,
+        last_error='Worker stopped before the job finished',
+        finished_at=now,
+        updated_at=now,
+    )
+    requeued = stale.update(
+        status=Job.QUEUED,
+        locked_by='',
+        locked_at=None,
+        run_at=now,
+        updated_at=now,
+    )
+    if failed or requeued:
+        logger.warning(f"Released stale jobs: {requeued} requeued, {failed} failed")
+    return failed + requeued
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'job_queue'
+
+urlpatterns = [
+    path('<int:job_id>/', views.job_status, name='job_status'),
+]
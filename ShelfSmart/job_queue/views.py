@@ -0,0 +1,21 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+
+from .models import Job
+
+
+@login_required(login_url='/login/')
+def job_status(request, job_id):
+    """
+    API endpoint returning the status of a background job. Admins can see
+    any job; other users only the jobs they queued.
+    """
+    jobs = Job.objects.all()
+    if request.user.user_type != 'admin':
+        jobs = jobs.filter(created_by=request.user)
+
+    job = jobs.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'success': False, 'error': 'Job not found'}, status=404)
+
+    return JsonResponse({'success': True, 'job': job.to_dict()})
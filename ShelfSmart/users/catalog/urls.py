@@ -6,6 +6,7 @@ app_name = 'catalog'
 urlpatterns = [
     path('', views.catalog_view, name='catalog'),
     path('borrow/<int:book_id>/', views.borrow_book, name='borrow_book'),
+    path('api/books/', views.catalog_books_api, name='catalog_books_api'),
     path('api/book/<int:book_id>/', views.get_book_details, name='get_book_details'),
     # Search history endpoints
     path('api/search-history/save/', views.save_search_history, name='save_search_history'),
@@ -1,9 +1,11 @@
-from django.shortcuts import render
+from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from user_auth.decorators import user_required
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from admin.common.models import Book, BorrowRecord, Category
+from admin.common.pagination import InvalidCursor, paginate_keyset, parse_page_size
+from catalog_search.backends import search_filter, search_rank
 from settings.models import AppSettings
 from datetime import datetime, timedelta
 import logging
@@ -12,49 +14,98 @@ logger = logging.getLogger(__name__)
 
 # Create your views here.
 
-@user_required
-def catalog_view(request):
+# Sort keys the catalog can be ordered (and keyset-paginated) by
+ALLOWED_SORT_FIELDS = [
+    'title', '-title',
+    'created_at', '-created_at',
+    'category__category_name', '-category__category_name',
+    'publisher__publisher_name', '-publisher__publisher_name'
+]
+DEFAULT_SORT = '-created_at'
+
+# Sort used for search results: best match first
+RELEVANCE_SORT = 'relevance'
+
+
+def _get_catalog_page(request):
     """
-    User catalog view - displays available books for borrowing with category filtering and sorting
+    Resolve one keyset-paginated page of the catalog from the request's
+    ``q``, ``category``, ``sort``, ``cursor`` and ``page_size`` query params.
+
+    Shared by the HTML catalog and the JSON endpoint so a cursor issued by one
+    can be used with the other.
     """
     # Get category filter from query params
     category_id = request.GET.get('category', None)
     
-    # Get sort parameter from query params
-    sort_by = request.GET.get('sort', '-created_at')
+    # Get full-text search query from query params
+    search_query = request.GET.get('q', '').strip()
+    
+    # Get sort parameter from query params; searches default to best match first
+    sort_by = request.GET.get('sort') or (RELEVANCE_SORT if search_query else DEFAULT_SORT)
     
     # Validate sort parameter to prevent injection attacks
-    allowed_sort_fields = [
-        'title', '-title',
-        'created_at', '-created_at',
-        'category__category_name', '-category__category_name',
-        'publisher__publisher_name', '-publisher__publisher_name'
-    ]
+    if sort_by not in ALLOWED_SORT_FIELDS and not (search_query and sort_by == RELEVANCE_SORT):
+        sort_by = DEFAULT_SORT  # Default to newest first
     
-    if sort_by not in allowed_sort_fields:
-        sort_by = '-created_at'  # Default to newest first
+    page_size = parse_page_size(request.GET.get('page_size'))
+    cursor = request.GET.get('cursor') or None
     
-    # Fetch books with related category, publisher, and author data
+    # Fetch books with related category, publisher, and author data, plus the
+    # current user's availability resolved in the same query
     books_query = Book.objects.select_related('category', 'publisher').prefetch_related(
         'book_authors__author'
-    ).all()
+    ).with_user_availability(request.user)
     
-    # Apply category filter if provided
+    # Apply category filter if provided, including its subcategories. The
+    # path is read from the database (one primary key lookup): the cached
+    # tree may not have caught up with a category another process moved.
     if category_id:
         try:
-            books_query = books_query.filter(category_id=category_id)
+            category_path = Category.objects.filter(pk=int(category_id)).values_list('path', flat=True).first()
         except ValueError:
-            pass  # Invalid category ID, show all books
+            category_id = None  # Invalid category ID, show all books
+        else:
+            if category_path:
+                books_query = books_query.filter(category__path__startswith=category_path)
+            else:
+                # Unknown category (no books), or one without a path yet
+                books_query = books_query.filter(category_id=category_id)
     
-    # Apply sorting
-    books_qs = books_query.order_by(sort_by)
+    # Restrict to full-text matches, ranked in the database so the keyset
+    # pages walk through every match
+    if search_query:
+        books_query = books_query.filter(search_filter(search_query)).annotate(
+            search_rank=search_rank(search_query)
+        )
     
-    # Add dynamic availability for each book based on current user
-    books = []
-    for book in books_qs:
-        # Add dynamic availability as an attribute
-        book.user_availability = book.get_user_availability(request.user)
-        books.append(book)
+    sort_field = 'search_rank' if sort_by == RELEVANCE_SORT else sort_by
+    page = paginate_keyset(books_query, sort_field, cursor=cursor, page_size=page_size)
+    return page, category_id, sort_by, search_query
+
+
+def _catalog_query(request, **params):
+    """Return the current catalog query string with ``params`` replaced."""
+    query = request.GET.copy()
+    for key, value in params.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return query.urlencode()
+
+
+@user_required
+def catalog_view(request):
+    """
+    User catalog view - displays available books for borrowing with category filtering,
+    sorting and cursor-based pagination
+    """
+    try:
+        page, category_id, sort_by, search_query = _get_catalog_page(request)
+    except InvalidCursor:
+        # Stale or tampered cursor - start again from the first page
+        return redirect(f"{request.path}?{_catalog_query(request, cursor=None)}")
     
     # Fetch all categories for the filter dropdown
     categories = Category.objects.all().order_by('category_name')
@@ -67,13 +118,57 @@ def catalog_view(request):
     context = {
         'user': request.user,
         'user_info': user_info,
-        'books': books,
+        'books': page.items,
+        'page': page,
+        'next_query': _catalog_query(request, cursor=page.next_cursor) if page.has_next else None,
+        'previous_query': _catalog_query(request, cursor=page.previous_cursor) if page.has_previous else None,
+        'first_query': _catalog_query(request, cursor=None),
         'categories': categories,
         'selected_category': category_id,
         'selected_sort': sort_by,
+        'search_query': search_query,
     }
     return render(request, 'catalog/catalog.html', context)
 
+
+@user_required
+@require_http_methods(["GET"])
+def catalog_books_api(request):
+    """
+    API endpoint returning one keyset-paginated page of the catalog as JSON
+    """
+    try:
+        page, category_id, sort_by, search_query = _get_catalog_page(request)
+    except InvalidCursor as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    books = []
+    for book in page:
+        books.append({
+            'id': book.id,
+            'title': book.title,
+            'category_name': book.category.category_name,
+            'publisher_name': book.publisher.publisher_name,
+            'authors': [ba.author.name for ba in book.book_authors.all()],
+            'language': book.language,
+            'quantity': book.quantity,
+            'user_availability': book.user_availability,
+        })
+    
+    return JsonResponse({
+        'success': True,
+        'books': books,
+        'sort': sort_by,
+        'q': search_query,
+        'category': category_id,
+        'page_size': page.page_size,
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    })
+
 @user_required
 @require_http_methods(["POST"])
 def borrow_book(request, book_id):
@@ -81,11 +176,11 @@ def borrow_book(request, book_id):
     Handle book borrowing request
     """
     try:
-        # Get the book
-        book = Book.objects.get(id=book_id)
+        # Get the book along with its availability for this specific user
+        book = Book.objects.with_user_availability(request.user).get(id=book_id)
         
         # Check if book is available for this specific user
-        user_availability = book.get_user_availability(request.user)
+        user_availability = book.user_availability
         if user_availability != 'available':
             if user_availability == 'unavailable':
                 message = 'No copies of this book are available.'
@@ -99,24 +194,28 @@ def borrow_book(request, book_id):
                 'message': message
             }, status=400)
         
-        # Create borrow record
         # Get default borrow days from settings
         app_settings = AppSettings.get_settings()
         borrow_days = app_settings.default_borrow_days
         due_date = datetime.now().date() + timedelta(days=borrow_days)
         
-        borrow_record = BorrowRecord.objects.create(
-            user_id=request.user.id,
-            book=book,
-            due_date=due_date,
-            is_returned=False
-        )
+        # Create the borrow record and take a copy in one transaction; the
+        # database re-checks both conditions above, so a concurrent borrow
+        # that won the race is still reported correctly
+        try:
+            BorrowRecord.objects.borrow(request.user, book.id, due_date)
+        except BorrowRecord.Unavailable:
+            return JsonResponse({
+                'success': False,
+                'message': 'No copies of this book are available.'
+            }, status=400)
+        except BorrowRecord.AlreadyBorrowed:
+            return JsonResponse({
+                'success': False,
+                'message': 'You have already borrowed this book and not returned it yet.'
+            }, status=400)
         
-        # Update book quantity
-        book.quantity -= 1
-        if book.quantity == 0:
-            book.availability = 'borrowed'
-        book.save()
+        book.refresh_from_db(fields=['quantity', 'availability'])
         
         logger.info(f"User {request.user.username} borrowed book {book.title}")
         
@@ -150,7 +249,7 @@ def get_book_details(request, book_id):
         # Fetch book with related data
         book = Book.objects.select_related('category', 'publisher').prefetch_related(
             'book_authors__author'
-        ).get(id=book_id)
+        ).with_user_availability(request.user).get(id=book_id)
         
         # Get authors for this book
         authors = []
@@ -183,6 +282,7 @@ def get_book_details(request, book_id):
                 'quantity': book.quantity,
                 'total_copies': book.total_copies,
                 'availability': book.availability,
+                'user_availability': book.user_availability,
                 'cover_image_url': book.cover_image_url or '',
                 'created_at': book.created_at.strftime('%Y-%m-%d %H:%M:%S'),
                 'updated_at': book.updated_at.strftime('%Y-%m-%d %H:%M:%S'),